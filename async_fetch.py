@@ -0,0 +1,300 @@
+"""
+asyncio/aiohttp fetch engine with a blocking facade.
+
+One event loop runs on a background thread and owns a pooled aiohttp
+connector with a global connection cap and a per-host cap. Blocking callers
+(the crawler, HttpClient, the RA and BeautifulSoup scrapers) use get() or
+FetchSession.get(), which return a requests-like Response and raise requests
+exceptions, so existing error handling keeps working. fetch_many() runs a
+batch of URLs concurrently on the same loop.
+
+    python async_fetch.py   # benchmark against a local stand-in with artificial latency
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+import atexit
+import aiohttp
+import requests
+from rate_limit import get_limiter
+
+logger = logging.getLogger('concert_app')
+
+# Connection and retry settings - override via environment
+MAX_CONNECTIONS = int(os.environ.get('ASYNC_FETCH_MAX_CONNECTIONS', '50'))  # Across all hosts
+MAX_PER_HOST = int(os.environ.get('ASYNC_FETCH_MAX_PER_HOST', '4'))  # Simultaneous connections to one host
+RETRIES = int(os.environ.get('ASYNC_FETCH_RETRIES', '2'))  # Extra attempts on connection errors, 429 and 5xx
+BACKOFF_BASE = float(os.environ.get('ASYNC_FETCH_BACKOFF_BASE', '1.0'))  # Seconds; doubles per attempt, full jitter
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class Response:
+    """The parts of requests.Response that this codebase uses"""
+
+    def __init__(self, url, status_code, headers, content, reason=''):
+        self.url = url
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.content = content
+        self.reason = reason
+        self.encoding = self._charset() or 'utf-8'
+
+    def _charset(self):
+        content_type = self.headers.get('Content-Type', '')
+        for param in content_type.split(';')[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'charset' and value:
+                return value.strip('"\'')
+        return None
+
+    @property
+    def text(self):
+        try:
+            return self.content.decode(self.encoding, errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            kind = 'Client' if self.status_code < 500 else 'Server'
+            raise requests.HTTPError(f"{self.status_code} {kind} Error: {self.reason} for url: {self.url}", response=self)
+
+
+class _Engine:
+    """Background event loop plus the shared connector"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='async-fetch-loop', daemon=True)
+        self.thread.start()
+        self.connector = self.run(self._make_connector())
+        self.session = self.run(self._make_session(keep_cookies=False))
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'errors': 0, 'seconds': 0.0}
+
+    async def _make_connector(self):
+        return aiohttp.TCPConnector(limit=MAX_CONNECTIONS, limit_per_host=MAX_PER_HOST, ttl_dns_cache=300)
+
+    async def _make_session(self, keep_cookies):
+        # Cookie jars bind to the running loop, so they are created on it
+        cookie_jar = aiohttp.CookieJar(unsafe=True) if keep_cookies else aiohttp.DummyCookieJar()
+        return aiohttp.ClientSession(connector=self.connector, connector_owner=False, cookie_jar=cookie_jar)
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def bump(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    async def fetch(self, session, url, headers=None, timeout=30, proxies=None, allow_redirects=True,
+                    retries=None, rate_limit=True):
+        retries = RETRIES if retries is None else retries
+        proxy = None
+        if proxies:
+            proxy = proxies.get('https' if url.startswith('https') else 'http')
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        for attempt in range(retries + 1):
+            if rate_limit:
+                # Same per-host buckets as the blocking code, but waiting doesn't hold a thread
+                wait = get_limiter().reserve(url)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            start = time.time()
+            retry_after = None
+            try:
+                async with session.get(url, headers=headers, timeout=client_timeout, proxy=proxy,
+                                       allow_redirects=allow_redirects) as resp:
+                    content = await resp.read()
+                    response = Response(str(resp.url), resp.status, resp.headers, content, resp.reason or '')
+                self.bump('requests')
+                self.bump('seconds', time.time() - start)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+                retry_after = response.headers.get('Retry-After')
+                logger.info(f"{url} returned {response.status_code}, retrying")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.bump('errors')
+                if attempt == retries:
+                    raise _as_requests_error(e, url) from e
+                logger.info(f"Fetch error for {url} ({type(e).__name__}: {e}), retrying")
+
+            self.bump('retries')
+            # Full jitter backoff; honour a numeric Retry-After if the server sent one
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, min(BACKOFF_MAX, float(retry_after)))
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def close(self):
+        async def _close():
+            await self.session.close()
+            await self.connector.close()
+        try:
+            self.run(_close())
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def _as_requests_error(error, url):
+    """Translate aiohttp/asyncio errors into the requests exceptions callers already catch"""
+    if isinstance(error, asyncio.TimeoutError):
+        return requests.exceptions.Timeout(f"Timed out fetching {url}")
+    if isinstance(error, aiohttp.ClientProxyConnectionError):
+        return requests.exceptions.ProxyError(str(error))
+    if isinstance(error, aiohttp.ClientConnectionError):
+        return requests.exceptions.ConnectionError(str(error))
+    return requests.exceptions.RequestException(str(error))
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Get the process-wide fetch engine, starting its loop thread on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = _Engine()
+            atexit.register(_engine.close)
+        return _engine
+
+
+def get(url, headers=None, timeout=30, **kwargs):
+    """Blocking GET through the shared async engine (no cookies kept between calls)"""
+    engine = get_engine()
+    return engine.run(engine.fetch(engine.session, url, headers=headers, timeout=timeout, **kwargs))
+
+
+def fetch_many(urls, headers=None, timeout=30, **kwargs):
+    """Fetch URLs concurrently; returns Responses (or the exception raised) in input order"""
+    engine = get_engine()
+
+    async def gather():
+        tasks = [engine.fetch(engine.session, url, headers=headers, timeout=timeout, **kwargs) for url in urls]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return [
+            _as_requests_error(r, url) if isinstance(r, (aiohttp.ClientError, asyncio.TimeoutError)) else r
+            for r, url in zip(results, urls)
+        ]
+    return engine.run(gather())
+
+
+class FetchSession:
+    """A cookie-keeping session (like requests.Session) sharing the engine's connection pool"""
+
+    def __init__(self):
+        self.engine = get_engine()
+        self.session = self.engine.run(self.engine._make_session(keep_cookies=True))
+
+    def get(self, url, headers=None, timeout=30, **kwargs):
+        return self.engine.run(self.engine.fetch(self.session, url, headers=headers, timeout=timeout, **kwargs))
+
+    def close(self):
+        self.engine.run(self.session.close())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def log_stats():
+    s = get_engine().stats()
+    avg = s['seconds'] / s['requests'] if s['requests'] else 0.0
+    logger.info(
+        f"PERFORMANCE: Async fetch - {s['requests']} responses, {s['retries']} retries, "
+        f"{s['errors']} connection errors, avg {avg:.2f}s per response"
+    )
+
+
+if __name__ == "__main__":
+    # Benchmark: blocking requests vs. this engine against local stand-in venue
+    # sites, each answering after an artificial delay (like a slow venue CMS).
+    #   python async_fetch.py                          # synthetic listing page on --hosts sites
+    #   python async_fetch.py corpus/ page.html ...    # saved venue pages (e.g. HTML_CORPUS_DIR), one site each
+    import argparse
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    arg_parser = argparse.ArgumentParser(description='Benchmark the async fetch engine')
+    arg_parser.add_argument('saved', nargs='*', help='Saved venue pages or directories of them to serve')
+    arg_parser.add_argument('--hosts', type=int, default=8, help='Stand-in venue sites without saved pages')
+    arg_parser.add_argument('--pages', type=int, default=5, help='Pages fetched per site')
+    arg_parser.add_argument('--latency', type=float, default=0.3, help='Seconds each response is delayed')
+    args = arg_parser.parse_args()
+
+    bodies = []
+    for path in args.saved:
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(('.html', '.htm'))] \
+            if os.path.isdir(path) else [path]
+        for file_path in files:
+            with open(file_path, 'rb') as f:
+                bodies.append(f.read())
+    if args.saved and not bodies:
+        arg_parser.error('no .html pages found')
+    if not bodies:
+        bodies = [("<html><body>" + "".join(
+            f"<div class='event'><h3>Artist {i}</h3><p>March {i % 28 + 1} 8:00 PM</p></div>" for i in range(300)
+        ) + "</body></html>").encode('utf-8')] * args.hosts
+
+    def venue_site(page):
+        class VenuePage(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(args.latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(page)))
+                self.end_headers()
+                self.wfile.write(page)
+
+            def log_message(self, *a):
+                pass
+        return VenuePage
+
+    servers = []
+    for page in bodies:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), venue_site(page))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    urls = [f"http://127.0.0.1:{s.server_address[1]}/calendar?page={p}" for s in servers for p in range(args.pages)]
+
+    start = time.time()
+    with requests.Session() as blocking:
+        for url in urls:
+            blocking.get(url, timeout=30).raise_for_status()
+    sequential = time.time() - start
+
+    get(urls[0], rate_limit=False)  # Start the loop thread outside the timing
+    start = time.time()
+    responses = fetch_many(urls, rate_limit=False)
+    concurrent = time.time() - start
+    assert all(isinstance(r, Response) and r.ok for r in responses)
+
+    total_bytes = sum(len(r.content) for r in responses)
+    print(f"{len(urls)} pages ({total_bytes / 1024:.0f} KB) from {len(servers)} "
+          f"{'saved venue pages' if args.saved else 'synthetic hosts'}, {args.latency:.2f}s latency each")
+    print(f"  blocking requests, one at a time: {sequential:.2f}s ({len(urls) / sequential:.1f} pages/s)")
+    print(f"  async engine, {MAX_PER_HOST} per host:        {concurrent:.2f}s ({len(urls) / concurrent:.1f} pages/s)")
+    print(f"  speedup: {sequential / concurrent:.1f}x")
+    for server in servers:
+        server.shutdown()
@@ -0,0 +1,542 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+import psutil
+from selenium import webdriver
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.firefox.service import Service
+
+logger = logging.getLogger('concert_app')
+
+# Pool limits - override via environment
+POOL_SIZE = int(os.environ.get('BROWSER_POOL_SIZE', '2'))  # Max live drivers across all browsers
+MAX_PAGES_PER_DRIVER = int(os.environ.get('BROWSER_MAX_PAGES', '25'))  # Recycle after this many checkouts
+MAX_RSS_MB = int(os.environ.get('BROWSER_MAX_RSS_MB', '1024'))  # Recycle when driver + browser RSS exceeds this
+CHECKOUT_TIMEOUT = int(os.environ.get('BROWSER_CHECKOUT_TIMEOUT', '600'))
+
+# Resource types the browsers don't download - we only read DOM text.
+# A venue can re-enable some via 'allow_resources' (see profile_for).
+RESOURCE_TYPES = ('images', 'fonts', 'media', 'trackers')
+BLOCK_RESOURCES = [t.strip() for t in os.environ.get('BLOCK_RESOURCES', ','.join(RESOURCE_TYPES)).split(',') if t.strip()]
+
+# Ad, analytics and tag-manager hosts (subdomains included) blocked under 'trackers'
+TRACKER_HOSTS = [
+    'google-analytics.com', 'googletagmanager.com', 'googletagservices.com', 'googlesyndication.com',
+    'googleadservices.com', 'doubleclick.net', 'adservice.google.com', 'connect.facebook.net',
+    'facebook.net', 'analytics.tiktok.com', 'static.hotjar.com', 'script.hotjar.com', 'hotjar.com',
+    'cdn.segment.com', 'api.segment.io', 'scorecardresearch.com', 'quantserve.com', 'amazon-adsystem.com',
+    'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com', 'clarity.ms', 'bat.bing.com',
+    'cdn.mxpnl.com', 'api-js.mixpanel.com', 'fullstory.com', 'js-agent.newrelic.com', 'bam.nr-data.net',
+    'static.ads-twitter.com', 'snap.licdn.com', 'px.ads.linkedin.com', 'sc-static.net', 'ct.pinterest.com',
+    'js.hs-analytics.net', 'js.hs-scripts.com', 'cdn.heapanalytics.com', 'plausible.io', 'stats.wp.com',
+]
+# Web font CDNs blocked under 'fonts' in Chrome (Firefox can switch web fonts off entirely)
+FONT_HOSTS = ['fonts.googleapis.com', 'fonts.gstatic.com', 'use.typekit.net', 'p.typekit.net', 'use.fontawesome.com']
+# Chrome has no content setting for fonts or media - these URL patterns are blocked over CDP instead
+BLOCKED_URL_PATTERNS = {
+    'fonts': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'media': ['*.mp4', '*.webm', '*.m4v', '*.mov', '*.mp3', '*.m4a', '*.ogg', '*.m3u8', '*.ts'],
+}
+
+FIREFOX_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:123.0) Gecko/20100101 Firefox/123.0'
+CHROME_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+
+
+def blocked_types(allow=None):
+    """Resource types to block given a venue's allowlist (types and/or host names)"""
+    allow = set(allow or ())
+    return [t for t in BLOCK_RESOURCES if t not in allow]
+
+
+def blocked_hosts(types, allow=None):
+    """Host names to make unresolvable for the blocked types, minus allowlisted hosts"""
+    allow = set(allow or ())
+    hosts = []
+    if 'trackers' in types:
+        hosts += TRACKER_HOSTS
+    if 'fonts' in types:
+        hosts += FONT_HOSTS
+    return [h for h in hosts if h not in allow]
+
+
+def blocked_url_patterns(allow=None):
+    """URL patterns Chrome blocks over CDP for a venue's allowlist - passed to start_driver"""
+    return [p for t in blocked_types(allow) for p in BLOCKED_URL_PATTERNS.get(t, [])]
+
+
+def apply_firefox_blocking(options, allow=None):
+    """Stop Firefox downloading images, web fonts, media and tracker scripts"""
+    types = blocked_types(allow)
+    if 'images' in types:
+        options.set_preference('permissions.default.image', 2)
+    if 'fonts' in types:
+        options.set_preference('gfx.downloadable_fonts.enabled', False)
+    if 'media' in types:
+        options.set_preference('media.autoplay.default', 5)  # Block all autoplay
+        options.set_preference('media.preload.default', 0)
+        options.set_preference('media.preload.auto', 0)
+        options.set_preference('media.play-stand-alone', False)
+    hosts = blocked_hosts(types, allow)
+    if hosts:
+        # Exact names only, so list the common subdomains too; they resolve to localhost and fail fast
+        names = hosts + [f'www.{h}' for h in hosts if h.count('.') == 1]
+        options.set_preference('network.dns.localDomains', ','.join(names))
+    if 'trackers' in types:
+        options.set_preference('privacy.trackingprotection.enabled', True)
+    return options
+
+
+def apply_chrome_blocking(options, allow=None):
+    """Stop Chrome downloading images, web fonts, media and tracker scripts"""
+    types = blocked_types(allow)
+    if 'images' in types:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    if 'media' in types:
+        options.add_argument('--autoplay-policy=user-gesture-required')
+    hosts = blocked_hosts(types, allow)
+    if hosts:
+        rules = ', '.join(f'MAP {h} ~NOTFOUND, MAP *.{h} ~NOTFOUND' for h in hosts)
+        options.add_argument(f'--host-resolver-rules={rules}')
+    # Fonts and media are blocked over CDP once the driver is up - see blocked_url_patterns
+    return options
+
+
+def build_firefox_options(allow=None):
+    """Default headless Firefox options shared by the crawler and custom scrapers"""
+    options = FirefoxOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+
+    # Add user agent to avoid detection
+    options.set_preference('general.useragent.override', FIREFOX_USER_AGENT)
+
+    # Disable webdriver mode
+    options.set_preference('dom.webdriver.enabled', False)
+    options.set_preference('useAutomationExtension', False)
+
+    # Quiet downloads and logging
+    options.set_preference('browser.download.folderList', 2)
+    options.set_preference('browser.download.manager.showWhenStarting', False)
+    options.set_preference('log.level', 'ERROR')
+    return apply_firefox_blocking(options, allow)
+
+
+def build_chrome_options(allow=None):
+    """Default headless Chrome options"""
+    options = ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument('--disable-infobars')
+    options.add_argument(f'--user-agent={CHROME_USER_AGENT}')
+
+    # Add experimental options
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    return apply_chrome_blocking(options, allow)
+
+
+def start_driver(browser, options, url_patterns=None):
+    """Start a new WebDriver for the given browser and options; Chrome also blocks url_patterns"""
+    if browser == 'firefox':
+        service = Service(log_path=os.devnull)  # Suppress driver logs
+        return webdriver.Firefox(options=options, service=service)
+
+    # Try using undetected_chromedriver if available
+    try:
+        import undetected_chromedriver as uc
+        logger.info("Using undetected_chromedriver")
+        driver = uc.Chrome(options=options)
+    except ImportError:
+        logger.info("Using regular Chrome")
+        driver = webdriver.Chrome(options=options)
+
+    if url_patterns:
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': url_patterns})
+        except Exception as e:
+            logger.warning(f"Could not set Chrome URL blocking: {e}")
+    return driver
+
+
+@contextmanager
+def one_off_driver(browser, options):
+    """A driver outside the pool, for configurations that can't be shared (e.g. proxies)"""
+    driver = start_driver(browser, options)
+    try:
+        yield driver
+    finally:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+class PooledDriver:
+    """A warm WebDriver plus the bookkeeping the pool needs to recycle it"""
+
+    def __init__(self, key, driver, startup_seconds):
+        self.key = key
+        self.driver = driver
+        self.startup_seconds = startup_seconds
+        self.pages = 0
+        self.started_at = time.time()
+
+    def rss_bytes(self):
+        """Resident memory of the driver process and the browser processes it spawned"""
+        pids = []
+        service = getattr(self.driver, 'service', None)
+        process = getattr(service, 'process', None) if service else None
+        if process is not None:
+            pids.append(process.pid)
+        browser_pid = getattr(self.driver, 'browser_pid', None)
+        if browser_pid:
+            pids.append(browser_pid)
+
+        total = 0
+        seen = set()
+        for pid in pids:
+            try:
+                root = psutil.Process(pid)
+                for proc in [root] + root.children(recursive=True):
+                    if proc.pid in seen:
+                        continue
+                    seen.add(proc.pid)
+                    total += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.debug(f"Error quitting pooled driver {self.key}: {e}")
+
+
+class BrowserPool:
+    """
+    Bounded pool of warm headless browsers.
+
+    Drivers are keyed by (browser, profile) so scrapers with different option
+    sets (e.g. RA's fingerprint settings) never share a driver. The total number
+    of live drivers across all keys is capped at `size`.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER, max_rss_mb=MAX_RSS_MB):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        # (browser, profile) -> (options builder, Chrome URL patterns to block)
+        self._profiles = {
+            ('firefox', 'default'): (build_firefox_options, None),
+            ('chrome', 'default'): (build_chrome_options, blocked_url_patterns()),
+        }
+        self._idle = {}
+        self._live = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'hits': 0,
+            'misses': 0,
+            'startup_failures': 0,
+            'recycled_pages': 0,
+            'recycled_rss': 0,
+            'discarded': 0,
+            'startup_seconds_total': 0.0,
+            'wait_seconds_total': 0.0,
+        }
+
+    def register_profile(self, browser, name, options_builder, url_patterns=None):
+        """Register an options builder (and, for Chrome, URL patterns to block) for a named driver profile"""
+        with self._cond:
+            self._profiles[(browser, name)] = (options_builder, url_patterns)
+
+    def profile_for(self, browser, allow=None):
+        """
+        Profile name for a venue's resource allowlist, registering it on first use.
+
+        `allow` lists resource types ('images', 'fonts', 'media', 'trackers') and/or
+        host names the venue needs loaded. Venues with the same allowlist share drivers.
+        """
+        if not allow:
+            return 'default'
+        allow = tuple(sorted(set(allow)))
+        name = 'allow:' + ','.join(allow)
+        if browser == 'firefox':
+            builder, url_patterns = build_firefox_options, None
+        else:
+            builder, url_patterns = build_chrome_options, blocked_url_patterns(allow)
+        with self._cond:
+            if (browser, name) not in self._profiles:
+                self._profiles[(browser, name)] = (lambda: builder(allow), url_patterns)
+        return name
+
+    @contextmanager
+    def driver(self, browser='firefox', profile='default'):
+        """Check out a warm driver, returning it to the pool when done"""
+        entry = self._acquire((browser, profile))
+        healthy = True
+        try:
+            yield entry.driver
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self._release(entry, healthy)
+
+    def _acquire(self, key):
+        if key not in self._profiles:
+            raise ValueError(f"Unknown browser profile: {key}")
+
+        wait_start = time.time()
+        victim = None
+        with self._cond:
+            self._stats['checkouts'] += 1
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is shut down")
+
+                idle = self._idle.get(key)
+                if idle:
+                    entry = idle.pop()
+                    self._stats['hits'] += 1
+                    self._stats['wait_seconds_total'] += time.time() - wait_start
+                    return entry
+
+                if self._live < self.size:
+                    break
+
+                # Pool is full - evict an idle driver of another profile to make room
+                victim = self._pop_any_idle()
+                if victim:
+                    self._live -= 1
+                    self._stats['discarded'] += 1
+                    break
+
+                if not self._cond.wait(timeout=CHECKOUT_TIMEOUT):
+                    raise TimeoutError(f"Timed out waiting for a {key[0]} driver")
+
+            self._live += 1
+            self._stats['misses'] += 1
+            self._stats['wait_seconds_total'] += time.time() - wait_start
+
+        # Quit/start browsers outside the lock so other checkouts aren't blocked
+        if victim:
+            victim.quit()
+        browser, profile = key
+        start = time.time()
+        try:
+            options_builder, url_patterns = self._profiles[key]
+            driver = start_driver(browser, options_builder(), url_patterns)
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._stats['startup_failures'] += 1
+                self._cond.notify()
+            raise
+        startup_seconds = time.time() - start
+        with self._cond:
+            self._stats['startup_seconds_total'] += startup_seconds
+        logger.info(f"PERFORMANCE: Started {browser} driver ({profile}) in {startup_seconds:.1f}s")
+        return PooledDriver(key, driver, startup_seconds)
+
+    def _pop_any_idle(self):
+        for key, idle in self._idle.items():
+            if idle:
+                return idle.pop(0)
+        return None
+
+    def _reset(self, entry):
+        """Clear per-site state so the next checkout starts clean"""
+        driver = entry.driver
+        try:
+            driver.switch_to.default_content()
+        except Exception:
+            pass
+        try:
+            driver.execute_script("window.localStorage && window.localStorage.clear(); window.sessionStorage && window.sessionStorage.clear();")
+        except Exception:
+            pass
+        driver.delete_all_cookies()
+        driver.get('about:blank')
+
+    def _release(self, entry, healthy):
+        entry.pages += 1
+        reason = None
+        if not healthy:
+            reason = 'discarded'
+        elif entry.pages >= self.max_pages:
+            reason = 'recycled_pages'
+        else:
+            try:
+                self._reset(entry)
+            except Exception as e:
+                logger.warning(f"Could not reset {entry.key[0]} driver, discarding: {e}")
+                reason = 'discarded'
+        if reason is None and self.max_rss_bytes and entry.rss_bytes() > self.max_rss_bytes:
+            reason = 'recycled_rss'
+
+        with self._cond:
+            retire = reason is not None or self._closed
+            if retire:
+                self._live -= 1
+                if reason:
+                    self._stats[reason] += 1
+            else:
+                self._idle.setdefault(entry.key, []).append(entry)
+            self._cond.notify()
+
+        if retire:
+            logger.info(f"Retiring {entry.key[0]} driver after {entry.pages} pages ({reason or 'shutdown'})")
+            entry.quit()
+
+    def stats(self):
+        """Snapshot of pool counters"""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot['live'] = self._live
+            snapshot['idle'] = sum(len(v) for v in self._idle.values())
+        checkouts = snapshot['hits'] + snapshot['misses']
+        snapshot['hit_rate'] = snapshot['hits'] / checkouts if checkouts else 0.0
+        snapshot['avg_startup_seconds'] = (
+            snapshot['startup_seconds_total'] / snapshot['misses'] if snapshot['misses'] else 0.0
+        )
+        return snapshot
+
+    def log_stats(self):
+        s = self.stats()
+        logger.info(
+            f"PERFORMANCE: Browser pool - {s['hits']} hits, {s['misses']} misses "
+            f"({s['hit_rate']:.0%} hit rate), avg startup {s['avg_startup_seconds']:.1f}s, "
+            f"recycled {s['recycled_pages']} (pages) / {s['recycled_rss']} (rss), "
+            f"discarded {s['discarded']}, live {s['live']}"
+        )
+
+    def shutdown(self):
+        """Quit all idle drivers and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            entries = [e for idle in self._idle.values() for e in idle]
+            self._idle = {}
+            self._live -= len(entries)
+            self._cond.notify_all()
+        for entry in entries:
+            entry.quit()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Get the process-wide browser pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+if __name__ == "__main__":
+    # Benchmark resource blocking against a local page fixture with heavy assets:
+    # large images, web fonts, a preloaded video and an analytics script.
+    import argparse
+    import struct
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from readiness import wait_until_ready
+
+    arg_parser = argparse.ArgumentParser(description='Measure page load time and browser RSS with and without resource blocking')
+    arg_parser.add_argument('--browser', choices=['firefox', 'chrome'], default='firefox')
+    arg_parser.add_argument('--images', type=int, default=30, help='Large images on the fixture page')
+    arg_parser.add_argument('--runs', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    def bmp(width, height):
+        """Uncompressed 24-bit BMP - large to download and to decode"""
+        row = (width * 3 + 3) & ~3
+        pixels = bytes([(x * 7) % 256 for x in range(row)]) * height
+        header = struct.pack('<2sIHHI', b'BM', 54 + len(pixels), 0, 0, 54)
+        info = struct.pack('<IiiHHIIiiII', 40, width, height, 1, 24, 0, len(pixels), 2835, 2835, 0, 0)
+        return header + info + pixels
+
+    assets = {
+        '/img.bmp': ('image/bmp', bmp(1200, 900)),
+        '/font.woff2': ('font/woff2', os.urandom(400 * 1024)),
+        '/video.mp4': ('video/mp4', os.urandom(8 * 1024 * 1024)),
+    }
+    events = ''.join(f"<div class='event'><h3>Artist {i}</h3><p>March {i % 28 + 1} 8:00 PM</p>"
+                     f"<img src='/img.bmp?{i}' width=600></div>" for i in range(args.images))
+    page = f"""<html><head>
+        <style>@font-face {{ font-family: Venue; src: url('/font.woff2') format('woff2'); }}
+        body {{ font-family: Venue, sans-serif; }}</style>
+        <script async src="https://www.googletagmanager.com/gtag/js?id=G-TEST"></script>
+        </head><body><h1>Calendar</h1>
+        <video src="/video.mp4" preload="auto" autoplay muted></video>{events}</body></html>""".encode('utf-8')
+
+    class Fixture(BaseHTTPRequestHandler):
+        def do_GET(self):
+            content_type, body = assets.get(self.path.split('?')[0], ('text/html; charset=utf-8', page))
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *a):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Fixture)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/calendar"
+    builder = build_firefox_options if args.browser == 'firefox' else build_chrome_options
+
+    def measure(allow):
+        """(load seconds, peak RSS MB) for one fresh browser loading the fixture"""
+        driver = start_driver(args.browser, builder(allow), blocked_url_patterns(allow) if args.browser == 'chrome' else None)
+        entry = PooledDriver(('bench', 'bench'), driver, 0)
+        peak = [0]
+        done = threading.Event()
+
+        def sample():
+            while not done.is_set():
+                peak[0] = max(peak[0], entry.rss_bytes())
+                done.wait(0.1)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        try:
+            start = time.time()
+            driver.get(url)
+            wait_until_ready(driver, url, {'network_idle': True, 'selector': '.event', 'min_count': args.images})
+            elapsed = time.time() - start
+        finally:
+            done.set()
+            sampler.join()
+            entry.quit()
+        return elapsed, peak[0] / (1024 * 1024)
+
+    results = {}
+    for label, allow in (('everything loaded', RESOURCE_TYPES), ('resources blocked', None)):
+        runs = [measure(allow) for _ in range(args.runs)]
+        results[label] = (sum(r[0] for r in runs) / len(runs), max(r[1] for r in runs))
+        print(f"{args.browser}, {label}: {results[label][0]:.2f}s page load, {results[label][1]:.0f} MB peak RSS")
+    (before_s, before_mb), (after_s, after_mb) = results.values()
+    print(f"Blocking saves {before_s - after_s:.2f}s per page and {before_mb - after_mb:.0f} MB peak RSS")
+    server.shutdown()
@@ -5,24 +5,47 @@ import os
 import sys
 import time
 import hashlib
-import requests
+import gzip
+import tempfile
+import threading
 from io import BytesIO
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-import html2text
 from pdfminer.high_level import extract_text
+from browser_pool import get_pool, one_off_driver, build_firefox_options
+from http_client import get_client, NotModified
+from rate_limit import acquire
+import fetch_strategy
+import html_reducer
+from readiness import wait_until_ready
 import logging
 from datetime import datetime
 import json
 
 logger = logging.getLogger('concert_app')
 
+# Fetch tiers, cheapest first; fetch_strategy reorders them per URL
+FETCH_TIERS = ['firecrawl', 'requests', 'firefox', 'chrome']
+FIRECRAWL_HOST = 'api.firecrawl.dev'  # Rate-limit bucket shared by all Firecrawl calls
+
+# Fetch cache settings - override via environment
+FETCH_CACHE_TTL = int(os.environ.get('FETCH_CACHE_TTL', '86400'))  # Default max age in seconds
+FETCH_CACHE_MAX_BYTES = int(os.environ.get('FETCH_CACHE_MAX_MB', '200')) * 1024 * 1024  # Compressed bytes on disk
+
+# Cache counters are shared by every Crawler instance in the process
+_cache_lock = threading.Lock()
+_cache_stats = {
+    'hits': 0,
+    'misses': 0,
+    'writes': 0,
+    'bytes_written': 0,
+    'evictions': 0,
+    'bytes_evicted': 0,
+}
+
+def fetch_cache_stats():
+    """Snapshot of fetch cache counters"""
+    with _cache_lock:
+        return dict(_cache_stats)
+
 class Crawler:
     """
     Crawler class to fetch website HTML content.
@@ -37,16 +60,15 @@ class Crawler:
         self.app = FirecrawlApp(api_key=FIRECRAWL_API_KEY)
         self.cache_dir = "cache"
         os.makedirs(self.cache_dir, exist_ok=True)
-        self.h = html2text.HTML2Text()
-        self.h.ignore_links = False
-        self.h.body_width = 0
+        self.cache_tier = None  # Set when the last scrape_venue was served from the fetch cache
 
-    def get_cache_filename(self, url):
-        """Get the cache filename for a URL."""
-        hashed = hashlib.sha256(url.encode('utf-8')).hexdigest()
-        return os.path.join(self.cache_dir, f"{hashed}.cache")
+    def get_cache_filename(self, url, tier=None):
+        """Get the cache filename for a URL (and the fetch tier that produced it)."""
+        key = f"{tier}|{url}" if tier else url
+        hashed = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{hashed}.cache.gz")
 
-    def is_cache_valid(self, cache_file, max_age=86400):
+    def is_cache_valid(self, cache_file, max_age=FETCH_CACHE_TTL):
         """Check if cache file is valid and not expired."""
         if not os.path.exists(cache_file):
             return False
@@ -54,52 +76,128 @@ class Crawler:
         return (time.time() - mtime) < max_age
 
     def save_cache(self, cache_file, content):
-        """Save content to cache file."""
-        with open(cache_file, "wb") as f:
-            f.write(content)
+        """Atomically save compressed content to cache file."""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        data = gzip.compress(content)
+        
+        # Write to a temp file in the same directory, then rename over the target
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, cache_file)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        
+        with _cache_lock:
+            _cache_stats['writes'] += 1
+            _cache_stats['bytes_written'] += len(data)
+        self.evict_cache()
 
     def load_cache(self, cache_file):
-        """Load content from cache file."""
+        """Load and decompress content from cache file."""
         with open(cache_file, "rb") as f:
-            return f.read()
+            content = gzip.decompress(f.read())
+        # Bump the access time so eviction keeps recently used entries
+        try:
+            stat = os.stat(cache_file)
+            os.utime(cache_file, (time.time(), stat.st_mtime))
+        except OSError:
+            pass
+        return content
+
+    def evict_cache(self, max_bytes=FETCH_CACHE_MAX_BYTES):
+        """Delete least recently used cache files until the cache fits the byte budget."""
+        with _cache_lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.cache.gz'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+                total += stat.st_size
+            
+            if total <= max_bytes:
+                return
+            
+            entries.sort()
+            for _, size, path in entries:
+                if total <= max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                _cache_stats['evictions'] += 1
+                _cache_stats['bytes_evicted'] += size
+            logger.info(f"Fetch cache evicted down to {total} bytes")
+
+    def get_cached_markdown(self, url, max_age=FETCH_CACHE_TTL):
+        """Return (markdown, tier) from the freshest usable cache entry, or (None, None)."""
+        # The winning tier can change between runs, so an older entry from another tier mustn't shadow a newer one
+        entries = []
+        for tier in FETCH_TIERS:
+            cache_file = self.get_cache_filename(url, tier)
+            if self.is_cache_valid(cache_file, max_age):
+                try:
+                    entries.append((os.path.getmtime(cache_file), tier, cache_file))
+                except OSError:
+                    continue
+        for _, tier, cache_file in sorted(entries, reverse=True):
+            try:
+                markdown = self.load_cache(cache_file).decode('utf-8')
+            except Exception as e:
+                logger.warning(f"Discarding unreadable cache entry for {url} ({tier}): {e}")
+                try:
+                    os.remove(cache_file)
+                except OSError:
+                    pass
+                continue
+            with _cache_lock:
+                _cache_stats['hits'] += 1
+            return markdown, tier
+        with _cache_lock:
+            _cache_stats['misses'] += 1
+        return None, None
+
+    def cache_markdown(self, url, tier, markdown):
+        """Store markdown for a URL under the tier that fetched it."""
+        try:
+            self.save_cache(self.get_cache_filename(url, tier), markdown)
+        except Exception as e:
+            logger.warning(f"Could not write fetch cache for {url}: {e}")
 
-    def fetch_with_selenium(self, url, proxy=None):
+    def fetch_with_selenium(self, url, proxy=None, ready=None):
         """Uses Selenium with Firefox in headless mode."""
-        options = FirefoxOptions()
-        options.add_argument('--headless')
         if proxy:
+            # Proxied drivers can't be shared, so start a dedicated one
+            options = build_firefox_options()
             options.add_argument(f'--proxy-server={proxy}')
-        
-        # Add Firefox-specific options
-        options.set_preference('browser.download.folderList', 2)
-        options.set_preference('browser.download.manager.showWhenStarting', False)
-        options.set_preference('log.level', 'ERROR')
+            driver_context = one_off_driver('firefox', options)
+        else:
+            driver_context = get_pool().driver('firefox')
 
         try:
-            from selenium.webdriver.firefox.service import Service
-            from selenium.webdriver.common.by import By
-            from selenium.webdriver.support import expected_conditions as EC
-            
-            service = Service(log_path=os.devnull)
-            driver = webdriver.Firefox(options=options, service=service)
-            
-            logger.info(f"Fetching URL with Selenium: {url}")
-            driver.get(url)
-            
-            # Wait for body to be present
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Wait for page load
-            WebDriverWait(driver, 30).until(
-                lambda d: d.execute_script('return document.readyState') == 'complete'
-            )
-            
-            # Wait additional time for dynamic content   time.sleep(5)
-            
-            # Get the page source
-            html_content = driver.page_source
+            with driver_context as driver:
+                logger.info(f"Fetching URL with Selenium: {url}")
+                driver.set_page_load_timeout(60)
+                acquire(url)
+                driver.get(url)
+                wait_until_ready(driver, url, ready)
+                
+                # Get the page source
+                html_content = driver.page_source
             
             # Log details about the content
             content_length = len(html_content) if html_content else 0
@@ -118,12 +216,6 @@ class Crawler:
         except Exception as e:
             logger.error(f"Selenium error for {url}: {e}")
             raise
-        finally:
-            try:
-                if 'driver' in locals():
-                    driver.quit()
-            except:
-                pass
 
     def fetch_with_requests(self, url, proxy=None):
         """Uses Requests to get the raw content."""
@@ -131,7 +223,7 @@ class Crawler:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Firefox/91.0'
         }
         proxies = {"http": proxy, "https": proxy} if proxy else None
-        response = requests.get(url, headers=headers, proxies=proxies, timeout=60)
+        response = get_client().get(url, headers=headers, proxies=proxies, timeout=60)
         response.raise_for_status()
         return response.content, response.headers.get("Content-Type", "")
 
@@ -140,161 +232,139 @@ class Crawler:
         pdf_io = BytesIO(pdf_bytes)
         return extract_text(pdf_io)
 
-    def convert_html_to_markdown(self, html_content):
+    def convert_html_to_markdown(self, html_content, url=None):
         """Convert HTML to Markdown."""
-        h = html2text.HTML2Text()
-        h.ignore_links = False
-        h.body_width = 0
-        return h.handle(html_content)
+        return self.html_to_markdown(html_content, url)
 
-    def html_to_markdown(self, html):
-        """Convert HTML to Markdown."""
-        h = html2text.HTML2Text()
-        h.ignore_links = False
-        h.body_width = 0
-        markdown = h.handle(html)
+    def html_to_markdown(self, html, url=None):
+        """Convert HTML to Markdown, stripping boilerplate first (see html_reducer.py)."""
+        return html_reducer.to_markdown(html, url)
+
+    def scrape_venue(self, url, cache_ttl=FETCH_CACHE_TTL, cache_mode='use', ready=None, allow_resources=None):
+        """
+        Scrape a venue's website for concert information.
+
+        cache_mode is 'use' (read and write the fetch cache), 'refresh' (skip the
+        read but store the new result) or 'bypass' (don't touch the cache).
+        ready is the venue's readiness spec for browser tiers (see readiness.py) and
+        allow_resources the resource types/hosts its pages need (see browser_pool.profile_for).
+        """
+        self.cache_tier = None
+        if cache_mode == 'use':
+            markdown, tier = self.get_cached_markdown(url, cache_ttl)
+            if markdown:
+                logger.info(f"Fetch cache hit for {url} ({tier})")
+                self.cache_tier = tier
+                return markdown
+        
+        markdown, tier = self._scrape_tiers(url, ready, allow_resources)
+        if markdown and cache_mode != 'bypass':
+            self.cache_markdown(url, tier, markdown)
         return markdown
 
-    def scrape_venue(self, url):
-        """Scrape a venue's website for concert information"""
-        try:
-            # First try Firecrawl
-            logger.info("Attempting Firecrawl scrape")
+    def _scrape_tiers(self, url, ready=None, allow_resources=None):
+        """Try fetch tiers, starting at the one that worked last time, returning (markdown, tier)"""
+        # A 304 only proves the stored data is current if plain requests produced it
+        conditional = fetch_strategy.last_winner(url) == 'requests'
+        fetchers = {
+            'firecrawl': self.scrape_with_firecrawl,
+            'requests': lambda u: self.scrape_with_requests(u, conditional),
+            'firefox': lambda u: self.scrape_with_firefox(u, ready, allow_resources),
+            'chrome': lambda u: self.scrape_with_chrome(u, ready, allow_resources),
+        }
+        for tier in fetch_strategy.plan_tiers(url, FETCH_TIERS):
+            logger.info(f"Trying {tier} for {url}")
+            start = time.time()
             try:
-                result = self.app.scrape_url(url, params={'formats': ['markdown']})
-                markdown = result['data']['markdown']
-                if markdown and len(markdown.strip()) > 1:
-                    return markdown
+                markdown = fetchers[tier](url)
+            except NotModified:
+                raise
             except Exception as e:
-                if "insufficient credits" in str(e).lower():
-                    logger.info("Firecrawl credits exhausted, falling back to direct scraping")
-                else:
-                    logger.error(f"Firecrawl error: {e}")
-            
-            # Try simple requests first (fastest)
-            logger.info("Trying simple requests first...")
-            try:
-                response = requests.get(url, 
-                    headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'},
-                    timeout=30
-                )
-                if response.status_code == 200:
-                    html = response.text
-                    markdown = self.html_to_markdown(html)
-                    logger.info(f"Requests generated {len(markdown)} bytes of markdown")
-                    if markdown and len(markdown.strip()) > 100:  # Ensure we got meaningful content
-                        return markdown
-                    else:
-                        logger.info("Requests returned too little content, trying browsers...")
-            except Exception as req_error:
-                logger.error(f"Requests scraping error: {req_error}")
-            
-            # If requests fails or returns empty content, try Firefox
-            logger.info("Trying Firefox...")
-            markdown = self.scrape_with_firefox(url)
-            if markdown and len(markdown.strip()) > 100:
-                return markdown
-            
-            # If Firefox fails or returns empty content, try Chrome
-            logger.info("Firefox failed or returned empty content, trying Chrome...")
-            markdown = self.scrape_with_chrome(url)
-            if markdown and len(markdown.strip()) > 100:
-                return markdown
-            
-            return None
-                
+                logger.error(f"{tier} scraping error: {e}")
+                markdown = None
+            elapsed = time.time() - start
+
+            # Firecrawl returns clean markdown; raw page conversions need more to be meaningful
+            min_length = 1 if tier == 'firecrawl' else 100
+            usable = bool(markdown) and len(markdown.strip()) > min_length
+            fetch_strategy.record_attempt(url, tier, usable, elapsed, len(markdown) if markdown else 0)
+            if usable:
+                return markdown, tier
+            if tier == 'requests':
+                # Another tier supplies the data - its validators must not be committed
+                get_client().drop_pending(url)
+            logger.info(f"{tier} returned too little content for {url}, trying the next tier")
+        return None, None
+
+    def scrape_with_firecrawl(self, url):
+        """Use Firecrawl's hosted scraper"""
+        try:
+            acquire(FIRECRAWL_HOST)
+            result = self.app.scrape_url(url, params={'formats': ['markdown']})
+            return result['data']['markdown']
         except Exception as e:
-            logger.error(f"Error scraping {url}: {e}")
+            if "insufficient credits" in str(e).lower():
+                logger.info("Firecrawl credits exhausted, falling back to direct scraping")
+                return None
+            raise
+
+    def scrape_with_requests(self, url, conditional=True):
+        """Plain HTTP fetch; with conditional=True, raises NotModified if the page is unchanged"""
+        response = get_client().get(url, conditional=conditional,
+            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'},
+            timeout=30
+        )
+        if response.status_code != 200:
+            logger.info(f"Requests got HTTP {response.status_code} for {url}")
             return None
+        markdown = self.html_to_markdown(response.text, url)
+        logger.info(f"Requests generated {len(markdown)} bytes of markdown")
+        return markdown
 
-    def scrape_with_firefox(self, url):
-        """Use Firefox to fetch the page"""
+    def scrape_with_firefox(self, url, ready=None, allow_resources=None):
+        """Use Firefox to fetch the page, waiting until it is ready (see readiness.py)"""
         logger.info(f"Fetching URL with Firefox: {url}")
         
-        # Configure Firefox options for Replit environment
-        options = FirefoxOptions()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        
-        # Add user agent to avoid detection
-        user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:123.0) Gecko/20100101 Firefox/123.0'
-        options.set_preference('general.useragent.override', user_agent)
-        
-        # Disable webdriver mode
-        options.set_preference('dom.webdriver.enabled', False)
-        options.set_preference('useAutomationExtension', False)
-        
         try:
-            # Use Service object to specify geckodriver path if needed
-            service = Service(log_path=os.devnull)  # Suppress driver logs
-            driver = webdriver.Firefox(options=options, service=service)
-            
-            # Set page load timeout
-            driver.set_page_load_timeout(30)
-            
-            try:
+            # Check out a warm driver from the shared pool
+            pool = get_pool()
+            with pool.driver('firefox', pool.profile_for('firefox', allow_resources)) as driver:
+                # Set page load timeout
+                driver.set_page_load_timeout(30)
+                
+                acquire(url)
                 driver.get(url)
-                time.sleep(5)  # Wait for page to load
+                wait_until_ready(driver, url, ready)
                 html = driver.page_source
-                
-                # Generate markdown from HTML
-                markdown = self.html_to_markdown(html)
-                logger.info(f"Firefox generated {len(markdown)} bytes of markdown")
-                return markdown
-            finally:
-                driver.quit()
+            
+            # Generate markdown from HTML
+            markdown = self.html_to_markdown(html, url)
+            logger.info(f"Firefox generated {len(markdown)} bytes of markdown")
+            return markdown
         except Exception as e:
             logger.error(f"Firefox scraping error: {e}")
             return ""
 
-    def scrape_with_chrome(self, url):
-        """Use Chrome to fetch the page"""
+    def scrape_with_chrome(self, url, ready=None, allow_resources=None):
+        """Use Chrome to fetch the page, waiting until it is ready (see readiness.py)"""
         logger.info(f"Fetching URL with Chrome: {url}")
         
-        # Configure Chrome options for Replit environment
-        options = ChromeOptions()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--remote-debugging-port=9222')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('--disable-infobars')
-        
-        # Add user agent
-        options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36')
-        
-        # Add experimental options
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        
         try:
-            # Try using undetected_chromedriver if available
-            try:
-                import undetected_chromedriver as uc
-                logger.info("Using undetected_chromedriver")
-                driver = uc.Chrome(options=options)
-            except ImportError:
-                # Fall back to regular Chrome
-                logger.info("Using regular Chrome")
-                driver = webdriver.Chrome(options=options)
-            
-            # Set page load timeout
-            driver.set_page_load_timeout(30)
-            
-            try:
+            # Check out a warm driver from the shared pool
+            pool = get_pool()
+            with pool.driver('chrome', pool.profile_for('chrome', allow_resources)) as driver:
+                # Set page load timeout
+                driver.set_page_load_timeout(30)
+                
+                acquire(url)
                 driver.get(url)
-                time.sleep(5)  # Wait for page to load
+                wait_until_ready(driver, url, ready)
                 html = driver.page_source
-                
-                # Generate markdown from HTML
-                markdown = self.html_to_markdown(html)
-                logger.info(f"Chrome generated {len(markdown)} bytes of markdown")
-                return markdown
-            finally:
-                driver.quit()
+            
+            # Generate markdown from HTML
+            markdown = self.html_to_markdown(html, url)
+            logger.info(f"Chrome generated {len(markdown)} bytes of markdown")
+            return markdown
         except Exception as e:
             logger.error(f"Chrome scraping error: {e}")
             return ""
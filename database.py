@@ -182,6 +182,14 @@ else:
 # Create a scoped session that removes sessions when they're done
 SessionLocal = scoped_session(Session)
 
+def dialect_insert(table):
+    """INSERT construct for the active dialect, supporting on_conflict_do_update/do_nothing"""
+    if is_postgres:
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
 def add_column(engine, table_name, column):
     """Safely add a column to a table if it doesn't exist"""
     inspector = inspect(engine)
@@ -228,6 +236,19 @@ def init_db():
                     else:
                         db.execute(text("ALTER TABLE venues ADD COLUMN genres JSON"))
                 
+                if 'content_fingerprint' not in columns:
+                    db.execute(text("ALTER TABLE venues ADD COLUMN content_fingerprint VARCHAR"))
+                    db.commit()
+                
+                # Adaptive refresh schedule columns
+                timestamp_type = 'TIMESTAMP WITH TIME ZONE' if is_postgres else 'DATETIME'
+                for column, column_type in (('refresh_interval_hours', 'FLOAT'),
+                                            ('next_due_at', timestamp_type),
+                                            ('last_changed_at', timestamp_type)):
+                    if column not in columns:
+                        db.execute(text(f"ALTER TABLE venues ADD COLUMN {column} {column_type}"))
+                        db.commit()
+                
                 # Clean up placeholder events (adapting for PostgreSQL vs SQLite differences)
                 if 'concerts' in tables and 'artists' in tables and 'concert_artists' in tables:
                     try:
@@ -244,36 +265,21 @@ def init_db():
                                 OR a.name IS NULL
                             )
                         """))
+                        # Drop the read rows of deleted concerts and let web processes re-render
+                        removed = db.execute(text("""
+                            DELETE FROM upcoming_events
+                            WHERE concert_id NOT IN (SELECT id FROM concerts)
+                        """)).rowcount
+                        if removed:
+                            import listing_cache
+                            listing_cache.bump_data_version(db)
                         db.commit()
                     except Exception as e:
                         print(f"Error cleaning up placeholder events: {e}")
                         db.rollback()
 
-                    # Remove duplicate events (same venue, date, time, and artists)
-                    try:
-                        # This complex query may need to be adapted for PostgreSQL vs SQLite syntax
-                        db.execute(text("""
-                            DELETE FROM concerts 
-                            WHERE id IN (
-                                SELECT c1.id
-                                FROM concerts c1
-                                JOIN concert_times ct1 ON c1.id = ct1.concert_id
-                                JOIN concert_artists ca1 ON c1.id = ca1.concert_id
-                                JOIN artists a1 ON ca1.artist_id = a1.id
-                                JOIN concerts c2 ON c1.venue_id = c2.venue_id 
-                                    AND c1.date = c2.date
-                                JOIN concert_times ct2 ON c2.id = ct2.concert_id
-                                    AND ct1.time = ct2.time
-                                JOIN concert_artists ca2 ON c2.id = ca2.concert_id
-                                JOIN artists a2 ON ca2.artist_id = a2.id
-                                    AND a1.name = a2.name
-                                WHERE c1.id > c2.id
-                            )
-                        """))
-                        db.commit()
-                    except Exception as e:
-                        print(f"Error removing duplicate events: {e}")
-                        db.rollback()
+                    # Duplicate concerts are prevented by the uix_concert_natural_key unique index
+                    # (see migrations/add_concert_natural_key.py), so no dedupe pass is needed here
 
                 # Update venues
                 for venue in db.query(Venue).all():
@@ -318,7 +324,31 @@ def init_db():
                 except Exception as e:
                     print(f"Error setting default genres: {e}")
                     db.rollback()
-            
+
+            # The migrations below open their own connections (and import this module)
+            db.commit()
+
+            if 'concerts' in tables:
+                concert_columns = [c['name'] for c in inspector.get_columns('concerts')]
+                concert_indexes = [i['name'] for i in inspector.get_indexes('concerts')]
+                # Databases created before the natural key need the column, backfill and unique index
+                if 'artist_key' not in concert_columns or 'uix_concert_natural_key' not in concert_indexes:
+                    from migrations.add_concert_natural_key import run_migration as add_natural_key
+                    if not add_natural_key():
+                        print("Warning: concert natural key migration failed")
+
+            # Secondary indexes for the hot read and write paths; create_all only adds them to new tables
+            from migrations.add_query_indexes import INDEXES, run_migration as add_query_indexes
+            existing_indexes = {i['name'] for table in tables for i in inspector.get_indexes(table)}
+            if any(table in tables and name not in existing_indexes for name, table, _ in INDEXES):
+                if not add_query_indexes():
+                    print("Warning: query index migration failed")
+
+            # Fill the upcoming_events read table for databases that had concerts before it existed
+            from migrations.backfill_upcoming_events import run_migration as backfill_upcoming_events
+            if not backfill_upcoming_events():
+                print("Warning: upcoming_events backfill failed")
+
             print("Database migration successful")
             
         except Exception as e:
@@ -0,0 +1,171 @@
+"""
+Per-URL memory of which fetch tier works.
+
+Crawler.scrape_venue records every tier attempt here (success, latency, markdown
+size). The next run starts at the tier that succeeded most recently instead of
+walking Firecrawl -> requests -> Firefox -> Chrome from the top, and every
+FETCH_REPROBE_EVERY runs it starts from the cheapest tier again in case the
+site changed. Stats live in the database so every worker shares them.
+
+    python fetch_strategy.py    # per-tier success rates and timings, and each URL's winner
+"""
+import os
+import logging
+from datetime import datetime
+import pytz
+from sqlalchemy import func
+from database import SessionLocal, dialect_insert
+from models import FetchTierStat
+
+logger = logging.getLogger('concert_app')
+
+FETCH_REPROBE_EVERY = int(os.environ.get('FETCH_REPROBE_EVERY', '10'))  # Runs at the winning tier between re-probes
+
+
+def winning_tier(session, url):
+    """(tier, attempts at that tier) for the tier with the latest success, or (None, 0)"""
+    row = (
+        session.query(FetchTierStat.tier, FetchTierStat.attempts)
+        .filter(FetchTierStat.url == url, FetchTierStat.last_success_at.isnot(None))
+        .order_by(FetchTierStat.last_success_at.desc())
+        .first()
+    )
+    return (row.tier, row.attempts) if row else (None, 0)
+
+
+def last_winner(url):
+    """Tier that most recently produced usable content for this URL, or None"""
+    session = SessionLocal()
+    try:
+        return winning_tier(session, url)[0]
+    except Exception as e:
+        logger.warning(f"Could not load fetch tier stats for {url}: {e}")
+        return None
+    finally:
+        session.close()
+
+
+def plan_tiers(url, tiers):
+    """
+    Order in which to try `tiers` (cheapest first) for this URL.
+
+    Starts at the last winning tier, then falls back to the more expensive
+    tiers and finally the cheaper ones. Periodically re-probes from the top.
+    """
+    session = SessionLocal()
+    try:
+        winner, attempts = winning_tier(session, url)
+    except Exception as e:
+        logger.warning(f"Could not load fetch tier stats for {url}: {e}")
+        return list(tiers)
+    finally:
+        session.close()
+
+    if winner not in tiers:
+        return list(tiers)
+    index = tiers.index(winner)
+    if index > 0 and FETCH_REPROBE_EVERY and attempts % FETCH_REPROBE_EVERY == 0:
+        logger.info(f"Re-probing cheaper fetch tiers for {url} (last winner: {winner})")
+        return list(tiers)
+    return tiers[index:] + tiers[:index]
+
+
+def record_attempt(url, tier, success, seconds, size=0):
+    """Add one attempt to the URL's stats for this tier"""
+    now = datetime.now(pytz.UTC)
+    table = FetchTierStat.__table__
+    values = {
+        'url': url,
+        'tier': tier,
+        'attempts': 1,
+        'successes': int(success),
+        'total_seconds': seconds,
+        'total_bytes': size if success else 0,
+        'last_seconds': seconds,
+        'last_bytes': size,
+        'last_attempt_at': now,
+        'last_success_at': now if success else None,
+    }
+    update = {
+        'attempts': table.c.attempts + 1,
+        'successes': table.c.successes + int(success),
+        'total_seconds': table.c.total_seconds + seconds,
+        'total_bytes': table.c.total_bytes + (size if success else 0),
+        'last_seconds': seconds,
+        'last_bytes': size,
+        'last_attempt_at': now,
+    }
+    if success:
+        update['last_success_at'] = now
+    session = SessionLocal()
+    try:
+        session.execute(
+            dialect_insert(table).values(**values)
+            .on_conflict_do_update(index_elements=['url', 'tier'], set_=update)
+        )
+        session.commit()
+    except Exception as e:
+        # Stats are advisory - never fail a scrape over them
+        session.rollback()
+        logger.warning(f"Could not record fetch tier stats for {url} ({tier}): {e}")
+    finally:
+        session.close()
+
+
+def tier_stats():
+    """Success rate, mean latency and mean size per tier across all URLs"""
+    session = SessionLocal()
+    try:
+        rows = session.query(
+            FetchTierStat.tier,
+            func.sum(FetchTierStat.attempts),
+            func.sum(FetchTierStat.successes),
+            func.sum(FetchTierStat.total_seconds),
+            func.sum(FetchTierStat.total_bytes),
+        ).group_by(FetchTierStat.tier).all()
+    finally:
+        session.close()
+    stats = {}
+    for tier, attempts, successes, seconds, size in rows:
+        attempts, successes = attempts or 0, successes or 0
+        stats[tier] = {
+            'attempts': attempts,
+            'successes': successes,
+            'success_rate': successes / attempts if attempts else 0.0,
+            'avg_seconds': (seconds or 0.0) / attempts if attempts else 0.0,
+            'avg_bytes': (size or 0) / successes if successes else 0,
+        }
+    return stats
+
+
+def log_stats():
+    try:
+        stats = tier_stats()
+    except Exception as e:
+        logger.warning(f"Could not load fetch tier stats: {e}")
+        return
+    summary = ', '.join(
+        f"{tier}: {s['successes']}/{s['attempts']} ok ({s['success_rate']:.0%}), {s['avg_seconds']:.1f}s avg"
+        for tier, s in stats.items()
+    )
+    logger.info(f"PERFORMANCE: Fetch tiers - {summary or 'no attempts recorded'}")
+
+
+if __name__ == "__main__":
+    from database import init_db
+
+    init_db()
+    print(f"{'tier':<10} {'attempts':>8} {'ok':>6} {'rate':>6} {'avg s':>7} {'avg bytes':>10}")
+    for tier, s in tier_stats().items():
+        print(f"{tier:<10} {s['attempts']:>8} {s['successes']:>6} {s['success_rate']:>6.0%} "
+              f"{s['avg_seconds']:>7.1f} {s['avg_bytes']:>10.0f}")
+
+    session = SessionLocal()
+    try:
+        urls = [url for (url,) in session.query(FetchTierStat.url).distinct().order_by(FetchTierStat.url)]
+        print()
+        for url in urls:
+            winner, attempts = winning_tier(session, url)
+            print(f"{url}: {winner or 'no successful tier'}{f' ({attempts} attempts)' if winner else ''}")
+    finally:
+        session.close()
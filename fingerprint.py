@@ -0,0 +1,43 @@
+import re
+import json
+import hashlib
+
+# Volatile fragments that change between fetches without the listings changing
+ISO_TIMESTAMP_RE = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?')
+CLOCK_WITH_SECONDS_RE = re.compile(r'\b\d{1,2}:\d{2}:\d{2}\b')  # Show times are HH:MM, so only drop HH:MM:SS
+TOKEN_RE = re.compile(
+    r'(csrf[_-]?token|csrfmiddlewaretoken|authenticity_token|__RequestVerificationToken|_token|nonce|form_build_id)'
+    r'(["\'\s:=]+(?:value=["\'])?)[\w\-+/=.]{8,}',
+    re.IGNORECASE
+)
+SESSION_ID_RE = re.compile(r'\b(PHPSESSID|jsessionid|sessionid|sid)=[\w\-.]+', re.IGNORECASE)
+TRACKING_PARAM_RE = re.compile(
+    r'([?&])(utm_[a-z]+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga|_gl|_hs[a-z]+|igshid|cb|ver|v|t|ts|_)=[^&\s)"\'#]*',
+    re.IGNORECASE
+)
+ASSET_HASH_RE = re.compile(r'([./-])[0-9a-f]{8,}(?=\.(?:js|css|png|jpe?g|webp|svg|woff2?)\b)', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_content(content):
+    """Strip timestamps, tokens, tracking params and whitespace noise from page content"""
+    if not content:
+        return ''
+    text = ISO_TIMESTAMP_RE.sub('', content)
+    text = CLOCK_WITH_SECONDS_RE.sub('', text)
+    text = TOKEN_RE.sub(r'\1\2', text)
+    text = SESSION_ID_RE.sub(r'\1=', text)
+    text = TRACKING_PARAM_RE.sub(r'\1', text)
+    text = ASSET_HASH_RE.sub(r'\1', text)
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+def content_fingerprint(content):
+    """Hash of the normalized content - equal fingerprints mean the listings are unchanged"""
+    return hashlib.sha256(normalize_content(content).encode('utf-8')).hexdigest()
+
+
+def concert_data_fingerprint(concert_data):
+    """Hash of already-extracted concert data (custom and RA scrapers)"""
+    serialized = json.dumps(concert_data, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
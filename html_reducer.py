@@ -0,0 +1,350 @@
+"""
+Boilerplate reduction before HTML -> markdown conversion.
+
+Raw page HTML converted wholesale carries navigation, footers, cookie banners,
+inline SVG and scripts into the markdown that the LLM extraction bills as prompt
+tokens. to_markdown() parses the page once, drops that boilerplate, narrows
+the document to the event-listing region (the smallest element holding every
+date/time string on the page) and collapses repeated links before converting.
+Menu-like link lists are only dropped from pages without a listing region,
+and never from a block that mentions a date or time, so lineups and events
+survive even when a heuristic misfires.
+
+    python html_reducer.py corpus/                  # full vs reduced markdown for every saved page
+    python html_reducer.py --save corpus/ URL ...   # add pages to the corpus
+
+Set HTML_CORPUS_DIR to have the crawler save every page it converts.
+"""
+import os
+import re
+import sys
+import time
+import hashlib
+import logging
+import threading
+import html2text
+from bs4 import BeautifulSoup, Comment
+from rate_limit import host_key
+
+logger = logging.getLogger('concert_app')
+
+# Reduction settings - override via environment
+HTML_REDUCE = os.environ.get('HTML_REDUCE', '1') != '0'  # Set to 0 to convert whole pages again
+HTML_CORPUS_DIR = os.environ.get('HTML_CORPUS_DIR')  # Save converted pages here for the corpus check
+REGION_MIN_ANCHORS = 3  # Date/time strings needed before narrowing to a listing region
+LINK_LIST_MIN_LINKS = 5  # Link lists at least this long with no dates are menus
+LINK_LIST_LINK_SHARE = 0.8  # ...when links make up this much of their text
+
+MONTH = r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?'
+WEEKDAY = r'(?:mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?|thu(?:rs(?:day)?)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)\.?'
+DATE_RE = re.compile(
+    rf'\b(?:{MONTH}\s+\d{{1,2}}(?:st|nd|rd|th)?\b'  # March 5, Mar 5th
+    rf'|\d{{1,2}}(?:st|nd|rd|th)?\s+{MONTH}(?![a-z])'  # 5 March
+    rf'|{WEEKDAY},?\s+\d{{1,2}}\b'  # Fri 5
+    r'|\d{4}-\d{2}-\d{2}'  # 2024-03-05
+    r'|\d{1,2}/\d{1,2}(?:/\d{2,4})?\b)',  # 3/5, 3/5/24
+    re.IGNORECASE
+)
+TIME_RE = re.compile(r'\b\d{1,2}(?::\d{2})?\s*(?:am|pm)\b|\b\d{1,2}:\d{2}\b', re.IGNORECASE)
+
+# Never carry any meaning for event extraction
+DROP_TAGS = ['script', 'style', 'noscript', 'svg', 'template', 'iframe', 'canvas', 'head', 'link', 'meta',
+             'img', 'picture', 'video', 'audio', 'source', 'button', 'input', 'select', 'textarea']
+# Page chrome - dropped unless it mentions a date or time
+BOILERPLATE_TAGS = {'nav', 'header', 'footer', 'aside', 'form', 'dialog'}
+BOILERPLATE_ROLES = {'navigation', 'banner', 'contentinfo', 'dialog', 'alertdialog', 'search', 'complementary'}
+BOILERPLATE_CLASS_RE = re.compile(
+    r'^(?:cookie|consent|gdpr|newsletter|subscribe|signup|popup|modal|social|share|breadcrumbs?|'
+    r'nav|navbar|menu|main-menu|masthead|site-header|site-footer|header|footer|sidebar)(?:[-_].*)?$',
+    re.IGNORECASE
+)
+ITEM_TAGS = {'article', 'li', 'tr'}  # A header/footer inside one of these is part of an event card
+PAGE_TAGS = {'[document]', 'html', 'body'}
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def markdown_converter():
+    """The one html2text configuration used for every page"""
+    h = html2text.HTML2Text()
+    h.ignore_links = False
+    h.ignore_images = True
+    h.body_width = 0
+    return h
+
+
+def convert(html):
+    # HTML2Text instances keep parser state between calls, so each conversion gets a fresh one
+    return markdown_converter().handle(html)
+
+
+def has_anchor(text):
+    return bool(DATE_RE.search(text) or TIME_RE.search(text))
+
+
+def _is_boilerplate(tag):
+    if tag.name in BOILERPLATE_TAGS:
+        return True
+    if (tag.get('role') or '').lower() in BOILERPLATE_ROLES:
+        return True
+    if tag.get('aria-modal') == 'true':
+        return True
+    names = list(tag.get('class') or [])
+    if tag.get('id'):
+        names.append(tag['id'])
+    return any(BOILERPLATE_CLASS_RE.match(name) for name in names)
+
+
+def _drop_boilerplate(soup):
+    """Remove page chrome that carries no dates; returns how many elements went"""
+    dropped = 0
+    for tag in soup.find_all(_is_boilerplate):
+        if tag.decomposed:
+            continue
+        if any(parent.name in ITEM_TAGS for parent in tag.parents):
+            continue
+        if has_anchor(tag.get_text(' ')):
+            continue
+        tag.decompose()
+        dropped += 1
+    return dropped
+
+
+def _common_ancestor(nodes):
+    """Lowest element containing every node, or None"""
+    common = None
+    for node in nodes:
+        path = list(reversed(list(node.parents)))
+        if common is None:
+            common = path
+            continue
+        size = 0
+        for a, b in zip(common, path):
+            if a is not b:
+                break
+            size += 1
+        common = common[:size]
+    return common[-1] if common else None
+
+
+def _listing_region(soup):
+    """Smallest element containing every date/time string, or None if the page has too few"""
+    anchors = [node for node in soup.find_all(string=True) if has_anchor(node)]
+    if len(anchors) < REGION_MIN_ANCHORS:
+        return None
+    region = _common_ancestor(anchors)
+    if region is None or region.name in PAGE_TAGS:
+        return None
+    return region
+
+
+def _collapse_links(root, drop_lists=True):
+    """Drop menu-like link lists and strip repeated or dead hrefs; returns (lists dropped, links unwrapped)"""
+    lists = 0
+    for tag in root.find_all(['ul', 'ol', 'menu', 'div']) if drop_lists else []:
+        if tag.decomposed:
+            continue
+        links = tag.find_all('a')
+        if len(links) < LINK_LIST_MIN_LINKS:
+            continue
+        text = tag.get_text(' ', strip=True)
+        link_text = sum(len(a.get_text(' ', strip=True)) for a in links)
+        if not text or link_text < LINK_LIST_LINK_SHARE * len(text) or has_anchor(text):
+            continue
+        # A lineup inside a dated event card is not a menu
+        if any(parent.name not in PAGE_TAGS and has_anchor(parent.get_text(' ')) for parent in tag.parents):
+            continue
+        tag.decompose()
+        lists += 1
+
+    unwrapped = 0
+    seen = set()
+    for a in root.find_all('a'):
+        href = (a.get('href') or '').strip()
+        if not a.get_text(strip=True):
+            # Image-only link (images are gone); the title link carries the same URL
+            a.decompose()
+            unwrapped += 1
+        elif not href or href.startswith(('#', 'javascript:')) or href in seen:
+            # Title + "more info" links to the same page only need the URL once
+            a.unwrap()
+            unwrapped += 1
+        else:
+            seen.add(href)
+    return lists, unwrapped
+
+
+def reduce_html(html):
+    """Parse once and strip everything that isn't the event listing; returns (html, details)"""
+    soup = BeautifulSoup(html, "html.parser")
+    for comment in soup.find_all(string=lambda s: isinstance(s, Comment)):
+        comment.extract()
+    for tag in soup.find_all(DROP_TAGS):
+        if not tag.decomposed:
+            tag.decompose()
+    dropped = _drop_boilerplate(soup)
+    region = _listing_region(soup)
+    root = region or soup
+    # Everything inside the listing region belongs to some event, so only whole pages lose link lists
+    lists, links = _collapse_links(root, drop_lists=region is None)
+    details = {
+        'region': region.name if region is not None else None,
+        'boilerplate': dropped,
+        'link_lists': lists,
+        'links': links,
+    }
+    return str(root), details
+
+
+def to_markdown(html, url=None):
+    """Reduce the page and convert it to markdown, recording the size ratio for `url`"""
+    if not html:
+        return ''
+    if HTML_CORPUS_DIR and url:
+        save_page(HTML_CORPUS_DIR, url, html)
+    if not HTML_REDUCE:
+        return convert(html)
+
+    start = time.perf_counter()
+    try:
+        reduced, details = reduce_html(html)
+    except Exception as e:
+        logger.warning(f"HTML reduction failed for {url}, converting the whole page: {e}")
+        return convert(html)
+    markdown = convert(reduced)
+    elapsed = time.perf_counter() - start
+
+    with _lock:
+        stats = _stats.setdefault(url or 'unknown', {'pages': 0, 'html_bytes': 0, 'markdown_bytes': 0, 'seconds': 0.0})
+        stats['pages'] += 1
+        stats['html_bytes'] += len(html)
+        stats['markdown_bytes'] += len(markdown)
+        stats['seconds'] += elapsed
+    region = f"<{details['region']}> region" if details['region'] else 'whole page'
+    logger.info(f"PERFORMANCE: Reduced {url} from {len(html)} bytes of HTML to {len(markdown)} bytes of markdown "
+                f"({len(markdown) / len(html):.1%}, {region}, {details['boilerplate']} boilerplate blocks, "
+                f"{details['link_lists']} link lists) in {elapsed:.2f}s")
+    return markdown
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+
+
+def stats():
+    """Per-URL pages converted, HTML bytes in, markdown bytes out and seconds spent"""
+    with _lock:
+        return {key: dict(value) for key, value in _stats.items()}
+
+
+def log_stats():
+    snapshot = stats()
+    if not snapshot:
+        return
+    html_bytes = sum(s['html_bytes'] for s in snapshot.values())
+    markdown_bytes = sum(s['markdown_bytes'] for s in snapshot.values())
+    seconds = sum(s['seconds'] for s in snapshot.values())
+    largest = sorted(snapshot.items(), key=lambda item: item[1]['markdown_bytes'], reverse=True)[:5]
+    summary = ', '.join(f"{host_key(url)}: {s['markdown_bytes'] / max(s['html_bytes'], 1):.1%}" for url, s in largest)
+    logger.info(f"PERFORMANCE: HTML reduction - {html_bytes} bytes of HTML to {markdown_bytes} bytes of markdown "
+                f"({markdown_bytes / max(html_bytes, 1):.1%}) in {seconds:.1f}s (largest: {summary})")
+
+
+def save_page(directory, url, html):
+    """Store a page for the corpus check; one file per URL, overwritten with the latest copy"""
+    try:
+        os.makedirs(directory, exist_ok=True)
+        name = f"{host_key(url)}-{hashlib.sha256(url.encode('utf-8')).hexdigest()[:12]}.html"
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(f"<!-- {url} -->\n{html}")
+    except Exception as e:
+        logger.warning(f"Could not save {url} to the HTML corpus: {e}")
+
+
+def _anchor_strings(markdown):
+    """Normalised date and time strings in the markdown - one per event line, at least"""
+    found = set()
+    for pattern in (DATE_RE, TIME_RE):
+        for match in pattern.finditer(markdown):
+            found.add(re.sub(r'\s+', ' ', match.group(0)).strip().lower())
+    return found
+
+
+def _event_strings(html):
+    """
+    Link and heading text that belongs to an event: its nearest enclosing block
+    that mentions a date or time is an event card, not the page or the whole listing
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup.find_all(DROP_TAGS):
+        if not tag.decomposed:
+            tag.decompose()
+    total = sum(1 for node in soup.find_all(string=True) if has_anchor(node))
+    found = set()
+    for tag in soup.find_all(['a', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
+        text = re.sub(r'\s+', ' ', tag.get_text(' ', strip=True)).lower()
+        if not text:
+            continue
+        for block in [tag, *tag.parents]:
+            anchors = sum(1 for node in block.find_all(string=True) if has_anchor(node)) or has_anchor(block.get_text(' '))
+            if anchors:
+                # Pages with few dates aren't narrowed to a region, so their one card may hold them all
+                if block.name not in PAGE_TAGS and (anchors < total or total < REGION_MIN_ANCHORS):
+                    found.add(text)
+                break
+    return found
+
+
+def check_corpus(directory):
+    """
+    Compare whole-page and reduced markdown for every saved page.
+
+    A page fails when the reduction loses a date or time string, or the text
+    of a link or heading inside an event block. Returns the number of failing pages.
+    """
+    failures = 0
+    total_full = total_reduced = 0
+    names = sorted(name for name in os.listdir(directory) if name.endswith(('.html', '.htm')))
+    print(f"{'page':<48} {'html':>9} {'full md':>9} {'reduced':>9} {'ratio':>6} {'~tokens saved':>13}  lost")
+    for name in names:
+        with open(os.path.join(directory, name), encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        full = convert(html)
+        reduced, _ = reduce_html(html)
+        reduced = convert(reduced)
+        reduced_text = re.sub(r'\s+', ' ', reduced).lower()
+        lost = sorted(_anchor_strings(full) - _anchor_strings(reduced))
+        # Repeated links are unwrapped, so a lost link only counts if its text is gone too
+        lost += sorted(text for text in _event_strings(html) if text not in reduced_text)
+        total_full += len(full)
+        total_reduced += len(reduced)
+        failures += bool(lost)
+        # ~4 characters per token for English text
+        print(f"{name[:48]:<48} {len(html):>9} {len(full):>9} {len(reduced):>9} "
+              f"{len(reduced) / max(len(full), 1):>6.1%} {(len(full) - len(reduced)) // 4:>13}  "
+              f"{', '.join(lost[:5]) if lost else '-'}")
+    if names:
+        print(f"\n{len(names)} pages: {total_full} -> {total_reduced} bytes of markdown "
+              f"({total_reduced / max(total_full, 1):.1%}), {failures} pages lost dates, times or event text")
+    else:
+        print(f"No .html pages in {directory}")
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+    import async_fetch
+
+    arg_parser = argparse.ArgumentParser(description='Check HTML reduction against a saved-page corpus')
+    arg_parser.add_argument('corpus', help='Directory of saved .html pages')
+    arg_parser.add_argument('--save', nargs='+', metavar='URL', help='Fetch these pages into the corpus first')
+    args = arg_parser.parse_args()
+
+    for page_url in args.save or []:
+        response = async_fetch.get(page_url, headers={'User-Agent': 'Mozilla/5.0'})
+        response.raise_for_status()
+        save_page(args.corpus, page_url, response.text)
+        print(f"Saved {page_url}")
+    sys.exit(1 if check_corpus(args.corpus) else 0)
@@ -0,0 +1,178 @@
+import os
+import json
+import tempfile
+import logging
+import threading
+import async_fetch
+
+logger = logging.getLogger('concert_app')
+
+VALIDATORS_FILE = os.environ.get('HTTP_VALIDATORS_FILE', os.path.join('cache', 'http_validators.json'))
+
+
+class NotModified(Exception):
+    """Raised when a conditional GET returns 304 - the page hasn't changed since the last successful run"""
+
+    def __init__(self, url, bytes_saved=0):
+        super().__init__(f"Not modified: {url}")
+        self.url = url
+        self.bytes_saved = bytes_saved
+
+
+class HttpClient:
+    """
+    Conditional GETs on top of the shared async fetch engine (connection pooling,
+    per-host connection caps, retries and rate limiting live in async_fetch).
+
+    ETag/Last-Modified validators are remembered per URL. Validators seen while
+    processing a venue are held as pending until commit_validators() is called,
+    so a venue whose parse or store failed doesn't get a 304 on the next run.
+    """
+
+    def __init__(self, validators_file=VALIDATORS_FILE):
+        self.validators_file = validators_file
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._validators = self._load_validators()
+        self._stats = {}
+        self.reset_stats()
+
+    def _load_validators(self):
+        if not os.path.exists(self.validators_file):
+            return {}
+        try:
+            with open(self.validators_file, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable validators file {self.validators_file}: {e}")
+            return {}
+
+    def _save_validators(self):
+        directory = os.path.dirname(self.validators_file) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._validators, f)
+            os.replace(tmp_path, self.validators_file)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _pending(self):
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            pending = self._local.pending = {}
+        return pending
+
+    def get(self, url, headers=None, conditional=True, **kwargs):
+        """
+        GET a URL through the async fetch engine.
+
+        With conditional=True the stored validators are sent and a 304 raises
+        NotModified so callers can skip parsing and storing the page.
+        """
+        headers = dict(headers or {})
+        with self._lock:
+            validators = self._validators.get(url) if conditional else None
+        if validators:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+
+        kwargs.setdefault('timeout', 30)
+        response = async_fetch.get(url, headers=headers, **kwargs)  # Rate limited per host by the engine
+
+        with self._lock:
+            self._stats['requests'] += 1
+            if validators:
+                self._stats['conditional'] += 1
+            self._stats['bytes_downloaded'] += len(response.content)
+
+        if response.status_code == 304 and validators:
+            bytes_saved = validators.get('length', 0)
+            with self._lock:
+                self._stats['not_modified'] += 1
+                self._stats['bytes_saved'] += bytes_saved
+            logger.info(f"{url} not modified since last run (saved ~{bytes_saved} bytes)")
+            raise NotModified(url, bytes_saved)
+
+        if conditional and response.status_code == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self._pending()[url] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'length': len(response.content),
+                }
+        return response
+
+    def begin_venue(self):
+        """Start collecting validators for the venue processed on this thread"""
+        self._local.pending = {}
+
+    def commit_validators(self):
+        """Persist validators collected on this thread once the venue was stored"""
+        pending = self._pending()
+        if not pending:
+            return
+        with self._lock:
+            self._validators.update(pending)
+            try:
+                self._save_validators()
+            except Exception as e:
+                logger.warning(f"Could not save HTTP validators: {e}")
+        self._local.pending = {}
+
+    def drop_pending(self, url):
+        """Forget this thread's validators for one URL whose response wasn't used"""
+        self._pending().pop(url, None)
+
+    def discard_validators(self):
+        """Drop validators collected on this thread (the venue wasn't stored)"""
+        self._local.pending = {}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                'requests': 0,
+                'conditional': 0,
+                'not_modified': 0,
+                'bytes_downloaded': 0,
+                'bytes_saved': 0,
+            }
+
+    def stats(self):
+        """Snapshot of request counters"""
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot['not_modified_rate'] = (
+            snapshot['not_modified'] / snapshot['requests'] if snapshot['requests'] else 0.0
+        )
+        return snapshot
+
+    def log_stats(self):
+        s = self.stats()
+        logger.info(
+            f"PERFORMANCE: HTTP client - {s['requests']} requests, {s['conditional']} conditional, "
+            f"{s['not_modified']} not modified ({s['not_modified_rate']:.0%}), "
+            f"{s['bytes_downloaded']} bytes downloaded, ~{s['bytes_saved']} bytes saved"
+        )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Get the process-wide HTTP client, creating it on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
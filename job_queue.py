@@ -0,0 +1,276 @@
+"""
+DB-backed queue of venue scrape jobs shared by the web process and scrape workers.
+
+The web process only enqueues (enqueue_due); worker.py claims jobs. A claim is a
+lease: the worker heartbeats while it processes the venue, and a job whose lease
+expired (worker crashed or lost its node) is reclaimed by another worker.
+
+Claims use SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL, so workers on any
+number of nodes never block each other or claim the same row. SQLite has no row
+locks: claims there are serialized across processes with an fcntl lock file, and
+every claim is a compare-and-swap UPDATE so a lost race can't double-claim.
+
+    python job_queue.py               # queue status
+    python job_queue.py --enqueue     # enqueue venues that are due now
+    python job_queue.py --prune 7     # delete finished jobs older than 7 days
+"""
+import os
+import socket
+import logging
+import threading
+import contextlib
+from collections import namedtuple
+from datetime import datetime, timedelta
+import pytz
+from sqlalchemy import or_, and_, func, update
+from database import SessionLocal, dialect_insert, is_postgres
+from models import ScrapeJob, Venue
+from rate_limit import host_key
+import refresh
+
+try:
+    import fcntl
+except ImportError:  # Windows - fall back to compare-and-swap only
+    fcntl = None
+
+logger = logging.getLogger('concert_app')
+
+# Lease and retry settings - override via environment
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', '300'))
+JOB_HEARTBEAT_SECONDS = int(os.environ.get('JOB_HEARTBEAT_SECONDS', '60'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_SECONDS = int(os.environ.get('JOB_RETRY_SECONDS', '300'))  # Doubles per failed attempt
+JOB_LOCK_FILE = os.environ.get('JOB_LOCK_FILE', os.path.join('cache', 'scrape_jobs.lock'))
+
+ClaimedJob = namedtuple('ClaimedJob', ['id', 'venue_name', 'host', 'attempts'])
+
+
+def now_utc():
+    return datetime.now(pytz.UTC)
+
+
+def worker_id():
+    """Identifies the lease holder - unique per process across nodes"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@contextlib.contextmanager
+def claim_lock():
+    """Serialize claims between processes on SQLite (PostgreSQL uses row locks instead)"""
+    if is_postgres or fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(JOB_LOCK_FILE) or '.', exist_ok=True)
+    with open(JOB_LOCK_FILE, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def enqueue(venue_infos, run_after=None):
+    """Queue a scrape for each venue; venues that already have a queued or running job are skipped"""
+    if not venue_infos:
+        return 0
+    run_after = run_after or now_utc()
+    rows = [
+        {'venue_name': v['name'], 'host': host_key(v['url']), 'status': 'queued',
+         'run_after': run_after, 'attempts': 0}
+        for v in venue_infos
+    ]
+    session = SessionLocal()
+    try:
+        # uix_scrape_jobs_active_venue makes this idempotent across web processes and workers
+        result = session.execute(dialect_insert(ScrapeJob.__table__).values(rows).on_conflict_do_nothing())
+        session.commit()
+        inserted = max(result.rowcount or 0, 0)
+        if inserted:
+            logger.info(f"Enqueued {inserted} scrape jobs")
+        return inserted
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def enqueue_due(venue_infos):
+    """Enqueue the venues whose learned refresh interval has elapsed"""
+    session = SessionLocal()
+    try:
+        rows = {venue.name: venue for venue in session.query(Venue).all()}
+    finally:
+        session.close()
+    due, _ = refresh.pop_due(refresh.build_queue(venue_infos, rows))
+    return enqueue(due)
+
+
+def claim(owner, exclude_hosts=()):
+    """Lease the next runnable job, skipping hosts this worker is already busy with"""
+    with claim_lock():
+        session = SessionLocal()
+        try:
+            while True:
+                now = now_utc()
+                query = session.query(ScrapeJob).filter(
+                    ScrapeJob.run_after <= now,
+                    or_(ScrapeJob.status == 'queued',
+                        and_(ScrapeJob.status == 'running', ScrapeJob.lease_expires_at < now)),
+                )
+                if exclude_hosts:
+                    query = query.filter(or_(ScrapeJob.host.is_(None), ScrapeJob.host.notin_(list(exclude_hosts))))
+                query = query.order_by(ScrapeJob.run_after, ScrapeJob.id)
+                if is_postgres:
+                    query = query.with_for_update(skip_locked=True)
+                job = query.first()
+                if job is None:
+                    session.rollback()
+                    return None
+
+                if job.status == 'running':
+                    logger.warning(f"Reclaiming {job.venue_name} job {job.id} - lease held by {job.lease_owner} expired")
+                if job.attempts >= JOB_MAX_ATTEMPTS:
+                    job.status = 'failed'
+                    job.finished_at = now
+                    job.error = job.error or f"Lease expired after {job.attempts} attempts"
+                    session.commit()
+                    continue
+
+                # Compare-and-swap on the state we read, so a concurrent claim can't also win
+                claimed = ClaimedJob(job.id, job.venue_name, job.host, job.attempts + 1)
+                result = session.execute(
+                    update(ScrapeJob)
+                    .where(ScrapeJob.id == job.id, ScrapeJob.status == job.status,
+                           ScrapeJob.attempts == job.attempts)
+                    .values(status='running', lease_owner=owner, attempts=claimed.attempts,
+                            lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS), heartbeat_at=now)
+                )
+                session.commit()
+                if result.rowcount == 1:
+                    return claimed
+                session.expire_all()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+def heartbeat(job_id, owner):
+    """Extend the lease; returns False if the job is no longer ours"""
+    now = now_utc()
+    session = SessionLocal()
+    try:
+        result = session.execute(
+            update(ScrapeJob)
+            .where(ScrapeJob.id == job_id, ScrapeJob.lease_owner == owner, ScrapeJob.status == 'running')
+            .values(heartbeat_at=now, lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS))
+        )
+        session.commit()
+        return result.rowcount == 1
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Heartbeat failed for job {job_id}: {e}")
+        return True  # Transient DB error - keep working, the lease is still valid for a while
+    finally:
+        session.close()
+
+
+def finish(job_id, owner, error=None):
+    """Mark a job done, or requeue it with backoff (failed once attempts run out)"""
+    now = now_utc()
+    session = SessionLocal()
+    try:
+        job = session.query(ScrapeJob).filter_by(id=job_id, lease_owner=owner, status='running').first()
+        if job is None:
+            logger.warning(f"Job {job_id} finished after its lease was lost - result kept, job left to its new owner")
+            return
+        job.lease_owner = None
+        job.lease_expires_at = None
+        if error is None:
+            job.status = 'done'
+            job.finished_at = now
+            job.error = None
+        elif job.attempts < JOB_MAX_ATTEMPTS:
+            job.status = 'queued'
+            job.run_after = now + timedelta(seconds=JOB_RETRY_SECONDS * 2 ** (job.attempts - 1))
+            job.error = error
+        else:
+            job.status = 'failed'
+            job.finished_at = now
+            job.error = error
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error finishing job {job_id}: {e}")
+    finally:
+        session.close()
+
+
+class Heartbeat:
+    """Keeps a claimed job's lease alive from a background thread while the venue is processed"""
+
+    def __init__(self, job_id, owner, interval=JOB_HEARTBEAT_SECONDS):
+        self.job_id = job_id
+        self.owner = owner
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'job-heartbeat-{job_id}', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not heartbeat(self.job_id, self.owner):
+                self.lost = True
+                logger.warning(f"Lost the lease on job {self.job_id}")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
+def prune(older_than_days=7):
+    """Delete done and failed jobs older than the given age"""
+    cutoff = now_utc() - timedelta(days=older_than_days)
+    session = SessionLocal()
+    try:
+        deleted = session.query(ScrapeJob).filter(
+            ScrapeJob.status.in_(['done', 'failed']), ScrapeJob.finished_at < cutoff
+        ).delete(synchronize_session=False)
+        session.commit()
+        return deleted
+    finally:
+        session.close()
+
+
+def status_counts():
+    session = SessionLocal()
+    try:
+        return dict(session.query(ScrapeJob.status, func.count(ScrapeJob.id)).group_by(ScrapeJob.status).all())
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import init_db
+
+    logging.basicConfig(level=logging.INFO)
+    arg_parser = argparse.ArgumentParser(description='Inspect and manage the scrape job queue')
+    arg_parser.add_argument('--enqueue', action='store_true', help='Enqueue venues that are due now')
+    arg_parser.add_argument('--prune', type=int, metavar='DAYS', help='Delete finished jobs older than DAYS')
+    args = arg_parser.parse_args()
+
+    init_db()
+    if args.enqueue:
+        from main import VENUES
+        print(f"Enqueued {enqueue_due(VENUES)} jobs")
+    if args.prune is not None:
+        print(f"Pruned {prune(args.prune)} finished jobs")
+    print(f"Queue: {status_counts()}")
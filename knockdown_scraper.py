@@ -1,4 +1,4 @@
-import requests
+from http_client import get_client, NotModified
 from bs4 import BeautifulSoup
 from datetime import datetime
 import logging
@@ -15,7 +15,7 @@ def scrape_knockdown():
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = get_client().get(url, headers=headers, timeout=30)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, "html.parser")
         
@@ -81,6 +81,8 @@ def scrape_knockdown():
         logging.info(f"Found {len(events)} events")
         return events
         
+    except NotModified:
+        raise
     except Exception as e:
         logging.error(f"Failed to scrape Knockdown Center: {e}")
         return [] 
\ No newline at end of file
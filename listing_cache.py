@@ -0,0 +1,149 @@
+"""
+Rendered-fragment cache for the index page listing.
+
+The listing only changes when the scraper commits, so the rendered concert
+list is cached per (data version, time bucket, preference set). The scraper
+bumps the 'concerts' data version in the same transaction as its writes, and
+web processes notice the new version on their next request - the cache works
+across the worker/web process split without any messaging. Anonymous,
+show-all and no-preference views share one entry.
+"""
+import os
+import sys
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import pytz
+from database import dialect_insert
+from models import DataVersion
+
+logger = logging.getLogger('concert_app')
+
+# Listing cache settings - override via environment
+INDEX_CACHE_MAX_BYTES = int(os.environ.get('INDEX_CACHE_MAX_MB', '32')) * 1024 * 1024  # LRU-evict beyond this much rendered HTML
+INDEX_CACHE_BUCKET_MINUTES = int(os.environ.get('INDEX_CACHE_BUCKET_MINUTES', '1'))  # Granularity of today's "not started yet" filter
+INDEX_CACHE_LOG_EVERY = 100  # Log stats every N lookups
+
+CONCERTS = 'concerts'  # Data version covering concerts, times, artists and venues
+
+
+def data_version(session, name=CONCERTS):
+    """Current value of a data version counter (0 before the first bump)"""
+    row = session.get(DataVersion, name)
+    return row.version if row else 0
+
+
+def bump_data_version(session, name=CONCERTS):
+    """Increment a data version counter; commits with the caller's transaction"""
+    table = DataVersion.__table__
+    now = datetime.now(pytz.UTC)
+    session.execute(
+        dialect_insert(table).values(name=name, version=1, updated_at=now)
+        .on_conflict_do_update(index_elements=['name'], set_={'version': table.c.version + 1, 'updated_at': now})
+    )
+
+
+def time_bucket(now):
+    """Start of the INDEX_CACHE_BUCKET_MINUTES bucket containing `now`"""
+    minute = now.minute - now.minute % INDEX_CACHE_BUCKET_MINUTES
+    return now.replace(minute=minute, second=0, microsecond=0)
+
+
+def preference_key(preferences):
+    """Order-insensitive key for a preference set; None for anyone who sees everything"""
+    if not preferences or not any(preferences.values()):
+        return None
+    return tuple(
+        tuple(sorted(str(value) for value in preferences.get(name) or []))
+        for name in ('venues', 'neighborhoods', 'genres')
+    )
+
+
+class ListingCache:
+    """
+    LRU of rendered listings keyed by (data version, time bucket, preference key).
+
+    A key with a newer version or bucket than the cached entries makes all of
+    them unreachable, so they are dropped at once rather than aged out. A key
+    from an older generation (a request that read the version just before a
+    bump, or straddled a bucket boundary) is a plain miss and never clears.
+    """
+
+    def __init__(self, max_bytes=INDEX_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._generation = None
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    def get(self, key):
+        with self._lock:
+            generation = key[:2]
+            if self._generation is None or generation > self._generation:
+                if self._entries:
+                    self._stats['invalidations'] += 1
+                self._entries.clear()
+                self._bytes = 0
+                self._generation = generation
+            entry = self._entries.get(key) if generation == self._generation else None
+            if entry is None:
+                self._stats['misses'] += 1
+            else:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+            lookups = self._stats['hits'] + self._stats['misses']
+        if lookups % INDEX_CACHE_LOG_EVERY == 0:
+            self.log_stats()
+        return entry[0] if entry else None
+
+    def put(self, key, value, size):
+        with self._lock:
+            if key[:2] != self._generation or size > self.max_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def log_stats(self):
+        s = self.stats()
+        logger.info(f"PERFORMANCE: Listing cache - {s['hits']} hits, {s['misses']} misses ({s['hit_rate']:.0%} hit rate), "
+                    f"{s['entries']} entries, {s['bytes'] / 1024:.0f} KB of {self.max_bytes / 1024:.0f} KB, "
+                    f"{s['invalidations']} invalidations, {s['evictions']} evictions")
+
+
+def entry_size(html):
+    return sys.getsizeof(html)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_listing_cache():
+    """Process-wide listing cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ListingCache()
+        return _cache
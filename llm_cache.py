@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+import threading
+from database import Session
+from models import ExtractionBlock
+from fingerprint import normalize_content
+
+logger = logging.getLogger('concert_app')
+
+# Cache settings - override via environment
+LLM_CACHE_MODE = os.environ.get('LLM_CACHE_MODE', 'use')  # 'use', 'refresh' (re-query and overwrite) or 'bypass'
+
+_stats_lock = threading.Lock()
+_stats = {'blocks_reused': 0, 'blocks_extracted': 0, 'block_tokens': 0}
+
+
+def prompt_version(template, model):
+    """Short hash of the prompt template and model - changes whenever either is edited"""
+    return hashlib.sha256(f"{model}\n{template}".encode('utf-8')).hexdigest()[:16]
+
+
+def block_hash(heading, text):
+    """Hash of one calendar block, including the heading that gives it month context"""
+    return hashlib.sha256(normalize_content(f"{heading or ''}\n{text}").encode('utf-8')).hexdigest()
+
+
+def load_blocks(venue_name, version):
+    """Previously extracted blocks for a venue as {block_hash: records}"""
+    session = Session()
+    try:
+        rows = (
+            session.query(ExtractionBlock)
+            .filter_by(venue_name=venue_name, prompt_version=version)
+            .order_by(ExtractionBlock.position)
+            .all()
+        )
+        return {row.block_hash: json.loads(row.records) for row in rows}
+    except Exception as e:
+        logger.warning(f"Could not load extraction blocks for {venue_name}: {e}")
+        session.rollback()
+        return {}
+    finally:
+        session.close()
+
+
+def save_blocks(venue_name, version, blocks, prune=True):
+    """
+    Replace a venue's stored blocks with blocks, a list of (block_hash, records) in page order.
+
+    With prune=False, blocks from the previous run that aren't in the list are kept
+    (used when some chunks failed and the page state is only partly known).
+    """
+    session = Session()
+    try:
+        existing = {row.block_hash: row for row in session.query(ExtractionBlock).filter_by(venue_name=venue_name)}
+        for position, (hash_, records) in enumerate(blocks):
+            row = existing.pop(hash_, None)
+            if row is None:
+                row = ExtractionBlock(venue_name=venue_name, block_hash=hash_)
+                session.add(row)
+            row.prompt_version = version
+            row.position = position
+            row.records = json.dumps(records)
+        if prune:
+            for row in existing.values():
+                session.delete(row)
+        session.commit()
+    except Exception as e:
+        logger.warning(f"Could not save extraction blocks for {venue_name}: {e}")
+        session.rollback()
+    finally:
+        session.close()
+
+
+def record_blocks(reused, extracted, tokens=0):
+    """Count one incremental extraction: blocks served from the block store, blocks sent to the LLM"""
+    with _stats_lock:
+        _stats['blocks_reused'] += reused
+        _stats['blocks_extracted'] += extracted
+        _stats['block_tokens'] += tokens
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def cache_stats():
+    """Snapshot of block counters for this process"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def log_cache_stats():
+    s = cache_stats()
+    logger.info(
+        f"PERFORMANCE: LLM cache - {s['blocks_reused']} blocks reused, "
+        f"{s['blocks_extracted']} extracted for {s['block_tokens']} tokens"
+    )
+
+
+def invalidate(current_version=None, venue_name=None):
+    """
+    Delete stored blocks.
+
+    With current_version, only blocks from other prompt versions are removed;
+    with venue_name, only that venue's blocks are removed.
+    """
+    session = Session()
+    try:
+        query = session.query(ExtractionBlock)
+        if current_version:
+            query = query.filter(ExtractionBlock.prompt_version != current_version)
+        if venue_name:
+            query = query.filter(ExtractionBlock.venue_name == venue_name)
+        deleted = query.delete(synchronize_session=False)
+        session.commit()
+        return deleted
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    # Maintenance from the command line:
+    #   python llm_cache.py           - show block store summary
+    #   python llm_cache.py --prune   - drop blocks from old prompt versions
+    #   python llm_cache.py --clear [venue name]
+    from parser import BLOCK_PROMPT_VERSION
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--clear':
+        venue = ' '.join(sys.argv[2:]) or None
+        print(f"Deleted {invalidate(venue_name=venue)} blocks")
+    elif len(sys.argv) > 1 and sys.argv[1] == '--prune':
+        print(f"Deleted {invalidate(current_version=BLOCK_PROMPT_VERSION)} blocks")
+    else:
+        session = Session()
+        try:
+            total = session.query(ExtractionBlock).count()
+            current = session.query(ExtractionBlock).filter_by(prompt_version=BLOCK_PROMPT_VERSION).count()
+            print(f"{total} stored blocks ({current} for current prompt version {BLOCK_PROMPT_VERSION})")
+        finally:
+            session.close()
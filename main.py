@@ -1,32 +1,43 @@
-from crawler import Crawler
-from parser import parse_markdown
-from database import Session, SessionLocal, init_db
-from models import Artist, Venue, Concert, ConcertTime, User
+from crawler import Crawler, FETCH_CACHE_TTL, fetch_cache_stats
+from browser_pool import get_pool
+from http_client import get_client, NotModified
+from rate_limit import get_limiter
+from fingerprint import content_fingerprint, concert_data_fingerprint
+from parser import parse_markdown_incremental
+import llm_cache
+import refresh
+import job_queue
+import fetch_strategy
+import readiness
+import html_reducer
+import listing_cache
+import read_model
+import upcoming_events
+from listing_cache import get_listing_cache
+import async_fetch
+from database import Session, SessionLocal, init_db, dialect_insert
+from models import Artist, Venue, Concert, ConcertTime, User, concert_artists, artist_set_key
 from datetime import datetime, timedelta, time as datetime_time
 import time
-import random
-from tenacity import retry, stop_after_attempt, wait_exponential
-from flask import Flask, render_template, session, request, redirect, url_for, flash
+import functools
+import hashlib
+from flask import Flask, render_template, session, request, redirect, url_for, flash, abort, jsonify
 from collections import defaultdict
-from sqlalchemy import select, String
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import concurrent.futures
+from sqlalchemy import select, func
 import os
 from auth import auth
 from dotenv import load_dotenv
 from threading import Thread
 import atexit
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 import spotipy
 from fuzzywuzzy import fuzz
-import schedule
-from urllib.parse import urlencode, quote
+from urllib.parse import urlencode
 from ics import Calendar, Event
 import pytz
 import logging
 import threading
 import signal
-import psutil
 import sys
 
 app = Flask(__name__)
@@ -57,169 +68,60 @@ logging.basicConfig(level=logging.WARNING)
 app_logger = logging.getLogger('concert_app')
 app_logger.setLevel(logging.INFO)
 
-# Add at the very start of the file, right after imports
-def kill_existing_scrapers():
-    """Kill any existing scraper threads and processes"""
-    try:
-        # Get the current process and its parent
-        current_pid = os.getpid()
-        current_process = psutil.Process(current_pid)
-        parent_pid = current_process.parent().pid if current_process.parent() else None
-        
-        # Kill only other Python processes running scrapers
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                # Skip the current process and its parent
-                if proc.pid in (current_pid, parent_pid):
-                    continue
-                    
-                # Check if it's a Python process
-                if 'python' in proc.name().lower():
-                    cmdline = proc.cmdline()
-                    # Check if it's running our scraper
-                    if any('main.py' in cmd for cmd in cmdline):
-                        logging.info(f"Killing old scraper process: {proc.pid}")
-                        proc.kill()
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-                
-        # Kill threads in current process
-        for thread in threading.enumerate():
-            if thread != threading.current_thread() and "scraper" in thread.name.lower():
-                logging.info(f"Stopping existing scraper thread: {thread.name}")
-                thread.join(timeout=1.0)
-                
-    except Exception as e:
-        logging.error(f"Error killing scrapers: {e}")
+# Per-run scraper counters, reset when a worker starts a busy period (reset_scrape_stats)
+run_metrics = defaultdict(int)
+run_metrics_lock = threading.Lock()
+
+def record_metric(name, amount=1):
+    """Increment a per-run scraper counter"""
+    with run_metrics_lock:
+        run_metrics[name] += amount
+
+# Listing pagination - override via environment
+INDEX_PAGE_SIZE = int(os.environ.get('INDEX_PAGE_SIZE', '150'))  # Concerts rendered with the page; the rest load on scroll
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', '100'))  # Default /api/events page size
+API_MAX_PAGE_SIZE = 500
+
+def load_user_preferences(db, show_all_concerts):
+    """(logged-in user or None, their preference filters or None when everything is shown)"""
+    user = None
+    user_preferences = None
+    if 'user_id' in session:
+        user = db.query(User).filter_by(id=session['user_id']).first()
+        if user and not show_all_concerts:
+            user_preferences = {
+                'venues': user.preferred_venues,
+                'neighborhoods': user.preferred_neighborhoods,
+                'genres': user.preferred_genres
+            }
+    return user, user_preferences
 
 @app.route('/')
 @app.route('/<show_all>')
 def index(show_all=None):
     db = SessionLocal()
     try:
-        # Add debug logging
-        logging.info("Checking venue data:")
-        venues = db.query(Venue).all()
-        for venue in venues:
-            logging.info(f"Venue: {venue.name}, Neighborhood: {venue.neighborhood}, Genres: {venue.genres}")
-
         # Use Eastern timezone for date comparisons
         eastern = pytz.timezone('America/New_York')
         now = datetime.now(eastern)
-        today = now.date()
-        three_months = today + timedelta(days=90)
+        # Listings are cached per time bucket, so today's shows are filtered against the bucket start
+        bucket = listing_cache.time_bucket(now)
         
         # Check if we should show all concerts
         show_all_concerts = (show_all == 'all' or request.args.get('show_all') == 'true')
         
         # Get user preferences if logged in
-        user_preferences = None
-        if 'user_id' in session and not show_all_concerts:
-            user = db.query(User).filter_by(id=session['user_id']).first()
-            if user:
-                user_preferences = {
-                    'venues': user.preferred_venues,
-                    'neighborhoods': user.preferred_neighborhoods,
-                    'genres': user.preferred_genres
-                }
-        
-        # Base query with joins
-        query = (
-            db.query(Concert)
-            .options(
-                joinedload(Concert.venue),
-                joinedload(Concert.artists),
-                joinedload(Concert.times)
-            )
-        )
-        
-        # Apply preference filters if user is logged in and has preferences
-        if user_preferences and (user_preferences['venues'] or user_preferences['neighborhoods'] or user_preferences['genres']):
-            # Create a list to collect filter conditions
-            filter_conditions = []
-            
-            # For each preference type, add a condition
-            if user_preferences['venues']:
-                filter_conditions.append(Concert.venue_id.in_(user_preferences['venues']))
-                
-            if user_preferences['neighborhoods']:
-                # Ensure we have the Venue join
-                if not filter_conditions:  # Only add join if not already joined for venues
-                    query = query.join(Venue)
-                filter_conditions.append(Venue.neighborhood.in_(user_preferences['neighborhoods']))
-                
-            if user_preferences['genres']:
-                # Ensure we have the Venue join
-                if not filter_conditions:  # Only add join if not already joined
-                    query = query.join(Venue)
-                
-                # For each preferred genre, check if it's in the venue's genre list
-                genre_conditions = []
-                for genre in user_preferences['genres']:
-                    # This properly checks if a single genre is in the JSON array
-                    genre_conditions.append(Venue.genres.cast(String).like(f'%"{genre}"%'))
-                
-                # Combine with OR logic between genres
-                if genre_conditions:
-                    from sqlalchemy import or_
-                    filter_conditions.append(or_(*genre_conditions))
-            
-            # Apply filters with OR logic between different preference types
-            if filter_conditions:
-                from sqlalchemy import or_
-                query = query.filter(or_(*filter_conditions))
-        
-        # Apply date filters
-        query = query.filter(
-            Concert.date >= today,
-            Concert.date <= three_months,
-            (Concert.date > today) | 
-            ((Concert.date == today) & 
-             (Concert.times.any(ConcertTime.time >= now.time())))
-        )
-        
-        # First get all concerts
-        concerts = query.all()
-        
-        # Organize concerts by date first, then by neighborhood
-        concerts_by_date = defaultdict(lambda: defaultdict(list))
-        
-        for concert in concerts:
-            # Get earliest time for sorting
-            earliest_time = min((t.time for t in concert.times), default=datetime_time(23, 59))
-            
-            # Create concert dict with all needed info
-            concert_dict = {
-                'venue_name': concert.venue.name,
-                'artists': concert.artists,
-                'times': sorted(concert.times, key=lambda x: x.time),
-                'ticket_link': concert.ticket_link,
-                'special_notes': concert.special_notes,
-                'calendar_links': generate_calendar_links(
-                    concert,
-                    concert.venue.name,
-                    [artist.name for artist in concert.artists]
-                ),
-                'earliest_time': earliest_time,
-                'spotify_score': 0  # You can keep your existing Spotify logic here
-            }
-            
-            # Add to appropriate date and neighborhood
-            neighborhood = concert.venue.neighborhood or 'Other'
-            concerts_by_date[concert.date][neighborhood].append(concert_dict)
-        
-        # Sort concerts within each neighborhood by time
-        for date in concerts_by_date:
-            for neighborhood in concerts_by_date[date]:
-                concerts_by_date[date][neighborhood].sort(
-                    key=lambda x: x['earliest_time']
-                )
-        
-        # Sort dates
-        sorted_dates = sorted(concerts_by_date.keys())
+        user, user_preferences = load_user_preferences(db, show_all_concerts)
         
-        # Calculate total number of events
-        event_count = sum(len(concerts) for date in concerts_by_date for concerts in concerts_by_date[date].values())
+        # The rendered listing only changes when the scraper commits (bumping the data version)
+        cache = get_listing_cache()
+        key = (listing_cache.data_version(db), bucket, listing_cache.preference_key(user_preferences))
+        cached = cache.get(key)
+        if cached is None:
+            listing_html, event_count = render_listing(db, user_preferences, bucket)
+            cache.put(key, (listing_html, event_count), listing_cache.entry_size(listing_html))
+        else:
+            listing_html, event_count = cached
         
         # Add a flash message if this is the show_all view and there are events
         if show_all_concerts and event_count > 0 and user_preferences:
@@ -227,15 +129,113 @@ def index(show_all=None):
         
         return render_template(
             'index.html',
-            concerts_by_date=concerts_by_date,
-            sorted_dates=sorted_dates,
-            user=user if 'user_id' in session else None,
+            listing_html=listing_html,
+            user=user,
             event_count=event_count,
-            show_all=show_all
+            show_all=show_all,
+            show_all_concerts=show_all_concerts
         )
     finally:
         db.close()
 
+def render_listing(db, user_preferences, now):
+    """Render the first page of the listing fragment; returns (html, events on the page)"""
+    rows, next_cursor = read_model.upcoming_page(db, user_preferences, now, limit=INDEX_PAGE_SIZE)
+    
+    # Organize concerts by date first, then by neighborhood; rows arrive sorted by (date, earliest time)
+    concerts_by_date = defaultdict(lambda: defaultdict(list))
+    for concert in rows:
+        # Create concert dict with all needed info
+        concert_dict = {
+            'venue_name': concert.venue_name,
+            'artists': concert.artists,
+            'times': concert.times,
+            'ticket_link': concert.ticket_link,
+            'special_notes': concert.special_notes,
+            'calendar_links': generate_calendar_links(
+                concert,
+                concert.venue_name,
+                concert.artists,
+                concert.times
+            ),
+            'earliest_time': concert.earliest_time,
+            'spotify_score': 0  # You can keep your existing Spotify logic here
+        }
+        
+        # Add to appropriate date and neighborhood
+        neighborhood = concert.neighborhood or 'Other'
+        concerts_by_date[concert.date][neighborhood].append(concert_dict)
+    
+    # Sort dates
+    sorted_dates = sorted(concerts_by_date.keys())
+    
+    listing_html = render_template(
+        '_listing.html',
+        concerts_by_date=concerts_by_date,
+        sorted_dates=sorted_dates,
+        event_count=len(rows),
+        next_cursor=next_cursor
+    )
+    return listing_html, len(rows)
+
+def event_json(concert):
+    """Compact projection of a read_model.ConcertRow for /api/events; empty fields are left out"""
+    event = {
+        'id': concert.id,
+        'date': concert.date.isoformat(),
+        'venue': concert.venue_name,
+        'neighborhood': concert.neighborhood or 'Other',
+        'artists': concert.artists,
+        'times': [t.strftime('%H:%M') for t in concert.times],
+        'ticket_link': concert.ticket_link,
+        'price_range': concert.price_range,
+        'notes': concert.special_notes,
+        'ics': url_for('concert_ics', concert_id=concert.id),
+    }
+    return {name: value for name, value in event.items() if value not in (None, '', [])}
+
+@app.route('/api/events')
+def api_events():
+    """
+    Upcoming concerts as JSON, in pages of ?limit= (default API_PAGE_SIZE).
+
+    Pass the previous page's next_cursor as ?cursor= for the next page and
+    ?show_all=true to ignore the user's preferences. Responses carry an ETag
+    derived from the data version, so revalidation skips the query.
+    """
+    db = SessionLocal()
+    try:
+        eastern = pytz.timezone('America/New_York')
+        bucket = listing_cache.time_bucket(datetime.now(eastern))
+        show_all_concerts = request.args.get('show_all') == 'true'
+        _, user_preferences = load_user_preferences(db, show_all_concerts)
+        
+        cursor = request.args.get('cursor') or None
+        try:
+            after = read_model.decode_cursor(cursor) if cursor else None
+            limit = max(1, min(int(request.args.get('limit', API_PAGE_SIZE)), API_MAX_PAGE_SIZE))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        etag_key = (listing_cache.data_version(db), bucket.isoformat(),
+                    listing_cache.preference_key(user_preferences), cursor, limit)
+        etag = hashlib.sha256(repr(etag_key).encode('utf-8')).hexdigest()[:32]
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            rows, next_cursor = read_model.upcoming_page(db, user_preferences, bucket, after, limit)
+            response = jsonify({
+                'events': [event_json(concert) for concert in rows],
+                'next_cursor': next_cursor,
+            })
+        # Depends on the session's preferences: browsers may keep it, but must revalidate
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+    finally:
+        db.close()
+
 @app.context_processor
 def inject_user():
     if 'user_id' in session:
@@ -254,27 +254,27 @@ def process_venue(venue_info, session):
     
     # Create a nested session to handle transaction isolation
     nested_session = Session()
+    venue = None
     
     try:
         # Get or create venue
         venue = get_or_create_venue(nested_session, venue_info)
         
-        # Check if this venue was recently scraped (within the last 24 hours)
-        if venue.last_scraped:
-            # Make timezone-aware comparison to avoid "offset-naive and offset-aware" error
-            # Use timezone from pytz which is already imported
-            now = datetime.now(pytz.UTC)
-            # Ensure venue.last_scraped has timezone info
-            last_scraped = venue.last_scraped.replace(tzinfo=pytz.UTC) if venue.last_scraped.tzinfo is None else venue.last_scraped
-            time_since_scrape = now - last_scraped
-            if time_since_scrape < timedelta(hours=24):
-                logging.info(f"Skipping {venue_name} - was scraped {time_since_scrape.total_seconds() / 3600:.1f} hours ago")
-                nested_session.close()
-                return
+        # Each venue has its own learned refresh interval (see refresh.py)
+        if not refresh.is_due(venue):
+            logging.info(f"Skipping {venue_name} - not due until {refresh.next_due(venue):%Y-%m-%d %H:%M} UTC")
+            nested_session.close()
+            return
         
         logging.info(f"Processing {venue_name}")
         
+        # Collect HTTP validators for this venue; they're only kept if the data is stored
+        get_client().begin_venue()
+        
         concert_data = []
+        removed_records = []
+        fingerprint = None
+        parse_complete = True
         
         # Handle RA venues differently
         if 'ra.co' in venue_url:
@@ -305,348 +305,418 @@ def process_venue(venue_info, session):
                     logging.info(f"Requests method failed for {venue_name}, trying Selenium...")
                     concert_data = scrape_ra(venue_url)
         
+            # Events served from the fallback cache are stored, but the venue is retried soon
+            if getattr(concert_data, 'stale', False):
+                logging.warning(f"{venue_name}: live RA scrape failed, using cached events")
+                record_metric('venues_served_stale')
+        
         elif has_custom_scraper(venue_name, venue_url):
             concert_data = use_custom_scraper(venue_name, venue_url)
         else:
             crawler = Crawler()
-            markdown_content = crawler.scrape_venue(venue_url)
+            cache_ttl, cache_mode = get_fetch_cache_options(venue_info)
+            markdown_content = crawler.scrape_venue(venue_url, cache_ttl=cache_ttl, cache_mode=cache_mode,
+                                                     ready=venue_info.get('ready'),
+                                                     allow_resources=venue_info.get('allow_resources'))
+            if (markdown_content and crawler.cache_tier
+                    and content_fingerprint(markdown_content) == venue.content_fingerprint):
+                # A cached copy can't show whether the venue changed - only the live page counts as unchanged
+                logging.info(f"{venue_name}: cached page matches the last run, fetching it live")
+                markdown_content = crawler.scrape_venue(venue_url, cache_ttl=cache_ttl, cache_mode='refresh',
+                                                         ready=venue_info.get('ready'),
+                                                         allow_resources=venue_info.get('allow_resources'))
             if markdown_content:
-                concert_data = parse_markdown(markdown_content, venue_info)
+                # Skip the paid LLM parse entirely if the page content hasn't changed
+                fingerprint = content_fingerprint(markdown_content)
+                if fingerprint == venue.content_fingerprint:
+                    mark_venue_unchanged(nested_session, venue, 'content fingerprint unchanged')
+                    record_metric('venues_unchanged')
+                    return
+                # Only blocks of the calendar that changed since last run go to the LLM
+                concert_data, removed_records, parse_complete = parse_markdown_incremental(markdown_content, venue_info)
+                if not parse_complete:
+                    logging.warning(f"{venue_name}: extraction was partial, the page will be parsed again next run")
+        
+        if concert_data and fingerprint is None:
+            # Custom and RA scrapers return structured data - fingerprint that instead
+            fingerprint = concert_data_fingerprint(concert_data)
+            if fingerprint == venue.content_fingerprint:
+                if getattr(concert_data, 'stale', False):
+                    mark_venue_failed(nested_session, venue)
+                    return
+                mark_venue_unchanged(nested_session, venue, 'scraped events unchanged')
+                record_metric('venues_unchanged')
+                return
         
         if concert_data:
             try:
                 # We always store/update concert data, even if the venue was recently scraped
                 num_concerts = len(concert_data)
-                store_concert_data(nested_session, concert_data, venue_info)
+                counts = store_concert_data(nested_session, concert_data, venue_info)
+                for name, value in counts.items():
+                    record_metric(f'concerts_{name}', value)
+                removed_count = 0
+                if removed_records:
+                    removed_count = remove_stale_concerts(nested_session, venue, removed_records, concert_data)
+                    record_metric('stale_concerts_removed', removed_count)
                 logging.info(f"Completed processing {venue_name} - found {num_concerts} events")
-                # Update last_scraped timestamp with timezone-aware datetime
-                venue.last_scraped = datetime.now(pytz.UTC)
+                # A new fingerprint with no inserted/updated/removed events is a cosmetic page change
+                events_changed = bool(counts['inserted'] or counts['updated'] or removed_count)
+                if getattr(concert_data, 'stale', False):
+                    refresh.record_failure(venue)
+                else:
+                    refresh.record_scrape(venue, changed=events_changed)
+                # A partial parse must not let the next run skip the page as unchanged
+                venue.content_fingerprint = fingerprint if parse_complete else None
                 nested_session.commit()
+                get_client().commit_validators()
+                record_metric('venues_stored')
             except Exception as e:
                 logging.error(f"Error storing concert data for {venue_name}: {e}")
                 nested_session.rollback()
+                mark_venue_failed(nested_session, venue)
         else:
             logging.info(f"No concerts found for {venue_name}")
+            mark_venue_failed(nested_session, venue)
             
+    except NotModified:
+        # The page is unchanged since the last successful run - skip parse and store
+        mark_venue_unchanged(nested_session, venue, 'page not modified (HTTP 304)')
+        record_metric('venues_not_modified')
     except Exception as e:
         logging.error(f"Error processing {venue_name}: {e}")
         # Ensure we always rollback on error
         try:
             nested_session.rollback()
+            if venue is not None:
+                mark_venue_failed(nested_session, venue)
         except Exception as rollback_error:
             logging.error(f"Error during rollback for {venue_name}: {rollback_error}")
     finally:
+        # Drop validators for a venue that wasn't stored
+        get_client().discard_validators()
+        
         # Always close the session
         try:
             nested_session.close()
         except Exception as close_error:
             logging.error(f"Error closing session for {venue_name}: {close_error}")
 
-def is_credit_limit_error(error_msg):
-    """Check if the error is due to insufficient Firecrawl credits"""
-    credit_limit_indicators = [
-        "insufficient credits",
-        "payment required",
-        "upgrade your plan",
-        "for more credits"
-    ]
-    error_msg = error_msg.lower()
-    return any(indicator in error_msg for indicator in credit_limit_indicators)
-
-class FirecrawlCreditLimitError(Exception):
-    """Raised when Firecrawl credit limit is reached"""
-    pass
-
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=10, min=10, max=120),
-    reraise=True
-)
-def scrape_with_retry(crawler, url, venue_name):
-    """Attempt to scrape with longer exponential backoff retry"""
+def mark_venue_unchanged(session, venue, reason):
+    """Record a scrape that found nothing new - bump last_scraped and back off the refresh interval"""
+    logging.info(f"Skipping parse/store for {venue.name} - {reason}")
     try:
-        return crawler.scrape_venue(url)
+        refresh.record_scrape(venue, changed=False)
+        session.commit()
+        # The stored data matches this response, so its validators are current (none are pending after a 304)
+        get_client().commit_validators()
     except Exception as e:
-        error_msg = str(e)
-        if "429" in error_msg:  # Rate limit error
-            logging.info(f"Rate limit hit for {venue_name}, backing off...")
-            time.sleep(random.uniform(15, 20))
-        elif is_credit_limit_error(error_msg):
-            raise FirecrawlCreditLimitError("Firecrawl credit limit reached")
-        raise
+        logging.error(f"Error updating last_scraped for {venue.name}: {e}")
+        session.rollback()
 
-def use_firecrawl(venue_url, venue_name, venue_info):
-    """Use Firecrawl to scrape a venue"""
+def mark_venue_failed(session, venue):
+    """Schedule a retry for a venue whose scrape or store failed, keeping its learned interval"""
     try:
-        crawler = Crawler()
-        markdown_content = scrape_with_retry(crawler, venue_url, venue_name)
-        if not markdown_content:
-            return []
-        return parse_markdown(markdown_content, venue_info)
-    except FirecrawlCreditLimitError:
-        logging.error("Firecrawl credit limit reached - stopping scraper")
-        # Signal the main loop to stop
-        threading.current_thread().stop_flag = True
-        return []
+        refresh.record_failure(venue)
+        session.commit()
     except Exception as e:
-        logging.error(f"Error using Firecrawl: {e}")
-        return []
+        logging.error(f"Error scheduling retry for {venue.name}: {e}")
+        session.rollback()
 
-def calculate_scrape_params(venue_count):
-    """Calculate scraping parameters based on rate limits
-    - 3000 pages/month = ~100 pages/day
-    - 20 scrapes/minute = 1 scrape per 3 seconds
-    """
-    RATE_LIMIT_PER_MIN = 20
-    SECONDS_PER_MIN = 60
-    MIN_DELAY = SECONDS_PER_MIN / RATE_LIMIT_PER_MIN  # 3 seconds minimum between requests
+def get_fetch_cache_options(venue_info):
+    """Get the fetch cache TTL and mode for a venue.
     
-    # Add safety margin - use 15 per minute instead of 20
-    SAFE_RATE_LIMIT = 15
-    SAFE_DELAY = SECONDS_PER_MIN / SAFE_RATE_LIMIT  # 4 seconds between requests
-    
-    # Calculate batch size based on venue count
-    # If we have 60 venues, and want to scrape each daily, that's 60/24 = 2.5 venues per hour
-    HOURS_PER_DAY = 24
-    venues_per_hour = venue_count / HOURS_PER_DAY
-    batch_size = max(1, min(3, round(venues_per_hour)))  # Between 1 and 3 venues per batch
+    A venue entry can set 'cache_ttl' (seconds) and 'cache_mode'. The
+    FETCH_CACHE_REFRESH / FETCH_CACHE_BYPASS environment variables take a
+    comma-separated list of venue names to refresh or bypass for this run.
+    The TTL is capped at half the shortest refresh interval, so a venue that
+    comes due is never answered with the copy fetched on its previous run.
+    """
+    def venue_names(env_var):
+        return {name.strip() for name in os.environ.get(env_var, '').split(',') if name.strip()}
     
-    return {
-        'batch_size': batch_size,
-        'request_delay': SAFE_DELAY,
-        'batch_delay': 60  # 1 minute between batches
+    cache_mode = venue_info.get('cache_mode', 'use')
+    if venue_info['name'] in venue_names('FETCH_CACHE_BYPASS'):
+        cache_mode = 'bypass'
+    elif venue_info['name'] in venue_names('FETCH_CACHE_REFRESH'):
+        cache_mode = 'refresh'
+    cache_ttl = min(venue_info.get('cache_ttl', FETCH_CACHE_TTL), refresh.REFRESH_MIN_HOURS * 3600 / 2)
+    return cache_ttl, cache_mode
+
+# Venues a worker scrapes at once (worker.py --concurrency); per-host politeness comes from rate_limit's token buckets
+SCRAPER_CONCURRENCY = int(os.environ.get('SCRAPER_CONCURRENCY', '4'))
+
+# Longest the scheduler sleeps before re-reading venue due times
+REFRESH_POLL_SECONDS = int(os.environ.get('REFRESH_POLL_SECONDS', '300'))
+
+# Venue websites to crawl. An entry may set 'ready' - what a loaded page looks like
+# for the browser tiers (see readiness.py) - 'allow_resources' - resource types or
+# hosts the browsers must still load (see browser_pool.profile_for) - and 'cache_ttl' / 'cache_mode'.
+VENUES = [
+    {'name': 'Mansions', 
+     'url': 'https://ra.co/clubs/197275', 
+     'default_times': ['22:00']
+    },
+    {'name': 'Jupiter Disco', 
+     'url': 'https://ra.co/clubs/128789', 
+     'default_times': ['22:00']
+    },
+    {'name': 'Bossa Nova Civic Club', 
+     'url': 'https://ra.co/clubs/71292', 
+     'default_times': ['22:00']
+    },
+    {'name': 'Nowadays', 
+     'url': 'https://ra.co/clubs/105873', 
+     'default_times': ['15:00', '20:00']
+    },
+    {'name': 'Elsewhere', 
+     'url': 'https://ra.co/clubs/139960', 
+     'default_times': ['22:00']
+    },
+    {'name': 'Pianos', 
+     'url': 'https://ra.co/clubs/8400', 
+     'default_times': ['22:00']
+    },
+    {'name': 'Mood Ring', 
+     'url': 'https://ra.co/clubs/141852', 
+     'default_times': ['22:00']
+    },
+    {'name': '99 Scott', 
+     'url': 'https://ra.co/clubs/103503', 
+     'default_times': ['22:00']
+    },
+    {'name': 'Good Room', 
+     'url': 'https://ra.co/clubs/97606', 
+     'default_times': ['22:00']
+    },        
+    {'name': 'Public Records', 
+     'url': 'https://publicrecords.nyc', 
+     'default_times': ['20:00']
+    },
+    {'name': 'The Sultan Room', 
+     'url': 'https://www.thesultanroom.com/calendar', 
+     'default_times': ['20:00']
+    },
+    {'name': 'Village Vanguard', 
+     'url': 'https://villagevanguard.com', 
+     'default_times': ['20:00', '22:00']
+    },
+    {'name': 'Bar Bayeux', 'url': 'https://www.barbayeux.com/jazz/', 'default_times': ['8:00 PM', '9:30 PM']},
+    {'name': 'Knockdown Center', 
+     'url': 'https://knockdown.center/upcoming/', 
+     'default_times': ['22:00']
+    },
+    {'name': 'House of Yes', 
+     'url': 'https://www.houseofyes.org/calendar', 
+     'default_times': ['22:00']
+    },
+    {'name': 'Black Flamingo', 'url': 'https://www.blackflamingonyc.com/events', 'default_times': ['22:00']},
+    {'name': '3 Dollar Bill', 'url': 'https://www.3dollarbillbk.com/rsvp', 'default_times': ['22:00']},
+    {'name': 'Smalls Jazz Club', 'url': 'https://www.smallslive.com', 'default_times': ['7:30 PM', '10:00 PM', '11:30 PM']},
+    {'name': 'Mezzrow Jazz Club', 'url': 'https://mezzrow.com/', 'default_times': ['7:30 PM', '9:00 PM', '10:30 PM']},
+    {'name': 'Dizzy\'s Club', 'url': 'https://jazz.org/concerts-events/calendar/', 'default_times': ['7:30 PM', '9:30 PM']},
+    {'name': 'The Jazz Gallery', 'url': 'https://jazzgallery.org/calendar/', 'default_times': ['7:30 PM', '9:30 PM']},
+    {'name': 'Blue Note', 'url': 'https://www.bluenotejazz.com/nyc/shows', 'default_times': ['8:00 PM', '10:30 PM']},
+    {'name': 'Ornithology Jazz Club', 'url': 'https://www.ornithologyjazzclub.com/events-2/', 'default_times': ['6:30 PM', '8:30 PM', '9:00 PM']},
+    {'name': 'Ornithology Cafe', 'url': 'https://www.ornithologyjazzclub.com/new-page-1/', 'default_times': ['6:30 PM', '8:30 PM', '9:00 PM']},
+    {'name': 'Bar LunÀtico', 'url': 'https://www.barlunatico.com/music/', 'default_times': ['9:00 PM', '10:15 PM']},
+    {'name': 'Marians Jazz Room', 'url': 'https://www.mariansbrooklyn.com/events', 'default_times': ['7:00 PM', '9:00 PM']},
+    {'name': 'The Owl Music Parlor', 'url': 'https://theowl.nyc/calendar/', 'default_times': ['8:00 PM']},
+    {'name': 'Zinc Bar', 'url': 'https://zincbar.com/', 'default_times': ['7:00 PM', '9:00 PM']},
+    {'name': 'Mona\'s', 'url': 'https://www.monascafenyc.com/', 'default_times': ['11:00 PM']},
+    {'name': 'The Stone', 'url': 'http://thestonenyc.com/calendar.php', 'default_times': ['8:30 PM']},
+    {'name': 'Abrons Art Center', 'url': 'https://abronsartscenter.org/calendar', 'default_times': ['7:00 PM']},
+    {'name': 'Café Erzulie', 'url': 'https://www.cafeerzulie.com/events', 'default_times': ['8:00 PM']},
+    {'name': 'Nublu 151', 'url': 'https://nublu.net/program', 'default_times': ['9:00 PM', '11:00 PM']},
+    {'name': 'Umbra Café', 'url': 'https://www.umbrabrooklyn.com/events', 'default_times': ['7:00 PM']},
+    {'name': 'Arthur\'s Tavern', 'url': 'https://arthurstavern.nyc/events/', 'default_times': ['7:00 PM', '9:30 PM']},
+    {'name': 'Birdland', 'url': 'https://www.birdlandjazz.com/', 'default_times': ['5:30 PM', '7:00 PM', '9:30 PM']},
+    {'name': 'Barbès', 'url': 'https://viewcyembed.com/barbes/000000/FFFCFC/850505', 'default_times': ['8:00 PM', '10:00 PM']},
+    {'name': 'Smoke Jazz & Supper Club', 'url': 'https://livestreams.smokejazz.com/', 'default_times': ['7:00 PM', '9:00 PM', '10:30 PM']},
+    {'name': 'Room 623 at B2 Harlem', 'url': 'https://www.room623.com/tickets', 'default_times': ['8:00 PM', '10:00 PM']},
+    {'name': 'Soapbox Gallery', 'url': 'https://www.soapboxgallery.org/calendar', 'default_times': ['8:00 PM']},
+    {'name': 'Silvana', 'url': 'https://silvana-nyc.com/calendar.php', 'default_times': ['8:00 PM', '10:00 PM']},
+    {'name': 'Sistas\' Place', 'url': 'https://sistasplace.org/', 'default_times': ['9:00 PM']},
+    {'name': 'Drom', 'url': 'https://dromnyc.com/events/', 'default_times': ['7:00 PM', '9:00 PM']},
+    {'name': 'Roulette', 'url': 'https://roulette.org/calendar/', 'default_times': ['8:00 PM']},
+    {'name': 'Jazzmobile', 'url': 'https://jazzmobile.org/', 'default_times': ['7:00 PM']},
+    {'name': 'The Django', 'url': 'https://www.thedjangonyc.com/events', 'default_times': ['7:30 PM', '9:30 PM']},
+    {'name': 'Pangea', 'url': 'https://www.pangeanyc.com/music/', 'default_times': ['7:00 PM']},
+    {'name': 'The Ear Inn', 'url': 'https://www.theearinn.com/music-schedule/', 'default_times': ['8:00 PM']},
+    {'name': 'Shrine', 'url': 'https://shrinenyc.com/', 'default_times': ['8:00 PM', '10:00 PM']},
+    {'name': 'Chelsea Table + Stage', 'url': 'https://www.chelseatableandstage.com/tickets-shows', 'default_times': ['7:00 PM', '9:00 PM']},
+    {'name': 'The Keep', 'url': 'https://www.thekeepny.com/calendar', 'default_times': ['8:00 PM']},
+    {'name': 'Joe\'s Pub', 'url': 'https://publictheater.org/joes-pub/', 'default_times': ['7:00 PM', '9:30 PM']},
+    {'name': 'Klavierhaus', 'url': 'https://event.klavierhaus.com/k/calendar', 'default_times': ['7:00 PM']},
+    {'name': 'Saint Peter\'s Church', 'url': 'https://www.saintpeters.org/events', 'default_times': ['1:00 PM', '7:00 PM']},
+    {'name': 'Minton\'s Playhouse', 'url': 'https://www.eventbrite.com/o/mintons-playhouse-76715695933', 'default_times': ['7:00 PM', '9:30 PM']},
+    {'name': 'National Sawdust', 'url': 'https://www.nationalsawdust.org/performances-prev', 'default_times': ['7:00 PM', '9:00 PM']},
+    {'name': 'The Cutting Room', 'url': 'https://thecuttingroomnyc.com/calendar/', 'default_times': ['7:00 PM', '9:30 PM']},
+    {'name': 'The Appel Room', 'url': 'https://www.lincolncenter.org/venue/the-appel-room/v/calendar', 'default_times': ['7:30 PM', '9:30 PM']},
+    {'name': 'Symphony Space', 'url': 'https://www.symphonyspace.org/events', 'default_times': ['7:00 PM', '9:00 PM']},
+    {'name': 'Le Poisson Rouge', 'url': 'https://www.lpr.com/', 'default_times': ['7:00 PM', '9:30 PM']},
+    {'name': 'Close Up', 
+     'url': 'https://www.closeupnyc.com/calendar', 
+     'default_times': ['19:00', '21:00']
+    },
+    {'name': 'Film at Lincoln Center', 'url': 'https://www.filmlinc.org/', 'default_times': ['7:00 PM', '9:30 PM']},
+    {'name': 'IFC Center',
+     'url': 'https://www.ifccenter.com/',
+     'default_times': [],  # Movies have variable times
+     'neighborhood': 'Greenwich Village',
+     'genres': ['Movies']
+    },
+    {'name': 'Film Forum',  # Add Film Forum
+     'url': 'https://filmforum.org/now_playing',
+     'default_times': [],  # Movies have variable times
+     'neighborhood': 'Greenwich Village',
+     'genres': ['Movies']
+    },
+    {'name': 'Quad Cinema',  # Add Quad Cinema
+     'url': 'https://quadcinema.com',
+     'default_times': [],  # Movies have variable times
+     'neighborhood': 'Greenwich Village',
+     'genres': ['Movies']
+    },
+    {'name': 'Market Hotel', 'url': 'https://ra.co/clubs/19281', 'default_times': ['11:00 PM'], 'neighborhood': 'Bushwick', 'genres': ['Clubs']},
+    {'name': 'Paragon', 'url': 'https://ra.co/clubs/195815', 'default_times': ['11:00 PM'], 'neighborhood': 'Bushwick', 'genres': ['Clubs']},
+]
+
+def reset_scrape_stats():
+    """Start fresh per-run counters"""
+    get_client().reset_stats()
+    llm_cache.reset_stats()
+    get_limiter().reset_stats()
+    readiness.reset_stats()
+    html_reducer.reset_stats()
+    with run_metrics_lock:
+        run_metrics.clear()
+
+def log_scrape_stats(timings, wall_time):
+    """Log the run summary and per-component counters collected since reset_scrape_stats()"""
+    if timings:
+        venue_time = sum(timings.values())
+        logging.info(
+            f"PERFORMANCE: Run summary - {len(timings)} venues in {wall_time:.1f}s wall time, "
+            f"{venue_time:.1f}s summed venue time ({venue_time / max(wall_time, 0.001):.1f}x overlap)"
+        )
+    get_limiter().log_stats()
+    get_pool().log_stats()
+    get_client().log_stats()
+    async_fetch.log_stats()
+    fetch_strategy.log_stats()
+    readiness.log_stats()
+    html_reducer.log_stats()
+    llm_cache.log_cache_stats()
+    with run_metrics_lock:
+        logging.info(f"PERFORMANCE: Run metrics - {dict(run_metrics)}")
+    cache_stats = fetch_cache_stats()
+    logging.info(f"PERFORMANCE: Fetch cache - {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                 f"{cache_stats['writes']} writes, {cache_stats['evictions']} evictions")
+
+def remove_stale_concerts(session, venue, removed_records, concert_data_list):
+    """
+    Delete upcoming concerts whose calendar block disappeared from the venue page.
+
+    Conservative: only future dates, only exact venue/date/artist matches, and
+    never a concert that is still present in the freshly extracted data.
+    """
+    today = datetime.now().date()
+    current = {
+        ((c.get('artist') or '').strip().lower(), (c.get('date') or '').strip())
+        for c in concert_data_list
     }
+    removed = 0
+    for record in removed_records:
+        artist_name = (record.get('artist') or '').strip()
+        date_str = (record.get('date') or '').strip()
+        if not artist_name or not date_str or (artist_name.lower(), date_str) in current:
+            continue
+        try:
+            concert_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            continue
+        if concert_date < today:
+            continue
+        # Same natural key as store_concert_data, so spelling and case differences still match
+        stale = (
+            session.query(Concert)
+            .filter(
+                Concert.venue_id == venue.id,
+                Concert.date == concert_date,
+                Concert.artist_key == artist_set_key([artist_name])
+            )
+            .all()
+        )
+        for concert in stale:
+            logging.info(f"Removing stale concert: {artist_name} at {venue.name} on {concert_date}")
+            session.delete(concert)
+            removed += 1
+    if removed:
+        upcoming_events.refresh_venue(session, venue.id)
+        listing_cache.bump_data_version(session)
+        session.commit()
+    return removed
 
-def process_venue_batch(batch, session):
-    """Process a batch of venues with improved error handling"""
-    # Skip if we're in the reloader process
-    if not os.environ.get('WERKZEUG_RUN_MAIN'):
-        return
-        
-    logging.info(f"Processing batch of {len(batch)} venues")
-    processed_venues = set()  # Track which venues we've processed
-    
-    # Separate RA venues and non-RA venues
-    ra_venues = [v for v in batch if 'ra.co' in v['url']]
-    other_venues = [v for v in batch if 'ra.co' not in v['url']]
-    
-    # Randomize order of RA venues
-    random.shuffle(ra_venues)
-    
-    # Log threading information
-    logging.info(f"PERFORMANCE: Using ThreadPoolExecutor with max_workers=1 (sequential processing)")
-    logging.info(f"PERFORMANCE: Batch details - {len(other_venues)} non-RA venues, {len(ra_venues)} RA venues")
-    
-    # Process non-RA venues first
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        for venue_info in other_venues + ra_venues:  # Process regular venues, then RA
-            venue_name = venue_info['name']
-            
-            if venue_name in processed_venues:
-                logging.debug(f"Skipping already processed venue: {venue_name}")
-                continue
-                
+ARTIST_IN_CHUNK = 500  # Keep IN lists well under SQLite's bound-parameter limit
+
+def parse_show_times(times_list):
+    """Parse a list of '8:00 PM' / '20:00' strings into time objects, skipping bad values"""
+    processed_times = []
+    for time_str in times_list:
+        try:
+            # Try parsing 12-hour format first
+            time_obj = datetime.strptime(time_str, '%I:%M %p').time()
+        except ValueError:
             try:
-                # Create a fresh session for each venue to avoid transaction issues
-                # The nested process_venue function will create its own session
-                future = executor.submit(process_venue, venue_info, None)
-                future.result()
-                processed_venues.add(venue_name)
-                logging.info(f"Completed processing {venue_name}")
-                
-                # Add timing logs
-                scrape_end_time = datetime.now()
-                
-                # Longer delay for RA venues
-                if 'ra.co' in venue_info['url']:
-                    delay = random.uniform(30, 60)
-                    logging.info(f"PERFORMANCE: RA venue {venue_name} processed, about to sleep {delay:.1f} seconds...")
-                    venue_type = "RA"
-                    time.sleep(delay)
-                else:
-                    delay = random.uniform(1, 3)
-                    logging.info(f"PERFORMANCE: Non-RA venue {venue_name} processed, about to sleep {delay:.1f} seconds...")
-                    venue_type = "Standard"
-                    time.sleep(delay)
-                    
-                # Log total time including sleep
-                total_time = (datetime.now() - scrape_end_time).total_seconds() + delay
-                logging.info(f"PERFORMANCE: {venue_type} venue {venue_name} - sleep overhead: {delay:.1f}s, total wait: {total_time:.1f}s")
-                    
-            except Exception as e:
-                logging.error(f"Error processing {venue_name}: {e}")
-                # Continue with next venue instead of failing the whole batch
+                # Try 24-hour format
+                time_obj = datetime.strptime(time_str, '%H:%M').time()
+            except ValueError:
+                logging.debug(f"Invalid time format: {time_str}")
+                continue
+        processed_times.append(time_obj)
+    return processed_times
 
-def main():
-    """Main function that orchestrates the crawling, parsing, and storing of concert data."""
-    # We don't need a global session anymore since each venue creates its own
-    # session = Session()
-    
-    # List of venue websites to crawl
-    venues = [
-        {'name': 'Mansions', 
-         'url': 'https://ra.co/clubs/197275', 
-         'default_times': ['22:00']
-        },
-        {'name': 'Jupiter Disco', 
-         'url': 'https://ra.co/clubs/128789', 
-         'default_times': ['22:00']
-        },
-        {'name': 'Bossa Nova Civic Club', 
-         'url': 'https://ra.co/clubs/71292', 
-         'default_times': ['22:00']
-        },
-        {'name': 'Nowadays', 
-         'url': 'https://ra.co/clubs/105873', 
-         'default_times': ['15:00', '20:00']
-        },
-        {'name': 'Elsewhere', 
-         'url': 'https://ra.co/clubs/139960', 
-         'default_times': ['22:00']
-        },
-        {'name': 'Pianos', 
-         'url': 'https://ra.co/clubs/8400', 
-         'default_times': ['22:00']
-        },
-        {'name': 'Mood Ring', 
-         'url': 'https://ra.co/clubs/141852', 
-         'default_times': ['22:00']
-        },
-        {'name': '99 Scott', 
-         'url': 'https://ra.co/clubs/103503', 
-         'default_times': ['22:00']
-        },
-        {'name': 'Good Room', 
-         'url': 'https://ra.co/clubs/97606', 
-         'default_times': ['22:00']
-        },        
-        {'name': 'Public Records', 
-         'url': 'https://publicrecords.nyc', 
-         'default_times': ['20:00']
-        },
-        {'name': 'The Sultan Room', 
-         'url': 'https://www.thesultanroom.com/calendar', 
-         'default_times': ['20:00']
-        },
-        {'name': 'Village Vanguard', 
-         'url': 'https://villagevanguard.com', 
-         'default_times': ['20:00', '22:00']
-        },
-        {'name': 'Bar Bayeux', 'url': 'https://www.barbayeux.com/jazz/', 'default_times': ['8:00 PM', '9:30 PM']},
-        {'name': 'Knockdown Center', 
-         'url': 'https://knockdown.center/upcoming/', 
-         'default_times': ['22:00']
-        },
-        {'name': 'House of Yes', 
-         'url': 'https://www.houseofyes.org/calendar', 
-         'default_times': ['22:00']
-        },
-        {'name': 'Black Flamingo', 'url': 'https://www.blackflamingonyc.com/events', 'default_times': ['22:00']},
-        {'name': '3 Dollar Bill', 'url': 'https://www.3dollarbillbk.com/rsvp', 'default_times': ['22:00']},
-        {'name': 'Smalls Jazz Club', 'url': 'https://www.smallslive.com', 'default_times': ['7:30 PM', '10:00 PM', '11:30 PM']},
-        {'name': 'Mezzrow Jazz Club', 'url': 'https://mezzrow.com/', 'default_times': ['7:30 PM', '9:00 PM', '10:30 PM']},
-        {'name': 'Dizzy\'s Club', 'url': 'https://jazz.org/concerts-events/calendar/', 'default_times': ['7:30 PM', '9:30 PM']},
-        {'name': 'The Jazz Gallery', 'url': 'https://jazzgallery.org/calendar/', 'default_times': ['7:30 PM', '9:30 PM']},
-        {'name': 'Blue Note', 'url': 'https://www.bluenotejazz.com/nyc/shows', 'default_times': ['8:00 PM', '10:30 PM']},
-        {'name': 'Ornithology Jazz Club', 'url': 'https://www.ornithologyjazzclub.com/events-2/', 'default_times': ['6:30 PM', '8:30 PM', '9:00 PM']},
-        {'name': 'Ornithology Cafe', 'url': 'https://www.ornithologyjazzclub.com/new-page-1/', 'default_times': ['6:30 PM', '8:30 PM', '9:00 PM']},
-        {'name': 'Bar LunÀtico', 'url': 'https://www.barlunatico.com/music/', 'default_times': ['9:00 PM', '10:15 PM']},
-        {'name': 'Marians Jazz Room', 'url': 'https://www.mariansbrooklyn.com/events', 'default_times': ['7:00 PM', '9:00 PM']},
-        {'name': 'The Owl Music Parlor', 'url': 'https://theowl.nyc/calendar/', 'default_times': ['8:00 PM']},
-        {'name': 'Zinc Bar', 'url': 'https://zincbar.com/', 'default_times': ['7:00 PM', '9:00 PM']},
-        {'name': 'Mona\'s', 'url': 'https://www.monascafenyc.com/', 'default_times': ['11:00 PM']},
-        {'name': 'The Stone', 'url': 'http://thestonenyc.com/calendar.php', 'default_times': ['8:30 PM']},
-        {'name': 'Abrons Art Center', 'url': 'https://abronsartscenter.org/calendar', 'default_times': ['7:00 PM']},
-        {'name': 'Café Erzulie', 'url': 'https://www.cafeerzulie.com/events', 'default_times': ['8:00 PM']},
-        {'name': 'Nublu 151', 'url': 'https://nublu.net/program', 'default_times': ['9:00 PM', '11:00 PM']},
-        {'name': 'Umbra Café', 'url': 'https://www.umbrabrooklyn.com/events', 'default_times': ['7:00 PM']},
-        {'name': 'Arthur\'s Tavern', 'url': 'https://arthurstavern.nyc/events/', 'default_times': ['7:00 PM', '9:30 PM']},
-        {'name': 'Birdland', 'url': 'https://www.birdlandjazz.com/', 'default_times': ['5:30 PM', '7:00 PM', '9:30 PM']},
-        {'name': 'Barbès', 'url': 'https://viewcyembed.com/barbes/000000/FFFCFC/850505', 'default_times': ['8:00 PM', '10:00 PM']},
-        {'name': 'Smoke Jazz & Supper Club', 'url': 'https://livestreams.smokejazz.com/', 'default_times': ['7:00 PM', '9:00 PM', '10:30 PM']},
-        {'name': 'Room 623 at B2 Harlem', 'url': 'https://www.room623.com/tickets', 'default_times': ['8:00 PM', '10:00 PM']},
-        {'name': 'Soapbox Gallery', 'url': 'https://www.soapboxgallery.org/calendar', 'default_times': ['8:00 PM']},
-        {'name': 'Silvana', 'url': 'https://silvana-nyc.com/calendar.php', 'default_times': ['8:00 PM', '10:00 PM']},
-        {'name': 'Sistas\' Place', 'url': 'https://sistasplace.org/', 'default_times': ['9:00 PM']},
-        {'name': 'Drom', 'url': 'https://dromnyc.com/events/', 'default_times': ['7:00 PM', '9:00 PM']},
-        {'name': 'Roulette', 'url': 'https://roulette.org/calendar/', 'default_times': ['8:00 PM']},
-        {'name': 'Jazzmobile', 'url': 'https://jazzmobile.org/', 'default_times': ['7:00 PM']},
-        {'name': 'The Django', 'url': 'https://www.thedjangonyc.com/events', 'default_times': ['7:30 PM', '9:30 PM']},
-        {'name': 'Pangea', 'url': 'https://www.pangeanyc.com/music/', 'default_times': ['7:00 PM']},
-        {'name': 'The Ear Inn', 'url': 'https://www.theearinn.com/music-schedule/', 'default_times': ['8:00 PM']},
-        {'name': 'Shrine', 'url': 'https://shrinenyc.com/', 'default_times': ['8:00 PM', '10:00 PM']},
-        {'name': 'Chelsea Table + Stage', 'url': 'https://www.chelseatableandstage.com/tickets-shows', 'default_times': ['7:00 PM', '9:00 PM']},
-        {'name': 'The Keep', 'url': 'https://www.thekeepny.com/calendar', 'default_times': ['8:00 PM']},
-        {'name': 'Joe\'s Pub', 'url': 'https://publictheater.org/joes-pub/', 'default_times': ['7:00 PM', '9:30 PM']},
-        {'name': 'Klavierhaus', 'url': 'https://event.klavierhaus.com/k/calendar', 'default_times': ['7:00 PM']},
-        {'name': 'Saint Peter\'s Church', 'url': 'https://www.saintpeters.org/events', 'default_times': ['1:00 PM', '7:00 PM']},
-        {'name': 'Minton\'s Playhouse', 'url': 'https://www.eventbrite.com/o/mintons-playhouse-76715695933', 'default_times': ['7:00 PM', '9:30 PM']},
-        {'name': 'National Sawdust', 'url': 'https://www.nationalsawdust.org/performances-prev', 'default_times': ['7:00 PM', '9:00 PM']},
-        {'name': 'The Cutting Room', 'url': 'https://thecuttingroomnyc.com/calendar/', 'default_times': ['7:00 PM', '9:30 PM']},
-        {'name': 'The Appel Room', 'url': 'https://www.lincolncenter.org/venue/the-appel-room/v/calendar', 'default_times': ['7:30 PM', '9:30 PM']},
-        {'name': 'Symphony Space', 'url': 'https://www.symphonyspace.org/events', 'default_times': ['7:00 PM', '9:00 PM']},
-        {'name': 'Le Poisson Rouge', 'url': 'https://www.lpr.com/', 'default_times': ['7:00 PM', '9:30 PM']},
-        {'name': 'Close Up', 
-         'url': 'https://www.closeupnyc.com/calendar', 
-         'default_times': ['19:00', '21:00']
-        },
-        {'name': 'Film at Lincoln Center', 'url': 'https://www.filmlinc.org/', 'default_times': ['7:00 PM', '9:30 PM']},
-        {'name': 'IFC Center',
-         'url': 'https://www.ifccenter.com/',
-         'default_times': [],  # Movies have variable times
-         'neighborhood': 'Greenwich Village',
-         'genres': ['Movies']
-        },
-        {'name': 'Film Forum',  # Add Film Forum
-         'url': 'https://filmforum.org/now_playing',
-         'default_times': [],  # Movies have variable times
-         'neighborhood': 'Greenwich Village',
-         'genres': ['Movies']
-        },
-        {'name': 'Quad Cinema',  # Add Quad Cinema
-         'url': 'https://quadcinema.com',
-         'default_times': [],  # Movies have variable times
-         'neighborhood': 'Greenwich Village',
-         'genres': ['Movies']
-        },
-        {'name': 'Market Hotel', 'url': 'https://ra.co/clubs/19281', 'default_times': ['11:00 PM'], 'neighborhood': 'Bushwick', 'genres': ['Clubs']},
-        {'name': 'Paragon', 'url': 'https://ra.co/clubs/195815', 'default_times': ['11:00 PM'], 'neighborhood': 'Bushwick', 'genres': ['Clubs']},
-    ]
-    
-    # Shuffle venues for randomized scraping order
-    random.shuffle(venues)
-    
-    # Calculate scraping parameters
-    params = calculate_scrape_params(len(venues))
-    print(f"\nScraping parameters:")
-    print(f"Batch size: {params['batch_size']}")
-    print(f"Request delay: {params['request_delay']:.1f} seconds")
-    print(f"Batch delay: {params['batch_delay']} seconds")
-    print(f"Venues will be processed in random order")
-    
-    # Process venues in small batches
-    for i in range(0, len(venues), params['batch_size']):
-        batch = venues[i:i+params['batch_size']]
-        print(f"\nProcessing batch {i//params['batch_size'] + 1} of {(len(venues) + params['batch_size'] - 1)//params['batch_size']}")
-        
-        # Pass None for session parameter since each venue creates its own session
-        process_venue_batch(batch, None)
-        
-        # Add delay between batches
-        if i + params['batch_size'] < len(venues):
-            print(f"\nWaiting {params['batch_delay']} seconds before next batch...")
-            time.sleep(params['batch_delay'])
+def load_or_create_artists(session, names):
+    """
+    Map artist names to ids, fetching in chunked IN queries and bulk-inserting
+    the missing ones (ON CONFLICT DO NOTHING, so concurrent workers can't collide).
+    """
+    names = sorted(set(names))
+    artist_ids = {}
 
-    print("\nAll venues processed")
+    def fetch(chunk):
+        for artist_id, name in session.query(Artist.id, Artist.name).filter(Artist.name.in_(chunk)):
+            artist_ids[name] = artist_id
+
+    for i in range(0, len(names), ARTIST_IN_CHUNK):
+        fetch(names[i:i + ARTIST_IN_CHUNK])
+
+    missing = [name for name in names if name not in artist_ids]
+    for i in range(0, len(missing), ARTIST_IN_CHUNK):
+        chunk = missing[i:i + ARTIST_IN_CHUNK]
+        session.execute(
+            dialect_insert(Artist.__table__)
+            .values([{'name': name} for name in chunk])
+            .on_conflict_do_nothing(index_elements=['name'])
+        )
+        fetch(chunk)
+    return artist_ids
 
 def store_concert_data(session, concert_data_list, venue_info):
     """
     Stores the concert data into the database with deduplication logic.
-    When a concert with the same venue, artist, date, and time is found, it will update
-    the existing concert rather than creating a new one.
+    Concerts are identified by their natural key (venue, date, artist set), so
+    a concert that already exists is updated rather than duplicated.
+
+    Artists and the venue's existing concerts for the affected dates are loaded
+    up front, the diff is done in memory and changed rows are written with
+    INSERT ... ON CONFLICT DO UPDATE in one transaction. Returns counts of
+    inserted, updated, unchanged and skipped rows.
     """
     venue_name = venue_info['name']
-    print(f"\nProcessing {len(concert_data_list)} concerts for {venue_name}")
+    start = time.time()
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
     
     # Get or create venue
     venue = session.query(Venue).filter_by(name=venue_name).first()
@@ -659,7 +729,7 @@ def store_concert_data(session, concert_data_list, venue_info):
             genres=venue_info.get('genres', [])
         )
         session.add(venue)
-        session.commit()
+        session.flush()
     else:
         # Update venue fields if they're missing but provided in venue_info
         if not venue.neighborhood and venue_info.get('neighborhood'):
@@ -668,158 +738,177 @@ def store_concert_data(session, concert_data_list, venue_info):
             venue.genres = venue_info.get('genres')
         if venue_info.get('address') and not venue.address:
             venue.address = venue_info.get('address')
-        session.commit()
 
+    # Validate and normalize the incoming records; later duplicates of a key win,
+    # since one ON CONFLICT statement can't touch the same row twice
+    incoming = {}
     for concert_data in concert_data_list:
-        print(f"\nProcessing concert:")
-        print(f"  Artist: {concert_data.get('artist')}")
-        print(f"  Date: {concert_data.get('date')}")
-        print(f"  Special Notes: {concert_data.get('special_notes')}")
-        
         # Safely retrieve and strip fields
         artist_name = (concert_data.get('artist') or '').strip()
         date_str = (concert_data.get('date') or '').strip()
-
         if not artist_name or not date_str:
-            print("Incomplete concert data (missing artist or date), skipping entry.")
+            logging.debug(f"Incomplete concert data (missing artist or date), skipping: {concert_data}")
+            counts['skipped'] += 1
             continue
-
         try:
             concert_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            
-            # Parse times for the concert to check for duplicates
-            times_list = concert_data.get('times') or venue_info.get('default_times', [])
-            processed_times = []
-            
-            # Process all time strings into time objects for comparison
-            for time_str in times_list:
-                try:
-                    # Try parsing 12-hour format first
-                    time_obj = datetime.strptime(time_str, '%I:%M %p').time()
-                except ValueError:
-                    try:
-                        # Try 24-hour format
-                        time_obj = datetime.strptime(time_str, '%H:%M').time()
-                    except ValueError:
-                        print(f"Invalid time format: {time_str}")
-                        continue
-                processed_times.append(time_obj)
-            
-            # Add detailed logging to debug duplication issues
-            print(f"\nCHECKING FOR DUPLICATES: {venue_name}, {concert_date}, '{artist_name}', times: {processed_times}")
-            
-            # Get or create artist
-            artist = session.query(Artist).filter_by(name=artist_name).first()
-            if not artist:
-                artist = Artist(name=artist_name)
-                session.add(artist)
-                session.commit()
-            
-            # Check for existing concert with same venue, date, artist
-            existing_concert = (
-                session.query(Concert)
-                .join(Concert.artists)
-                .filter(
-                    Concert.venue_id == venue.id,
-                    Concert.date == concert_date,
-                    Artist.name == artist_name
-                )
-                .first()
-            )
-            
-            # If we found a match, check if it has the same time(s)
-            if existing_concert:
-                existing_artists = [a.name for a in existing_concert.artists]
-                existing_times = [t.time for t in existing_concert.times]
-                
-                print(f"MATCH FOUND: {venue_name}, {concert_date}, Artists: {existing_artists}")
-                print(f"Existing times: {existing_times}, New times: {processed_times}")
-                
-                # Update the existing concert with new information
-                existing_concert.ticket_link = concert_data.get('ticket_link', existing_concert.ticket_link)
-                existing_concert.price_range = concert_data.get('price_range', existing_concert.price_range)
-                existing_concert.special_notes = concert_data.get('special_notes', existing_concert.special_notes)
-                existing_concert.updated_at = datetime.now()  # Update the timestamp
-                
-                # Update times if they've changed
-                if set(processed_times) != set(existing_times):
-                    print(f"Times have changed, updating concert times")
-                    
-                    # Delete existing times
-                    for time in existing_concert.times:
-                        session.delete(time)
-                    
-                    # Add new times
-                    for time_obj in processed_times:
-                        concert_time = ConcertTime(time=time_obj)
-                        existing_concert.times.append(concert_time)
-                
-                session.commit()
-                print(f"Updated existing concert: {artist_name} at {venue_name} on {concert_date}")
-                continue
+        except ValueError:
+            logging.debug(f"Invalid date {date_str!r} for {artist_name}, skipping")
+            counts['skipped'] += 1
+            continue
+        times_list = concert_data.get('times') or venue_info.get('default_times', [])
+        key = (concert_date, artist_set_key([artist_name]))
+        if key in incoming:
+            counts['skipped'] += 1
+        incoming[key] = (artist_name, parse_show_times(times_list), concert_data)
 
-            # Create new concert if no duplicate found
-            concert = Concert(
-                venue_id=venue.id,
-                date=concert_date,
-                ticket_link=concert_data.get('ticket_link', ''),
-                price_range=concert_data.get('price_range', ''),
-                special_notes=concert_data.get('special_notes', ''),
+    if not incoming:
+        # Venue fields may still have been filled in above
+        upcoming_events.refresh_venue(session, venue.id)
+        listing_cache.bump_data_version(session)
+        session.commit()
+        logging.info(f"No valid concerts to store for {venue_name} ({counts['skipped']} skipped)")
+        return counts
+
+    try:
+        # Existing concerts for the affected date window, with their times, in one pass
+        dates = [key[0] for key in incoming]
+        existing_concerts = (
+            session.query(Concert)
+            .options(selectinload(Concert.times))
+            .filter(
+                Concert.venue_id == venue.id,
+                Concert.date >= min(dates),
+                Concert.date <= max(dates)
             )
-            concert.artists.append(artist)
+            .all()
+        )
+        by_key = {(concert.date, concert.artist_key): concert for concert in existing_concerts}
 
-            # Create child ConcertTime rows
-            for time_obj in processed_times:
-                concert_time = ConcertTime(time=time_obj)
-                concert.times.append(concert_time)
+        upserts = []
+        times_to_write = {}
+        for key, (artist_name, processed_times, concert_data) in incoming.items():
+            concert_date, artist_key = key
+            existing_concert = by_key.get(key)
+            row = {'venue_id': venue.id, 'date': concert_date, 'artist_key': artist_key}
 
-            session.add(concert)
-            try:
-                session.commit()
-                print(f"Added new concert: {artist_name} at {venue_name} on {concert_date}")
-            except Exception as e:
-                print(f"Error committing concert: {e}")
-                session.rollback()
+            if existing_concert is None:
+                for field in ('ticket_link', 'price_range', 'special_notes'):
+                    row[field] = concert_data.get(field, '')
+                upserts.append(row)
+                times_to_write[key] = processed_times
+                counts['inserted'] += 1
                 continue
 
-        except Exception as e:
-            print(f"Error processing concert data: {e}")
-            session.rollback()
-            continue
+            # Missing fields keep their stored value; only write rows that actually changed
+            changed = False
+            for field in ('ticket_link', 'price_range', 'special_notes'):
+                row[field] = concert_data.get(field, getattr(existing_concert, field))
+                if row[field] != getattr(existing_concert, field):
+                    changed = True
+            if set(processed_times) != {t.time for t in existing_concert.times}:
+                times_to_write[key] = processed_times
+                changed = True
 
-def run_scraper_schedule():
-    """Run the scraper on a schedule"""
-    def scheduled_job():
-        logging.info("Running scheduled scraper")
-        try:
-            main()
-            logging.info("Scheduled scraper completed successfully")
-        except Exception as e:
-            logging.error(f"Error in scheduled scraper: {e}")
+            if changed:
+                upserts.append(row)
+                counts['updated'] += 1
+            else:
+                counts['unchanged'] += 1
+
+        table = Concert.__table__
+        concert_ids = {}
+        for i in range(0, len(upserts), ARTIST_IN_CHUNK):
+            stmt = dialect_insert(table).values(upserts[i:i + ARTIST_IN_CHUNK])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['venue_id', 'date', 'artist_key'],
+                set_={
+                    'ticket_link': stmt.excluded.ticket_link,
+                    'price_range': stmt.excluded.price_range,
+                    'special_notes': stmt.excluded.special_notes,
+                    'updated_at': func.now(),
+                }
+            ).returning(table.c.id, table.c.date, table.c.artist_key)
+            for concert_id, concert_date, artist_key in session.execute(stmt):
+                concert_ids[(concert_date, artist_key)] = concert_id
 
+        if concert_ids:
+            # Link artists of new concerts only - an existing concert matched on the normalized
+            # artist key keeps its artists, even when this run spells the name differently
+            new_keys = [key for key in concert_ids if key not in by_key]
+            artist_ids = load_or_create_artists(session, [incoming[key][0] for key in new_keys])
+            artist_links = [
+                {'concert_id': concert_ids[key], 'artist_id': artist_ids[incoming[key][0]]}
+                for key in new_keys
+            ]
+            for i in range(0, len(artist_links), ARTIST_IN_CHUNK):
+                session.execute(
+                    dialect_insert(concert_artists)
+                    .values(artist_links[i:i + ARTIST_IN_CHUNK])
+                    .on_conflict_do_nothing(index_elements=['concert_id', 'artist_id'])
+                )
+
+            # Replace show times where they changed
+            time_ids = [concert_ids[key] for key in times_to_write if key in concert_ids]
+            for i in range(0, len(time_ids), ARTIST_IN_CHUNK):
+                session.execute(
+                    ConcertTime.__table__.delete().where(ConcertTime.concert_id.in_(time_ids[i:i + ARTIST_IN_CHUNK]))
+                )
+            time_rows = [
+                {'concert_id': concert_ids[key], 'time': time_obj}
+                for key, processed_times in times_to_write.items() if key in concert_ids
+                for time_obj in processed_times
+            ]
+            if time_rows:
+                session.execute(ConcertTime.__table__.insert(), time_rows)
+
+        # Same transaction as the writes, so the read table never disagrees with a committed scrape
+        upcoming_events.refresh_venue(session, venue.id)
+        # Invalidates cached listings in every web process
+        listing_cache.bump_data_version(session)
+        session.commit()
+        # Rows were written with Core statements - make sure ORM objects reload
+        session.expire_all()
+    except Exception:
+        session.rollback()
+        raise
+
+    logging.info(
+        f"PERFORMANCE: Stored {venue_name} in {time.time() - start:.2f}s - "
+        f"{counts['inserted']} inserted, {counts['updated']} updated, "
+        f"{counts['unchanged']} unchanged, {counts['skipped']} skipped"
+    )
+    return counts
+
+def run_enqueue_schedule():
+    """Enqueue scrape jobs for venues as they come due; worker.py processes them"""
     # Add stop flag to thread
     threading.current_thread().stop_flag = False
     
-    # Schedule the job to run daily at 4 AM
-    schedule.every().day.at("04:00").do(scheduled_job)
-    
-    # Run the scraper immediately on startup
-    logging.info("Running initial scraper")
-    scheduled_job()
-    
     while not getattr(threading.current_thread(), 'stop_flag', False):
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
-
-def start_scraper_thread():
-    """Start the background scraper thread"""
-    scraper_thread = Thread(
-        target=run_scraper_schedule,
-        name="concert-scraper-thread",
+        try:
+            job_queue.enqueue_due(VENUES)
+        except Exception as e:
+            logging.error(f"Error enqueuing scrape jobs: {e}")
+        
+        # Sleep in short steps so shutdown isn't held up
+        deadline = time.time() + REFRESH_POLL_SECONDS
+        while not getattr(threading.current_thread(), 'stop_flag', False) and time.time() < deadline:
+            time.sleep(min(5, deadline - time.time()))
+
+def start_enqueue_thread():
+    """Start the background thread that enqueues due venues (scraping runs in worker.py)"""
+    enqueue_thread = Thread(
+        target=run_enqueue_schedule,
+        name="scrape-enqueue-thread",
         daemon=True
     )
-    scraper_thread.start()
-    return scraper_thread
+    enqueue_thread.start()
+    return enqueue_thread
+
+def stop_thread(thread):
+    thread.stop_flag = True
+    thread.join(timeout=1.0)
 
 def initialize_app():
     """Initialize the application"""
@@ -840,9 +929,9 @@ def initialize_app():
     print("\nCleaning placeholder artists from database...")
     clean_placeholder_artists()
     
-    # Start the scraper thread
-    scraper_thread = start_scraper_thread()
-    atexit.register(lambda: scraper_thread.join(timeout=1.0))
+    # Enqueue due venues; the scraping itself runs in worker.py
+    enqueue_thread = start_enqueue_thread()
+    atexit.register(stop_thread, enqueue_thread)
 
 def normalize_artist_name(name):
     """Normalize artist name for better matching"""
@@ -872,6 +961,8 @@ def clean_placeholder_artists():
         for artist in placeholder_artists:
             db.delete(artist)
             
+        upcoming_events.refresh_all(db)
+        listing_cache.bump_data_version(db)
         db.commit()
         print("Successfully cleaned placeholder artists from database")
         
@@ -960,8 +1051,12 @@ def preferences():
     finally:
         db.close()
 
-def generate_calendar_links(concert, venue_name, artist_names):
-    """Generate Google Calendar and iCal links for a concert"""
+# iCal downloads - override via environment
+ICS_CACHE_MAX_ENTRIES = int(os.environ.get('ICS_CACHE_MAX_ENTRIES', '4096'))  # Serialized calendars kept in memory
+ICS_MAX_AGE = int(os.environ.get('ICS_MAX_AGE', '3600'))  # Browser/proxy cache lifetime in seconds
+
+def calendar_event_details(concert, venue_name, artist_names, show_times):
+    """Title, description and start/end datetimes shared by the Google Calendar link and the .ics file"""
     
     # Format the event title and description
     title = f"{', '.join(artist_names)} at {venue_name}"
@@ -975,11 +1070,16 @@ def generate_calendar_links(concert, venue_name, artist_names):
         
     # Get the first show time, or use 8 PM as default
     default_time = datetime_time(20, 0)  # Use renamed datetime.time
-    show_time = concert.times[0].time if concert.times else default_time
+    show_time = show_times[0] if show_times else default_time
     
     # Create datetime objects for start and end
     start_dt = datetime.combine(concert.date, show_time)
     end_dt = start_dt + timedelta(hours=2)  # Assume 2-hour shows
+    return title, description, start_dt, end_dt
+
+def generate_calendar_links(concert, venue_name, artist_names, show_times):
+    """Generate Google Calendar and iCal links for a concert"""
+    title, description, start_dt, end_dt = calendar_event_details(concert, venue_name, artist_names, show_times)
     
     # Google Calendar link
     gcal_params = {
@@ -991,7 +1091,38 @@ def generate_calendar_links(concert, venue_name, artist_names):
     }
     gcal_url = "https://calendar.google.com/calendar/render?" + urlencode(gcal_params)
     
-    # iCal link (using ics library)
+    return {
+        'gcal': gcal_url,
+        # Served (and cached) by concert_ics rather than inlined as a data: URI in every card
+        'ical': url_for('concert_ics', concert_id=concert.id)
+    }
+
+def concert_version(concert_id, updated_at, created_at):
+    """ETag for a concert's calendar file; changes whenever store_concert_data rewrites the row"""
+    stamp = updated_at or created_at
+    return f"{concert_id}-{stamp.timestamp() if stamp else 0:.0f}"
+
+@functools.lru_cache(maxsize=ICS_CACHE_MAX_ENTRIES)
+def serialize_concert_ics(concert_id, version):
+    """The concert's iCal file; memoized per (id, version) so each edit serializes once per process"""
+    db = SessionLocal()
+    try:
+        concert = (
+            db.query(Concert)
+            .options(joinedload(Concert.venue), selectinload(Concert.artists), selectinload(Concert.times))
+            .filter(Concert.id == concert_id)
+            .first()
+        )
+        if concert is None:
+            return None
+        venue_name = concert.venue.name if concert.venue else ''
+        title, description, start_dt, end_dt = calendar_event_details(
+            concert, venue_name, [artist.name for artist in concert.artists],
+            sorted(t.time for t in concert.times if t.time)
+        )
+    finally:
+        db.close()
+    
     calendar = Calendar()
     event = Event()
     event.name = title
@@ -1000,12 +1131,36 @@ def generate_calendar_links(concert, venue_name, artist_names):
     event.description = description
     event.location = venue_name
     calendar.events.add(event)
-    ical_data = calendar.serialize()
+    return calendar.serialize()
+
+@app.route('/concert/<int:concert_id>.ics')
+def concert_ics(concert_id):
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(Concert.id, Concert.updated_at, Concert.created_at)
+            .filter(Concert.id == concert_id)
+            .first()
+        )
+    finally:
+        db.close()
+    if row is None:
+        abort(404)
     
-    return {
-        'gcal': gcal_url,
-        'ical': f"data:text/calendar;charset=utf8,{quote(ical_data)}"
-    }
+    version = concert_version(*row)
+    # Revalidation is answered from the version alone - no serialization
+    if request.if_none_match.contains(version):
+        response = app.response_class(status=304)
+    else:
+        body = serialize_concert_ics(concert_id, version)
+        if body is None:
+            abort(404)
+        response = app.response_class(body, mimetype='text/calendar')
+        response.headers['Content-Disposition'] = f'attachment; filename="concert-{concert_id}.ics"'
+    response.set_etag(version)
+    response.cache_control.public = True
+    response.cache_control.max_age = ICS_MAX_AGE
+    return response
 
 def get_or_create_venue(session, venue_info):
     """Get existing venue or create a new one, and update missing fields"""
@@ -1049,6 +1204,9 @@ def get_or_create_venue(session, venue_info):
                 updated = True
                 
             if updated:
+                # Neighborhood and genres are copied into upcoming_events for the preference filters
+                upcoming_events.refresh_venue(session, venue.id)
+                listing_cache.bump_data_version(session)
                 session.commit()
         
         return venue
@@ -1134,6 +1292,8 @@ def use_custom_scraper(venue_name, venue_url):
         elif 'ra.co' in venue_url:
             from ra_scraper import scrape_ra
             return scrape_ra(venue_url)
+    except NotModified:
+        raise
     except Exception as e:
         logging.error(f"Error using custom scraper for {venue_name}: {e}")
         return []
@@ -1205,6 +1365,8 @@ def update_venue_data():
                     updated_count += 1
                     
         if updated_count > 0:
+            upcoming_events.refresh_all(db)
+            listing_cache.bump_data_version(db)
             db.commit()
             print(f"Updated data for {updated_count} venues")
         else:
@@ -1245,13 +1407,10 @@ if __name__ == '__main__':
     if "--reset-db" in sys.argv or os.environ.get("RESET_DATABASE") == "true":
         reset_database()
     
-    # Only run scraper in the main process, not in the reloader
+    # Only enqueue scrape jobs in the main process, not in the reloader
     if not os.environ.get('WERKZEUG_RUN_MAIN'):
         print("Starting in reloader process - skipping scraper")
     else:
-        # Kill any existing scrapers first
-        kill_existing_scrapers()
-        
         # Update venue data to ensure neighborhoods and genres are set correctly
         update_venue_data()
         
@@ -1263,15 +1422,13 @@ if __name__ == '__main__':
         if len(sys.argv) > 1:
             if "no-scrape" in sys.argv:
                 run_scraper = False
-                logging.info("Starting web server without scraper")
+                logging.info("Starting web server without enqueuing scrape jobs")
             elif "server" in sys.argv:
-                logging.info("Starting web server with scraper")
+                logging.info("Starting web server; run worker.py to process scrape jobs")
         
         if run_scraper:
-            # Kill scrapers again just to be sure
-            kill_existing_scrapers()
-            scraper_thread = start_scraper_thread()
-            atexit.register(lambda: scraper_thread.join(timeout=1.0))
+            enqueue_thread = start_enqueue_thread()
+            atexit.register(stop_thread, enqueue_thread)
     
     # Wrap the app to fix protocol headers
     app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1)
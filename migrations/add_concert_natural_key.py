@@ -0,0 +1,145 @@
+"""Add a natural key to the concerts table
+
+This migration adds concerts.artist_key (a hash of the normalized artist set),
+backfills it, collapses existing duplicates that share (venue_id, date, artist_key)
+into the oldest row, and creates the unique index uix_concert_natural_key that
+store_concert_data's ON CONFLICT upserts rely on. init_db runs it when
+the column or the index is missing; it is safe to run repeatedly.
+"""
+
+import os
+import sys
+# Add parent directory to path if running as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from collections import defaultdict
+from sqlalchemy import text, inspect
+from database import engine, is_postgres
+from models import artist_set_key
+import logging
+
+logger = logging.getLogger('concert_app')
+
+BATCH_SIZE = 500
+
+def _chunks(items, size=BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def backfill_artist_keys(conn):
+    """Compute artist_key for every concert from its current artists"""
+    artists_by_concert = defaultdict(list)
+    rows = conn.execute(text("""
+        SELECT ca.concert_id, a.name
+        FROM concert_artists ca
+        JOIN artists a ON ca.artist_id = a.id
+    """))
+    for concert_id, name in rows:
+        artists_by_concert[concert_id].append(name)
+
+    updates = []
+    for concert_id, artist_key in conn.execute(text("SELECT id, artist_key FROM concerts")):
+        new_key = artist_set_key(artists_by_concert.get(concert_id, []))
+        if new_key != artist_key:
+            updates.append({'id': concert_id, 'k': new_key})
+
+    for batch in _chunks(updates):
+        conn.execute(text("UPDATE concerts SET artist_key = :k WHERE id = :id"), batch)
+    logger.info(f"Backfilled artist_key for {len(updates)} concerts")
+    return len(updates)
+
+def collapse_duplicates(conn):
+    """Merge concerts that share a natural key into the oldest row"""
+    groups = defaultdict(list)
+    rows = conn.execute(text("SELECT id, venue_id, date, artist_key FROM concerts ORDER BY id"))
+    for concert_id, venue_id, date, artist_key in rows:
+        groups[(venue_id, date, artist_key)].append(concert_id)
+
+    duplicate_groups = [ids for ids in groups.values() if len(ids) > 1]
+    if not duplicate_groups:
+        return 0
+
+    removed = 0
+    for ids in duplicate_groups:
+        keeper, duplicates = ids[0], ids[1:]
+        params = {'keeper': keeper}
+        dup_list = ', '.join(str(int(d)) for d in duplicates)
+
+        # Union show times into the keeper (early/late sets were often split across rows)
+        conn.execute(text(f"""
+            INSERT INTO concert_times (concert_id, time)
+            SELECT DISTINCT :keeper, ct.time FROM concert_times ct
+            WHERE ct.concert_id IN ({dup_list})
+            AND ct.time IS NOT NULL
+            AND ct.time NOT IN (SELECT time FROM concert_times WHERE concert_id = :keeper AND time IS NOT NULL)
+        """), params)
+
+        # Keep users' favorites pointing at the surviving row
+        conn.execute(text(f"""
+            INSERT INTO user_favorites (user_id, concert_id)
+            SELECT DISTINCT uf.user_id, :keeper FROM user_favorites uf
+            WHERE uf.concert_id IN ({dup_list})
+            AND uf.user_id NOT IN (SELECT user_id FROM user_favorites WHERE concert_id = :keeper)
+        """), params)
+
+        # Fill in details the keeper is missing from the newest duplicate that has them
+        for column in ('ticket_link', 'price_range', 'special_notes'):
+            conn.execute(text(f"""
+                UPDATE concerts SET {column} = (
+                    SELECT d.{column} FROM concerts d
+                    WHERE d.id IN ({dup_list}) AND d.{column} IS NOT NULL AND d.{column} != ''
+                    ORDER BY d.id DESC LIMIT 1
+                )
+                WHERE id = :keeper AND ({column} IS NULL OR {column} = '')
+                AND EXISTS (
+                    SELECT 1 FROM concerts d
+                    WHERE d.id IN ({dup_list}) AND d.{column} IS NOT NULL AND d.{column} != ''
+                )
+            """), params)
+
+        for table in ('concert_times', 'concert_artists', 'user_favorites'):
+            conn.execute(text(f"DELETE FROM {table} WHERE concert_id IN ({dup_list})"))
+        conn.execute(text(f"DELETE FROM concerts WHERE id IN ({dup_list})"))
+        removed += len(duplicates)
+
+    logger.info(f"Collapsed {removed} duplicate concerts into {len(duplicate_groups)} rows")
+    return removed
+
+def run_migration():
+    """Execute the migration"""
+    try:
+        inspector = inspect(engine)
+        if 'concerts' not in inspector.get_table_names():
+            logger.info("No concerts table yet, skipping")
+            return True
+
+        columns = [c['name'] for c in inspector.get_columns('concerts')]
+        with engine.begin() as conn:
+            if not is_postgres:
+                conn.execute(text("PRAGMA busy_timeout = 30000"))
+            if 'artist_key' not in columns:
+                logger.info("Adding artist_key column to concerts table")
+                conn.execute(text("ALTER TABLE concerts ADD COLUMN artist_key VARCHAR(64)"))
+
+            backfill_artist_keys(conn)
+            collapse_duplicates(conn)
+
+            # Both PostgreSQL and SQLite support IF NOT EXISTS and use unique indexes for ON CONFLICT
+            conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uix_concert_natural_key
+                ON concerts (venue_id, date, artist_key)
+            """))
+        return True
+    except Exception as e:
+        logger.error(f"Error adding concert natural key: {e}")
+        return False
+
+if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Starting migration to add the concert natural key")
+    success = run_migration()
+    if success:
+        logger.info("Migration completed successfully")
+    else:
+        logger.error("Migration failed")
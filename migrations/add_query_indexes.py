@@ -0,0 +1,60 @@
+"""Add secondary indexes for the hot read and write paths
+
+- concerts(date): the index route's date range filter
+- concert_times(concert_id, time): Concert.times.any(time >= now) and loading times
+- concert_artists(artist_id): artist -> concerts lookups (the PK only covers concert_id)
+- user_favorites(concert_id): favorites cleanup when concerts are deleted
+- venues(name), venues(neighborhood): venue lookups by name and the neighborhood filter
+
+(venue_id, date) lookups are served by uix_concert_natural_key and Artist.name
+by its unique constraint. init_db runs this when any of them is missing; run
+query_plans.py to check the plans still use them.
+"""
+
+import os
+import sys
+# Add parent directory to path if running as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text, inspect
+from database import engine
+import logging
+
+logger = logging.getLogger('concert_app')
+
+INDEXES = [
+    ('ix_concerts_date', 'concerts', 'date'),
+    ('ix_concert_times_concert_id_time', 'concert_times', 'concert_id, time'),
+    ('ix_concert_artists_artist_id', 'concert_artists', 'artist_id'),
+    ('ix_user_favorites_concert_id', 'user_favorites', 'concert_id'),
+    ('ix_venues_name', 'venues', 'name'),
+    ('ix_venues_neighborhood', 'venues', 'neighborhood'),
+]
+
+def run_migration():
+    """Execute the migration"""
+    try:
+        tables = inspect(engine).get_table_names()
+        with engine.begin() as conn:
+            for name, table, columns in INDEXES:
+                if table not in tables:
+                    continue
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+            # Refresh planner statistics so the new indexes are actually chosen
+            conn.execute(text("ANALYZE"))
+        logger.info(f"Ensured {len(INDEXES)} query indexes")
+        return True
+    except Exception as e:
+        logger.error(f"Error adding query indexes: {e}")
+        return False
+
+if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Starting migration to add query indexes")
+    success = run_migration()
+    if success:
+        logger.info("Migration completed successfully")
+    else:
+        logger.error("Migration failed")
@@ -0,0 +1,47 @@
+"""Fill the upcoming_events read table from the normalized tables
+
+init_db creates the table and runs this backfill; after that, store_concert_data and
+remove_stale_concerts keep it current per venue. This backfills databases that
+already had concerts when the table was introduced, and does nothing once the
+table has rows. Run upcoming_events.py to check it against the source tables.
+"""
+
+import os
+import sys
+# Add parent directory to path if running as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+from database import SessionLocal
+from models import UpcomingEvent
+import upcoming_events
+import logging
+
+logger = logging.getLogger('concert_app')
+
+def run_migration():
+    """Execute the migration"""
+    session = SessionLocal()
+    try:
+        if session.execute(select(UpcomingEvent.concert_id).limit(1)).first():
+            return True
+        count = upcoming_events.refresh_all(session)
+        session.commit()
+        logger.info(f"Backfilled upcoming_events with {count} concerts")
+        return True
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error backfilling upcoming_events: {e}")
+        return False
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Starting upcoming_events backfill")
+    success = run_migration()
+    if success:
+        logger.info("Migration completed successfully")
+    else:
+        logger.error("Migration failed")
@@ -14,17 +14,31 @@ from sqlalchemy import (
     UniqueConstraint,
     Boolean,
     JSON,
+    Index,
+    Float,
 )
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from base import Base
+import hashlib
+import re
+
+
+def artist_set_key(artist_names):
+    """
+    Natural-key component for a concert's line-up: a hash of the normalized,
+    de-duplicated, sorted artist names, so the same line-up always maps to the same key.
+    """
+    normalized = sorted({re.sub(r'\s+', ' ', (name or '')).strip().lower() for name in artist_names} - {''})
+    return hashlib.sha256('\x1f'.join(normalized).encode('utf-8')).hexdigest()
 
 # Association table for many-to-many relationship between concerts and artists
 concert_artists = Table(
     'concert_artists',
     Base.metadata,
     Column('concert_id', Integer, ForeignKey('concerts.id'), primary_key=True),
-    Column('artist_id', Integer, ForeignKey('artists.id'), primary_key=True)
+    Column('artist_id', Integer, ForeignKey('artists.id'), primary_key=True),
+    Index('ix_concert_artists_artist_id', 'artist_id')  # The PK only covers lookups by concert_id
 )
 
 class Artist(Base):
@@ -49,6 +63,16 @@ class Venue(Base):
     genres = Column(JSON, default=list)  # Store multiple genres as a JSON array
     # Note: PostgreSQL will use JSONB type for better performance
     last_scraped = Column(DateTime(timezone=True))  # New column
+    content_fingerprint = Column(String)  # Hash of normalized page content from the last stored scrape
+    # Adaptive refresh schedule (see refresh.py)
+    refresh_interval_hours = Column(Float)  # Learned from how often the venue's listings change
+    next_due_at = Column(DateTime(timezone=True))
+    last_changed_at = Column(DateTime(timezone=True))  # Last scrape that found new or changed events
+
+    __table_args__ = (
+        Index('ix_venues_name', 'name'),
+        Index('ix_venues_neighborhood', 'neighborhood'),
+    )
 
 class User(Base):
     __tablename__ = 'users'
@@ -76,7 +100,8 @@ user_favorites = Table(
     'user_favorites',
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
-    Column('concert_id', Integer, ForeignKey('concerts.id'), primary_key=True)
+    Column('concert_id', Integer, ForeignKey('concerts.id'), primary_key=True),
+    Index('ix_user_favorites_concert_id', 'concert_id')
 )
 
 class Concert(Base):
@@ -88,6 +113,7 @@ class Concert(Base):
     ticket_link = Column(String)
     price_range = Column(String)
     special_notes = Column(String)
+    artist_key = Column(String(64))  # artist_set_key() of the line-up; with venue and date, the natural key
     
     # Relationships
     venue = relationship('Venue')
@@ -107,6 +133,12 @@ class Concert(Base):
     # We've removed the unique constraint that was here:
     # UniqueConstraint('venue_id', 'date', name='uix_concert_venue_date')
     # A separate migration (remove_unique_constraint.py) handles dropping it from existing databases
+    # The natural key below replaces it (migrations/add_concert_natural_key.py adds it to existing databases)
+    # and also serves (venue_id, date) lookups; migrations/add_query_indexes.py adds the rest
+    __table_args__ = (
+        Index('uix_concert_natural_key', 'venue_id', 'date', 'artist_key', unique=True),
+        Index('ix_concerts_date', 'date'),
+    )
 
 class ConcertTime(Base):
     __tablename__ = 'concert_times'
@@ -116,3 +148,96 @@ class ConcertTime(Base):
     time = Column(Time, nullable=True)
     
     concert = relationship('Concert', back_populates='times')
+
+    __table_args__ = (
+        Index('ix_concert_times_concert_id_time', 'concert_id', 'time'),
+    )
+
+class ExtractionBlock(Base):
+    __tablename__ = 'extraction_blocks'
+    __table_args__ = (
+        UniqueConstraint('venue_name', 'block_hash', name='uix_extraction_block_venue_hash'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    venue_name = Column(String, nullable=False, index=True)
+    block_hash = Column(String(64), nullable=False)  # Hash of the normalized block text and its heading
+    prompt_version = Column(String, nullable=False)
+    position = Column(Integer)  # Order of the block on the page at the last run
+    records = Column(Text, nullable=False)  # JSON-encoded concerts extracted from this block
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ScrapeJob(Base):
+    __tablename__ = 'scrape_jobs'
+    __table_args__ = (
+        # At most one queued or running job per venue, so repeated enqueues are no-ops
+        Index('uix_scrape_jobs_active_venue', 'venue_name', unique=True,
+              sqlite_where=text("status IN ('queued', 'running')"),
+              postgresql_where=text("status IN ('queued', 'running')")),
+        Index('ix_scrape_jobs_claim', 'status', 'run_after'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    venue_name = Column(String, nullable=False)
+    host = Column(String)  # Rate-limit bucket, so a worker can avoid stacking jobs on one host
+    status = Column(String(16), nullable=False, default='queued')  # queued, running, done, failed
+    run_after = Column(DateTime(timezone=True), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    lease_owner = Column(String)  # Worker id holding the job
+    lease_expires_at = Column(DateTime(timezone=True))  # Extended by heartbeats; expired leases are reclaimed
+    heartbeat_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True))
+    error = Column(Text)
+
+class FetchTierStat(Base):
+    __tablename__ = 'fetch_tier_stats'
+    __table_args__ = (
+        UniqueConstraint('url', 'tier', name='uix_fetch_tier_stats_url_tier'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    url = Column(String, nullable=False)
+    tier = Column(String(16), nullable=False)  # One of crawler.FETCH_TIERS
+    attempts = Column(Integer, nullable=False, default=0)
+    successes = Column(Integer, nullable=False, default=0)  # Attempts that produced usable content
+    total_seconds = Column(Float, nullable=False, default=0.0)
+    total_bytes = Column(Integer, nullable=False, default=0)  # Markdown bytes from successful attempts
+    last_seconds = Column(Float)
+    last_bytes = Column(Integer)
+    last_attempt_at = Column(DateTime(timezone=True))
+    last_success_at = Column(DateTime(timezone=True))  # The tier with the latest success is the venue's winner
+
+class DataVersion(Base):
+    __tablename__ = 'data_versions'
+    
+    # Named counters bumped in the same transaction as the data they cover; caches key on them
+    name = Column(String(32), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True))
+
+class UpcomingEvent(Base):
+    __tablename__ = 'upcoming_events'
+    
+    # Denormalized read table for the listing: one row per concert from today on,
+    # rebuilt per venue by upcoming_events.refresh_venue whenever its concerts change
+    concert_id = Column(Integer, primary_key=True)
+    venue_id = Column(Integer, nullable=False)
+    date = Column(Date, nullable=False)
+    earliest_time = Column(Time, nullable=False)  # 23:59 when the concert has no show times
+    latest_time = Column(Time)  # Today's concerts are listed until their last show starts
+    venue_name = Column(String, nullable=False)
+    neighborhood = Column(String)
+    genres = Column(JSON)
+    artists = Column(JSON, nullable=False)  # Artist names
+    times = Column(JSON, nullable=False)  # Sorted 'HH:MM:SS' show times
+    ticket_link = Column(String)
+    price_range = Column(String)
+    special_notes = Column(String)
+    refreshed_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Keyset order of read_model.upcoming_page
+        Index('ix_upcoming_events_keyset', 'date', 'earliest_time', 'concert_id'),
+        Index('ix_upcoming_events_venue_id', 'venue_id'),
+    )
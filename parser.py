@@ -4,13 +4,79 @@ import json
 from openai import OpenAI
 import re
 from datetime import datetime, timedelta
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import llm_cache
+from rate_limit import acquire
 
 openai.api_key = OPENAI_API_KEY
 client = OpenAI()
 
 logger = logging.getLogger('concert_app')
 
+MODEL = "gpt-4o-mini"
+
+# Extraction settings - override via environment
+LLM_CHUNK_TOKENS = int(os.environ.get('LLM_CHUNK_TOKENS', '6000'))  # Input budget per chunk
+LLM_CHUNK_MAX_OUTPUT_TOKENS = int(os.environ.get('LLM_CHUNK_MAX_OUTPUT_TOKENS', '8000'))
+LLM_MAX_WORKERS = int(os.environ.get('LLM_MAX_WORKERS', '4'))  # Concurrent chunk requests per venue
+LLM_CHUNK_RETRIES = int(os.environ.get('LLM_CHUNK_RETRIES', '2'))  # Extra attempts for failed chunks only
+
+# Lines that start a new event block: a date like "March 3", "Mar 3", "3/14", "2025-03-14" or a weekday
+BLOCK_DATE_RE = re.compile(
+    r'^[*_>\-\s\[]*(?:(?:mon|tues?|wed(?:nes)?|thu(?:rs)?|fri|sat(?:ur)?|sun)(?:day)?\.?,?\s|'
+    r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2}\b|'
+    r'\d{1,2}/\d{1,2}\b|\d{4}-\d{2}-\d{2})',
+    re.IGNORECASE
+)
+
+# System prompt for the LLM extraction. Editing it changes BLOCK_PROMPT_VERSION, so
+# every stored block is re-extracted with the new wording.
+SYSTEM_PROMPT_TEMPLATE = """
+        You are an assistant that extracts concert information from the following markdown content and provides it in JSON format.
+        Focus on finding concert details like dates, times, artists, and venue information.
+
+        IMPORTANT PARSING RULES:
+        1. Extract ALL concerts occurring on {current_date} and later
+        2. For date ranges like "February 18 - February 23", create an entry for each day in the range
+        3. For listings without explicit times, use the default times given by the user, and an empty array for times if none are given
+        4. Include any band member details in the special_notes field
+        5. For recurring events (like "Every Monday Night"), create an entry with special handling
+        6. If the artist is listed as "TBA", "TBD", or "To Be Announced", skip it
+
+        Extract the concert information and output it in the following JSON format:
+        {{
+            "concerts": [
+                {{
+                    "artist": "Artist Name",
+                    "date": "YYYY-MM-DD",
+                    "times": ["HH:MM"],
+                    "venue": "Venue Name",
+                    "address": "Venue Address",
+                    "ticket_link": "URL",
+                    "price_range": null,
+                    "special_notes": "Band members: Person1 (instrument), Person2 (instrument), ..."
+                }},
+                ...
+            ]
+        }}
+
+        Important formatting rules:
+        - For date, use YYYY-MM-DD format
+        - For times, use 24-hour HH:MM format (e.g. "19:30" for 7:30 PM)
+        - If a time is not specified or unclear, provide an empty array for times: []
+        - If any other field is missing or unclear, use null
+        - Assume all times are Eastern Time
+        - Include ALL band member details in special_notes
+        """
+
+# Extra instructions for incremental extraction, where content arrives as marked blocks
+BLOCK_INSTRUCTIONS = """The content below is split into blocks, each starting with a line like "=== BLOCK 12 ===".
+        For every concert also output a "block" field with the number of the block it came from."""
+BLOCK_PROMPT_VERSION = llm_cache.prompt_version(SYSTEM_PROMPT_TEMPLATE + BLOCK_INSTRUCTIONS, MODEL)
+
 class Parser:
     def parse(self, content):
         logger.info("Starting content parse")
@@ -113,108 +179,260 @@ def parse_markdown_regex(markdown_content, venue_info):
         
     return concerts
 
-def parse_markdown(markdown_content, venue_info):
-    """Parse markdown content into concert data using OpenAI"""
-    logger = logging.getLogger('concert_app')
-    logger.info(f"Parsing markdown for {venue_info['name']} using OpenAI")
-    current_date = str(datetime.now().date())
-    
-    try:
-        # Prepare the system message
-        system_msg = f"""
-        You are an assistant that extracts concert information from the following markdown content and provides it in JSON format.
-        Focus on finding concert details like dates, times, artists, and venue information.
+def segment_blocks(markdown_content):
+    """
+    Split markdown into event-sized blocks.
 
-        IMPORTANT PARSING RULES:
-        1. Extract ALL concerts occurring on {current_date} and later
-        2. For date ranges like "February 18 - February 23", create an entry for each day in the range
-        3. For listings without explicit times, use the default times given by the user, and an empty array for times if none are given
-        4. Include any band member details in the special_notes field
-        5. For recurring events (like "Every Monday Night"), create an entry with special handling
-        6. If the artist is listed as "TBA", "TBD", or "To Be Announced", skip it
+    A new block starts at every heading and at every line that leads with a
+    date, so a block never splits one event's lines across chunks. Each block is
+    returned as (heading, text) where heading is the most recent markdown
+    heading above it, used to give chunks their month/section context.
+    """
+    blocks = []
+    current = []
+    current_heading = None
+    last_heading = None
+    for line in markdown_content.split('\n'):
+        stripped = line.strip()
+        is_heading = stripped.startswith('#')
+        if (is_heading or BLOCK_DATE_RE.match(stripped)) and current:
+            blocks.append((current_heading, '\n'.join(current)))
+            current = []
+        if not current:
+            current_heading = last_heading
+        if is_heading:
+            last_heading = stripped
+        current.append(line)
+    if current:
+        blocks.append((current_heading, '\n'.join(current)))
+    return [(heading, text) for heading, text in blocks if text.strip()]
 
-        Extract the concert information and output it in the following JSON format:
-        {{
-            "concerts": [
-                {{
-                    "artist": "Artist Name",
-                    "date": "YYYY-MM-DD",
-                    "times": ["HH:MM"],
-                    "venue": "Venue Name",
-                    "address": "Venue Address",
-                    "ticket_link": "URL",
-                    "price_range": null,
-                    "special_notes": "Band members: Person1 (instrument), Person2 (instrument), ..."
-                }},
-                ...
-            ]
-        }}
+def estimate_tokens(text):
+    """Rough token count - about 4 characters per token for English markdown"""
+    return len(text) // 4 + 1
 
-        Important formatting rules:
-        - For date, use YYYY-MM-DD format
-        - For times, use 24-hour HH:MM format (e.g. "19:30" for 7:30 PM)
-        - If a time is not specified or unclear, provide an empty array for times: []
-        - If any other field is missing or unclear, use null
-        - Assume all times are Eastern Time
-        - Include ALL band member details in special_notes
-        """
+def request_extraction(content, venue_info, current_date, max_tokens=16000, instructions=None):
+    """
+    Make one extraction call and return (concerts, usage).
 
-        # Prepare the user message with venue context
-        user_msg = f"""Parse this concert listing for {venue_info['name']}.
+    instructions is appended to the user message (e.g. block tagging).
+
+    Raises json.JSONDecodeError if the response can't be parsed, and lets API
+    errors propagate so callers can decide whether to retry or fall back.
+    """
+    # Prepare the system message
+    system_msg = SYSTEM_PROMPT_TEMPLATE.format(current_date=current_date)
+
+    # Prepare the user message with venue context
+    user_msg = f"""Parse this concert listing for {venue_info['name']}.
         Default show times are: {venue_info.get('default_times', ['8:00 PM'])}
 
         Content:
-        {markdown_content[:640000]}"""
+        {content}"""
+    if instructions:
+        user_msg = f"{instructions}\n\n{user_msg}"
 
-        # Call OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": user_msg}
-            ],
-            max_tokens=16000,
-            temperature=0,
-            response_format={ "type": "json_object" }
+    # Call OpenAI (shared rate limit across concurrent venues and chunks)
+    acquire('api.openai.com')
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": user_msg}
+        ],
+        max_tokens=max_tokens,
+        temperature=0,
+        response_format={ "type": "json_object" }
+    )
+
+    content = response.choices[0].message.content
+    # Add extra validation to catch malformed JSON
+    content = content.strip()
+    if not content.startswith('{'):
+        logger.warning("Response does not start with '{', attempting to fix JSON")
+        json_start = content.find('{')
+        if json_start >= 0:
+            content = content[json_start:]
+    if not content.endswith('}'):
+        logger.warning("Response does not end with '}', attempting to fix JSON")
+        json_end = content.rfind('}')
+        if json_end >= 0:
+            content = content[:json_end+1]
+
+    logger.debug(f"JSON content to parse: {content[:100]}...")
+    try:
+        result = json.loads(content)
+    except json.JSONDecodeError:
+        logger.error(f"Response content preview: {response.choices[0].message.content[:200]}...")
+        raise
+    concerts = result.get('concerts', [])  # Get the concerts array from the response
+    return concerts, getattr(response, 'usage', None)
+
+def concert_dedupe_key(concert):
+    """Identity of an extracted concert across chunks: artist, date and times"""
+    artist = re.sub(r'\s+', ' ', str(concert.get('artist') or '')).strip().lower()
+    times = tuple(sorted(str(t) for t in (concert.get('times') or [])))
+    return (artist, concert.get('date'), times)
+
+def merge_concerts(chunk_results):
+    """Merge per-chunk concert lists, dropping duplicates and filling in missing fields"""
+    merged = {}
+    for concerts in chunk_results:
+        for concert in concerts:
+            key = concert_dedupe_key(concert)
+            if key not in merged:
+                merged[key] = dict(concert)
+                continue
+            existing = merged[key]
+            for field, value in concert.items():
+                if value and not existing.get(field):
+                    existing[field] = value
+    return list(merged.values())
+
+def run_chunks(chunks, venue_info, current_date, instructions=None):
+    """
+    Extract chunks concurrently with bounded parallelism, retrying only the failures.
+
+    Returns ({chunk_index: concerts}, prompt_tokens, completion_tokens, failed_indexes).
+    """
+    results = {}
+    usage_totals = [0, 0]
+    pending = list(range(len(chunks)))
+    for attempt in range(LLM_CHUNK_RETRIES + 1):
+        if not pending:
+            break
+        if attempt:
+            logger.info(f"Retrying {len(pending)} failed chunks for {venue_info['name']} (attempt {attempt + 1})")
+        failed = []
+        with ThreadPoolExecutor(max_workers=min(LLM_MAX_WORKERS, len(pending))) as executor:
+            futures = {
+                executor.submit(request_extraction, chunks[i], venue_info, current_date,
+                                LLM_CHUNK_MAX_OUTPUT_TOKENS, instructions): i
+                for i in pending
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    concerts, usage = future.result()
+                    results[i] = concerts
+                    usage_totals[0] += getattr(usage, 'prompt_tokens', 0) or 0
+                    usage_totals[1] += getattr(usage, 'completion_tokens', 0) or 0
+                except Exception as e:
+                    logger.warning(f"Chunk {i + 1}/{len(chunks)} for {venue_info['name']} failed: {e}")
+                    failed.append(i)
+        pending = sorted(failed)
+    return results, usage_totals[0], usage_totals[1], pending
+
+def pack_marked_blocks(blocks, max_tokens=LLM_CHUNK_TOKENS):
+    """
+    Pack (block_id, heading, text) tuples into chunks, each block preceded by a
+    "=== BLOCK id ===" marker so records can be attributed back to their block.
+
+    Returns a list of (chunk_text, [block_ids]).
+    """
+    chunks = []
+    current, current_ids, current_tokens = [], [], 0
+    for block_id, heading, text in blocks:
+        body = text if not heading or text.lstrip().startswith('#') else f"{heading} (continued)\n{text}"
+        piece = f"=== BLOCK {block_id} ===\n{body}"
+        tokens = estimate_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(('\n\n'.join(current), current_ids))
+            current, current_ids, current_tokens = [], [], 0
+        current.append(piece)
+        current_ids.append(block_id)
+        current_tokens += tokens
+    if current:
+        chunks.append(('\n\n'.join(current), current_ids))
+    return chunks
+
+def parse_markdown_incremental(markdown_content, venue_info, cache_mode=None):
+    """
+    Re-extract only the calendar blocks that changed since the last run.
+
+    The page is segmented into event blocks; blocks whose hash matches a block
+    stored for this venue reuse its previously extracted records, and only new
+    or modified blocks are sent to the LLM. Returns (concerts, removed, complete):
+    removed holds the records of blocks that disappeared from the page, so the
+    caller can deal with stale concerts, and complete is False when some blocks
+    failed or the regex fallback was used - the page must be parsed again next run.
+    """
+    cache_mode = cache_mode or llm_cache.LLM_CACHE_MODE
+    venue_name = venue_info['name']
+    current_date = str(datetime.now().date())
+    start = time.time()
+
+    blocks = segment_blocks(markdown_content)
+    hashes = [llm_cache.block_hash(heading, text) for heading, text in blocks]
+    previous = llm_cache.load_blocks(venue_name, BLOCK_PROMPT_VERSION) if cache_mode == 'use' else {}
+
+    # Identical blocks can repeat on a page - extract each distinct one once
+    changed = {}
+    for i, hash_ in enumerate(hashes):
+        if hash_ not in previous and hash_ not in changed:
+            changed[hash_] = i
+
+    records_by_hash = {hash_: previous[hash_] for hash_ in hashes if hash_ in previous}
+    failed_blocks = []
+    prompt_tokens = completion_tokens = 0
+    if changed:
+        marked = [(i, blocks[i][0], blocks[i][1]) for i in changed.values()]
+        chunks = pack_marked_blocks(marked, LLM_CHUNK_TOKENS)
+        logger.info(f"PERFORMANCE: {venue_name} - {len(changed)} of {len(blocks)} blocks changed, "
+                    f"extracting in {len(chunks)} chunks")
+        results, prompt_tokens, completion_tokens, failed = run_chunks(
+            [text for text, _ in chunks], venue_info, current_date, BLOCK_INSTRUCTIONS
         )
+        for chunk_index, concerts in results.items():
+            block_ids = chunks[chunk_index][1]
+            chunk_records = {block_id: [] for block_id in block_ids}
+            for concert in concerts:
+                block_id = concert.pop('block', None)
+                try:
+                    block_id = int(block_id)
+                except (TypeError, ValueError):
+                    block_id = None
+                # Untagged records stay with the chunk's first block so they aren't lost
+                chunk_records[block_id if block_id in chunk_records else block_ids[0]].append(concert)
+            for block_id, block_records in chunk_records.items():
+                records_by_hash[hashes[block_id]] = block_records
+        for chunk_index in failed:
+            failed_blocks.extend(chunks[chunk_index][1])
+    else:
+        logger.info(f"PERFORMANCE: {venue_name} - all {len(blocks)} blocks unchanged, no LLM call needed")
 
-        # Parse the response with better error handling
-        try:
-            content = response.choices[0].message.content
-            # Add extra validation to catch malformed JSON
-            content = content.strip()
-            if not content.startswith('{'):
-                logger.warning("Response does not start with '{', attempting to fix JSON")
-                json_start = content.find('{')
-                if json_start >= 0:
-                    content = content[json_start:]
-            if not content.endswith('}'):
-                logger.warning("Response does not end with '}', attempting to fix JSON")
-                json_end = content.rfind('}')
-                if json_end >= 0:
-                    content = content[:json_end+1]
-                    
-            logger.debug(f"JSON content to parse: {content[:100]}...")
-            result = json.loads(content)
-            concerts = result.get('concerts', [])  # Get the concerts array from the response
-            
-            logger.info(f"OpenAI parser found {len(concerts)} concerts")
-            if concerts:
-                logger.debug(f"First concert: {concerts[0]}")
-                
-            return concerts
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing error: {str(e)}")
-            logger.error(f"Response content preview: {response.choices[0].message.content[:200]}...")
-            # Fall through to regex parser
+    if failed_blocks and len(failed_blocks) == len(changed) and not records_by_hash:
+        logger.info("All block extractions failed - falling back to regex parser")
+        return parse_markdown_regex(markdown_content, venue_info), [], False
 
-    except Exception as e:
-        logger.error(f"Error using OpenAI parser: {e}")
-        logger.exception(e)  # Log the full traceback
-        
-        # Fallback to regex parser
-        logger.info("Falling back to regex parser")
-        return parse_markdown_regex(markdown_content, venue_info)
+    # Persist what we know; keep old blocks if part of the page couldn't be extracted
+    ordered = []
+    seen = set()
+    for hash_ in hashes:
+        if hash_ in records_by_hash and hash_ not in seen:
+            seen.add(hash_)
+            ordered.append((hash_, records_by_hash[hash_]))
+    if cache_mode != 'bypass':
+        llm_cache.save_blocks(venue_name, BLOCK_PROMPT_VERSION, ordered, prune=not failed_blocks)
+
+    concerts = merge_concerts(records for _, records in ordered)
+    concerts = [c for c in concerts if not c.get('date') or str(c['date']) >= current_date]
+
+    # Records from blocks that vanished, minus events that simply moved to another block
+    removed = []
+    if not failed_blocks:
+        current_keys = {concert_dedupe_key(c)[:2] for c in concerts}
+        for hash_, records in previous.items():
+            if hash_ in records_by_hash:
+                continue
+            removed.extend(r for r in records if concert_dedupe_key(r)[:2] not in current_keys)
+
+    llm_cache.record_blocks(len(set(hashes)) - len(changed), len(changed) - len(failed_blocks),
+                            prompt_tokens + completion_tokens)
+    logger.info(f"PERFORMANCE: Incremental extraction for {venue_name} took {time.time() - start:.1f}s - "
+                f"{len(concerts)} concerts, {len(blocks) - len(changed)} blocks reused, "
+                f"{prompt_tokens + completion_tokens} tokens, {len(removed)} removed records")
+    return concerts, removed, not failed_blocks
 
 def parse_date_range(date_str):
     """Parse a date range string into start and end dates."""
@@ -1,4 +1,5 @@
 import requests
+from http_client import get_client, NotModified
 from bs4 import BeautifulSoup
 from datetime import datetime
 import urllib.parse
@@ -14,7 +15,7 @@ def scrape_quad():
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        response = requests.get(URL, headers=headers, timeout=30)
+        response = get_client().get(URL, headers=headers, timeout=30)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.text, "html.parser")
@@ -112,6 +113,8 @@ def scrape_quad():
         logging.info(f"Found {len(results)} showtimes at Quad Cinema")
         return results
         
+    except NotModified:
+        raise
     except requests.RequestException as e:
         logging.error(f"Error fetching Quad Cinema website: {e}")
         return []
@@ -0,0 +1,193 @@
+"""
+Query-plan regression check for the hot read and write paths.
+
+Seeds a synthetic dataset into a scratch database, captures the EXPLAIN plan of
+each hot query and exits non-zero if any of them falls back to a full table
+scan on a table it is supposed to reach through an index.
+
+    python query_plans.py                      # scratch SQLite file
+    QUERY_PLAN_DATABASE_URL=postgresql://... python query_plans.py --rows 50000
+
+The PostgreSQL database must be a scratch one - its tables are dropped and recreated.
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import argparse
+from datetime import date, datetime, time as datetime_time, timedelta
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from base import Base
+from models import Artist, Venue, Concert, ConcertTime, concert_artists, user_favorites, artist_set_key
+import read_model
+import upcoming_events
+
+NEIGHBORHOODS = ['Greenwich Village', 'Bushwick', 'Harlem', 'East Village', 'Flatiron', 'Williamsburg', 'Other']
+GENRES = ['Jazz', 'Clubs', 'Movies']
+
+
+def seed(engine, rows):
+    """Insert a synthetic dataset sized so the planner prefers indexes where they exist"""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    n_venues = max(50, rows // 100)
+    n_artists = max(100, rows // 2)
+    today = date.today()
+
+    with engine.begin() as conn:
+        conn.execute(Venue.__table__.insert(), [
+            {'id': i, 'name': f'Venue {i}', 'neighborhood': rng.choice(NEIGHBORHOODS), 'genres': [rng.choice(GENRES)]}
+            for i in range(1, n_venues + 1)
+        ])
+        conn.execute(Artist.__table__.insert(), [{'id': i, 'name': f'Artist {i}'} for i in range(1, n_artists + 1)])
+
+        concerts, links, times, favorites = [], [], [], []
+        for i in range(1, rows + 1):
+            artist_id = rng.randint(1, n_artists)
+            concerts.append({
+                'id': i,
+                'venue_id': rng.randint(1, n_venues),
+                'date': today + timedelta(days=rng.randint(-700, 120)),  # Mostly history, like production
+                'artist_key': artist_set_key([f'Artist {artist_id}', str(i)]),
+            })
+            links.append({'concert_id': i, 'artist_id': artist_id})
+            times.append({'concert_id': i, 'time': datetime_time(rng.choice([18, 19, 20, 21, 22]), rng.choice([0, 30]))})
+            if i % 50 == 0:
+                favorites.append({'user_id': 1, 'concert_id': i})
+        conn.execute(Concert.__table__.insert(), concerts)
+        conn.execute(concert_artists.insert(), links)
+        conn.execute(ConcertTime.__table__.insert(), times)
+        conn.execute(text("INSERT INTO users (id, email, preferred_venues, preferred_genres, preferred_neighborhoods) "
+                          "VALUES (1, 'plans@example.com', '[]', '[]', '[]')"))
+        conn.execute(user_favorites.insert(), favorites)
+
+    session = sessionmaker(bind=engine)()
+    try:
+        upcoming_events.refresh_all(session)
+        session.commit()
+    finally:
+        session.close()
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def hot_queries(session):
+    """(name, query, tables that must not be full-scanned) for each hot path"""
+    today = date.today()
+    three_months = today + timedelta(days=90)
+    now = datetime.combine(today, datetime_time(19, 0))
+    no_preferences = {'venues': [], 'neighborhoods': [], 'genres': []}
+
+    return [
+        # The index route and /api/concerts read the upcoming_events table, one keyset page at a time
+        ('index: upcoming concerts',
+         read_model.upcoming_statement(no_preferences, now, limit=100), {'upcoming_events'}),
+        ('index: next page',
+         read_model.upcoming_statement(no_preferences, now, after=(today + timedelta(days=30), now.time(), 0),
+                                       limit=100), {'upcoming_events'}),
+        ('index: preferred venues',
+         read_model.upcoming_statement(dict(no_preferences, venues=[1, 2, 3]), now, limit=100),
+         {'upcoming_events'}),
+        ('index: preferred neighborhoods/genres',
+         read_model.upcoming_statement(dict(no_preferences, neighborhoods=['Harlem', 'Bushwick'], genres=['Jazz']),
+                                       now, limit=100), {'upcoming_events'}),
+        # The selectinload queries the calendar export issues for artists and times
+        ('ics: artists for concerts',
+         session.query(concert_artists.c.concert_id, Artist)
+         .join(Artist, Artist.id == concert_artists.c.artist_id)
+         .filter(concert_artists.c.concert_id.in_([1, 2, 3])), {'artists', 'concert_artists'}),
+        ('store: artists by name',
+         session.query(Artist.id, Artist.name).filter(Artist.name.in_(['Artist 1', 'Artist 2'])), {'artists'}),
+        ('store: venue concerts in date window',
+         session.query(Concert).filter(Concert.venue_id == 1, Concert.date >= today, Concert.date <= three_months),
+         {'concerts'}),
+        ('store: venue by name',
+         session.query(Venue).filter_by(name='Venue 1'), {'venues'}),
+        ('artist -> concerts',
+         session.query(Concert).join(Concert.artists).filter(Artist.id == 1), {'concerts', 'concert_artists'}),
+        ('concert times for concerts',
+         session.query(ConcertTime).filter(ConcertTime.concert_id.in_([1, 2, 3])), {'concert_times'}),
+        ('favorites for a concert',
+         session.query(user_favorites).filter(user_favorites.c.concert_id == 1), {'user_favorites'}),
+    ]
+
+
+def explain(conn, query, dialect_name):
+    """Return (plan lines, set of fully scanned tables)"""
+    statement = query.statement if hasattr(query, 'statement') else query  # ORM Query or Core select
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    scanned = set()
+    lines = []
+    if dialect_name == 'sqlite':
+        for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")):
+            detail = row[-1]
+            lines.append(detail)
+            words = detail.split()
+            # "SCAN concerts" is a full scan; "SCAN concerts USING INDEX ..." is not
+            if words and words[0] == 'SCAN' and 'USING' not in words:
+                table = words[1]
+                if table == 'TABLE':
+                    table = words[2]
+                scanned.add(table)
+    else:
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        plan = plan if isinstance(plan, list) else json.loads(plan)
+
+        def walk(node, depth=0):
+            relation = node.get('Relation Name')
+            lines.append(f"{'  ' * depth}{node['Node Type']}{' on ' + relation if relation else ''}")
+            if node['Node Type'] == 'Seq Scan' and relation:
+                scanned.add(relation)
+            for child in node.get('Plans', []):
+                walk(child, depth + 1)
+
+        walk(plan[0]['Plan'])
+    return lines, scanned
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--rows', type=int, default=20000, help='Synthetic concerts to seed')
+    arg_parser.add_argument('--verbose', action='store_true', help='Print every plan')
+    args = arg_parser.parse_args()
+
+    url = os.environ.get('QUERY_PLAN_DATABASE_URL')
+    scratch = None
+    if not url:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        url = f"sqlite:///{scratch.name}"
+    engine = create_engine(url)
+    dialect_name = engine.dialect.name
+    print(f"Seeding {args.rows} concerts into {dialect_name} scratch database...")
+    seed(engine, args.rows)
+
+    failures = 0
+    session = sessionmaker(bind=engine)()
+    try:
+        with engine.connect() as conn:
+            for name, query, guarded in hot_queries(session):
+                lines, scanned = explain(conn, query, dialect_name)
+                regressions = scanned & guarded
+                status = 'FULL SCAN on ' + ', '.join(sorted(regressions)) if regressions else 'ok'
+                print(f"{name}: {status}")
+                if regressions or args.verbose:
+                    for line in lines:
+                        print(f"    {line}")
+                failures += bool(regressions)
+    finally:
+        session.close()
+        engine.dispose()
+        if scratch:
+            os.remove(scratch.name)
+
+    if failures:
+        print(f"{failures} hot queries regressed to full scans")
+        sys.exit(1)
+    print("All hot queries use indexes")
+
+
+if __name__ == "__main__":
+    main()
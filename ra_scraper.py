@@ -1,19 +1,29 @@
-import requests
 import json
-from bs4 import BeautifulSoup
+import re
+import tempfile
 from datetime import datetime
-from selenium import webdriver
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.common.proxy import Proxy, ProxyType
 import logging
 import random
 import time
 import os
 from fake_useragent import UserAgent
+from browser_pool import get_pool, one_off_driver, apply_firefox_blocking
+from rate_limit import acquire
+import async_fetch
+from readiness import wait_until_ready
 
 logger = logging.getLogger('concert_app')
 
+# RA pages are loaded once Next.js has embedded the Apollo state (see readiness.py)
+RA_READY = {'next_data': True, 'timeout': 30}
+
+# Fallback event cache - override via environment
+RA_CACHE_DIR = os.environ.get('RA_CACHE_DIR', os.path.join('cache', 'ra'))  # One JSON shard per venue
+RA_CACHE_MAX_AGE = int(os.environ.get('RA_CACHE_MAX_AGE', str(7 * 86400)))  # Never serve events older than this (seconds)
+LEGACY_CACHE_FILE = 'ra_cache.json'  # Pre-shard cache, still read as a fallback
+
 # Default free proxies - updated regularly but may be unreliable
 DEFAULT_PROXIES = [
     # HTTPS proxies that can be rotated - UPDATE THESE PERIODICALLY
@@ -38,36 +48,195 @@ def get_proxies():
         return env_proxies.split(',')
     return DEFAULT_PROXIES
 
+# Fallback user agents if fake_useragent fails
+FALLBACK_USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3 Mobile/15E148 Safari/604.1',
+]
+
+def build_ra_firefox_options(user_agent=None):
+    """Firefox options with RA's browser fingerprint spoofing"""
+    firefox_options = FirefoxOptions()
+    firefox_options.add_argument('--headless')
+    firefox_options.set_preference('javascript.enabled', True)
+    
+    # Extensive browser fingerprint spoofing
+    firefox_options.set_preference('dom.webdriver.enabled', False)
+    firefox_options.set_preference('useAutomationExtension', False)
+    firefox_options.set_preference('privacy.trackingprotection.enabled', False)
+    firefox_options.set_preference('network.http.referer.spoofSource', True)
+    firefox_options.set_preference('network.http.sendRefererHeader', 2)
+    firefox_options.set_preference('media.navigator.enabled', False)
+    firefox_options.set_preference('media.peerconnection.enabled', False)
+    firefox_options.set_preference('webgl.disabled', True)
+    firefox_options.set_preference('browser.cache.disk.enable', False)
+    firefox_options.set_preference('browser.cache.memory.enable', False)
+    firefox_options.set_preference('browser.privatebrowsing.autostart', True)
+    
+    # Pooled drivers get a random User-Agent each time they are (re)started
+    if not user_agent:
+        try:
+            user_agent = UserAgent().random
+        except Exception:
+            user_agent = random.choice(FALLBACK_USER_AGENTS)
+    firefox_options.set_preference('general.useragent.override', user_agent)
+    # Skip images, fonts and media; keep RA's analytics scripts, which its bot checks may expect
+    return apply_firefox_blocking(firefox_options, allow=['trackers'])
+
+get_pool().register_profile('firefox', 'ra', build_ra_firefox_options)
+
+class StaleEvents(list):
+    """Events served from the fallback cache rather than scraped just now"""
+    stale = True
+
+    def __init__(self, events, saved_at):
+        super().__init__(events)
+        self.saved_at = saved_at
+
+def cache_venue_id(url):
+    return url.split('/')[-1]
+
+def event_cache_path(url):
+    """One shard per venue, so a write never touches other venues' entries"""
+    venue_id = re.sub(r'[^\w.-]', '_', cache_venue_id(url)) or '_'
+    return os.path.join(RA_CACHE_DIR, f"{venue_id}.json")
+
 def update_event_cache(url, events):
-    """Save successful event data to cache for fallback"""
+    """Save successful event data to the venue's cache shard for fallback"""
     if not events:
         return
         
     try:
-        cache_file = 'ra_cache.json'
-        venue_id = url.split('/')[-1]
+        os.makedirs(RA_CACHE_DIR, exist_ok=True)
+        entry = {'url': url, 'saved_at': time.time(), 'events': list(events)}
         
-        # Load existing cache or create new one
-        cached_data = {}
-        if os.path.exists(cache_file):
+        # Write a temp file in the same directory, then rename over the shard - readers and
+        # concurrent writers only ever see a complete file (last writer wins)
+        fd, tmp_path = tempfile.mkstemp(dir=RA_CACHE_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, event_cache_path(url))
+        except Exception:
             try:
-                with open(cache_file, 'r') as f:
-                    cached_data = json.load(f)
-            except json.JSONDecodeError:
-                # File exists but is invalid JSON, start fresh
-                cached_data = {}
-        
-        # Update cache with new data
-        cached_data[venue_id] = events
-        
-        # Save updated cache
-        with open(cache_file, 'w') as f:
-            json.dump(cached_data, f)
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
             
-        logger.info(f"Updated cache for venue ID {venue_id} with {len(events)} events")
+        logger.info(f"Updated cache for venue ID {cache_venue_id(url)} with {len(events)} events")
     except Exception as e:
         logger.error(f"Error updating cache: {e}")
 
+def load_event_cache(url, max_age=RA_CACHE_MAX_AGE):
+    """Cached events for the venue as StaleEvents, or None if missing or older than max_age seconds"""
+    path = event_cache_path(url)
+    entry = None
+    try:
+        with open(path, 'r') as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable RA cache shard {path}: {e}")
+
+    if entry is None and os.path.exists(LEGACY_CACHE_FILE):
+        # Entries written before the cache was sharded; the file's mtime is the best age we have
+        try:
+            with open(LEGACY_CACHE_FILE, 'r') as f:
+                legacy = json.load(f)
+            if cache_venue_id(url) in legacy:
+                entry = {'saved_at': os.path.getmtime(LEGACY_CACHE_FILE), 'events': legacy[cache_venue_id(url)]}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable legacy RA cache {LEGACY_CACHE_FILE}: {e}")
+
+    if not entry or not entry.get('events'):
+        return None
+    age = time.time() - entry.get('saved_at', 0)
+    if age > max_age:
+        logger.info(f"Cached RA events for venue ID {cache_venue_id(url)} are {age / 3600:.0f}h old - too old to use")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    return StaleEvents(entry['events'], entry['saved_at'])
+
+def next_data_payload(html):
+    """
+    Slice the __NEXT_DATA__ script's JSON text out of the page without parsing the HTML.
+
+    Next.js escapes '<' inside the payload, so the first '</script' after the
+    opening tag ends it. Returns None if the page has no such script.
+    """
+    pos = html.find('__NEXT_DATA__')
+    while pos != -1:
+        tag_start = html.rfind('<', 0, pos)
+        # Must sit inside a <script ...> opening tag, not in script text like window.__NEXT_DATA__
+        if (tag_start != -1 and html.startswith('<script', tag_start)
+                and html.find('>', tag_start, pos) == -1):
+            body_start = html.find('>', pos) + 1
+            body_end = html.find('</script', body_start)
+            if body_start and body_end != -1:
+                return html[body_start:body_end]
+        pos = html.find('__NEXT_DATA__', pos + 1)
+    return None
+
+def parse_ra_time(start_time_iso):
+    """'HH:MM' from an ISO start time"""
+    if not start_time_iso:
+        return ""
+    try:
+        return datetime.fromisoformat(start_time_iso).strftime("%H:%M")
+    except Exception as e:
+        logger.warning(f"Error parsing time {start_time_iso}: {e}")
+        return start_time_iso[11:16]
+
+def events_from_apollo_state(apollo_state):
+    """Event dicts from RA's Apollo cache, resolving artist and venue __refs through a one-pass index"""
+    event_objs = []
+    refs = {}
+    for key, value in apollo_state.items():
+        if key.startswith("Event:"):
+            if value.get("__typename") == "Event":
+                event_objs.append(value)
+        elif key.startswith(("Artist:", "Venue:")):
+            refs[key] = value
+
+    events = []
+    for event in event_objs:
+        artist_names = []
+        for artist_ref in event.get("artists") or []:
+            name = refs.get(artist_ref.get("__ref"), {}).get("name")
+            if name:
+                artist_names.append(name)
+        venue_obj = refs.get((event.get("venue") or {}).get("__ref"), {})
+        time_formatted = parse_ra_time(event.get("startTime", ""))
+        events.append({
+            "artist": ", ".join(artist_names),
+            "date": (event.get("date") or "")[:10],
+            "times": [time_formatted] if time_formatted else [],
+            "venue": venue_obj.get("name", ""),
+            "address": venue_obj.get("address", ""),
+            "ticket_link": "https://ra.co" + (event.get("contentUrl") or ""),
+            "price_range": None,
+            "special_notes": ""
+        })
+    return events
+
+def extract_ra_events(html):
+    """Events embedded in an RA page; None if the page carries no Apollo state"""
+    payload = next_data_payload(html)
+    if payload is None:
+        return None
+    apollo_state = json.loads(payload).get("props", {}).get("apolloState")
+    if apollo_state is None:
+        return None
+    return events_from_apollo_state(apollo_state)
+
 def scrape_ra_requests(url, max_retries=3):
     """Scrape RA events using only requests (no browser) - faster but less reliable"""
     # Try to use fake_useragent for even better randomization
@@ -91,9 +260,6 @@ def scrape_ra_requests(url, max_retries=3):
         logger.info(f"Requests method attempt {attempt+1}/{max_retries} for {url}")
         
         try:
-            # Create new session for each attempt
-            session = requests.Session()
-            
             # Use random user agent
             user_agent = random.choice(user_agents)
             headers = {
@@ -135,23 +301,20 @@ def scrape_ra_requests(url, max_retries=3):
             else:
                 logger.info("Using direct connection (no proxy)")
             
-            # First visit the homepage to get cookies
-            try:
-                if proxy_dict:
+            # New cookie session for each attempt, sharing the async engine's connection pool.
+            # The engine applies the ra.co rate limit to both requests.
+            with async_fetch.FetchSession() as session:
+                # First visit the homepage to get cookies
+                try:
                     session.get('https://ra.co', headers=headers, proxies=proxy_dict, timeout=15)
-                else:
-                    session.get('https://ra.co', headers=headers, timeout=15)
-                # Add slight delay
-                time.sleep(random.uniform(2, 5))
-            except Exception as e:
-                logger.warning(f"Could not access homepage: {e}, continuing anyway")
-            
-            # Visit the target page
-            logger.info(f"Requesting target URL: {url}")
-            if proxy_dict:
+                    # Add slight delay
+                    time.sleep(random.uniform(2, 5))
+                except Exception as e:
+                    logger.warning(f"Could not access homepage: {e}, continuing anyway")
+
+                # Visit the target page
+                logger.info(f"Requesting target URL: {url}")
                 response = session.get(url, headers=headers, proxies=proxy_dict, timeout=30)
-            else:
-                response = session.get(url, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 html = response.text
@@ -162,83 +325,16 @@ def scrape_ra_requests(url, max_retries=3):
                     time.sleep(random.uniform(10, 20))  # Longer delay before next attempt
                     continue
                 
-                # Check if we have the data we need
-                if "__NEXT_DATA__" not in html:
+                # Pull the events out of the embedded Apollo state
+                events = extract_ra_events(html)
+                if events is None:
                     logger.warning(f"Could not find __NEXT_DATA__ on attempt {attempt+1}")
                     continue
                 
-                # Parse the data
-                soup = BeautifulSoup(html, "html.parser")
-                next_data_script = soup.find("script", id="__NEXT_DATA__")
-                
-                if next_data_script:
-                    data = json.loads(next_data_script.string)
-                    
-                    # Check if we have the Apollo state
-                    if "props" not in data or "apolloState" not in data["props"]:
-                        logger.warning(f"Apollo state not found on attempt {attempt+1}")
-                        continue
-                        
-                    apollo_state = data["props"]["apolloState"]
-                    events = []
-                    
-                    # Process events
-                    for key, value in apollo_state.items():
-                        if key.startswith("Event:") and value.get("__typename") == "Event":
-                            event = value
-                            
-                            # Process event data
-                            event_date = event.get("date", "")[:10]
-                            
-                            # Extract time info
-                            start_time_iso = event.get("startTime", "")
-                            time_formatted = ""
-                            if start_time_iso:
-                                try:
-                                    dt = datetime.fromisoformat(start_time_iso)
-                                    time_formatted = dt.strftime("%H:%M")
-                                except Exception as e:
-                                    time_formatted = start_time_iso[11:16]
-                            
-                            # Extract artist names
-                            artist_names = []
-                            for artist_ref in event.get("artists", []):
-                                ref_key = artist_ref.get("__ref")
-                                if ref_key and ref_key in apollo_state:
-                                    artist_obj = apollo_state[ref_key]
-                                    name = artist_obj.get("name")
-                                    if name:
-                                        artist_names.append(name)
-                            artist_str = ", ".join(artist_names)
-                            
-                            # Extract venue info
-                            venue_name = ""
-                            venue_address = ""
-                            venue_ref = event.get("venue", {}).get("__ref")
-                            if venue_ref and venue_ref in apollo_state:
-                                venue_obj = apollo_state[venue_ref]
-                                venue_name = venue_obj.get("name", "")
-                                venue_address = venue_obj.get("address", "")
-                            
-                            content_url = event.get("contentUrl", "")
-                            ticket_link = "https://ra.co" + content_url
-                            
-                            event_dict = {
-                                "artist": artist_str,
-                                "date": event_date,
-                                "times": [time_formatted] if time_formatted else [],
-                                "venue": venue_name,
-                                "address": venue_address,
-                                "ticket_link": ticket_link,
-                                "price_range": None,
-                                "special_notes": ""
-                            }
-                            events.append(event_dict)
-                    
-                    if events:
-                        logger.info(f"Successfully scraped {len(events)} events with requests method!")
-                        update_event_cache(url, events)
-                        return events
+                if events:
+                    logger.info(f"Successfully scraped {len(events)} events with requests method!")
+                    update_event_cache(url, events)
+                    return events
             
             logger.warning(f"Attempt {attempt+1} failed or found no events.")
             
@@ -257,14 +353,7 @@ def scrape_ra(url, max_retries=5):
         user_agents = [ua.random for _ in range(10)]
     except Exception as e:
         logger.warning(f"Could not use fake_useragent: {e}. Using fallback user agents.")
-        # Fallback user agents if fake_useragent fails
-        user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3 Safari/605.1.15',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3 Mobile/15E148 Safari/604.1',
-            'Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3 Mobile/15E148 Safari/604.1',
-        ]
+        user_agents = FALLBACK_USER_AGENTS
     
     # Get available proxies
     proxies = get_proxies()
@@ -283,41 +372,13 @@ def scrape_ra(url, max_retries=5):
         try:
             logger.info(f"Scraping RA: {url} (Attempt {attempt + 1}/{max_retries})")
             
-            # Much longer initial delay between attempts
-            base_delay = 60 + (attempt * 30)  # Starts at 60s, increases by 30s each attempt
-            jitter = random.uniform(-10, 20)  # Add randomness
-            delay = base_delay + jitter
-            logger.info(f"PERFORMANCE: RA scraper waiting {delay:.1f} seconds before attempt {attempt + 1}...")
-            start_time = datetime.now()
-            time.sleep(delay)
-            actual_delay = (datetime.now() - start_time).total_seconds()
-            logger.info(f"PERFORMANCE: RA scraper delay completed. Target: {delay:.1f}s, Actual: {actual_delay:.1f}s")
-            
-            # Setup Firefox options
-            firefox_options = FirefoxOptions()
-            firefox_options.add_argument('--headless')
-            firefox_options.set_preference('javascript.enabled', True)
-            
-            # Extensive browser fingerprint spoofing
-            firefox_options.set_preference('dom.webdriver.enabled', False)
-            firefox_options.set_preference('useAutomationExtension', False)
-            firefox_options.set_preference('privacy.trackingprotection.enabled', False)
-            firefox_options.set_preference('network.http.referer.spoofSource', True)
-            firefox_options.set_preference('network.http.sendRefererHeader', 2)
-            firefox_options.set_preference('media.navigator.enabled', False)
-            firefox_options.set_preference('media.peerconnection.enabled', False)
-            firefox_options.set_preference('webgl.disabled', True)
-            firefox_options.set_preference('browser.cache.disk.enable', False)
-            firefox_options.set_preference('browser.cache.memory.enable', False)
-            firefox_options.set_preference('browser.privatebrowsing.autostart', True)
-            
-            # Choose random User-Agent
-            current_agent = random.choice(user_agents)
-            firefox_options.set_preference('general.useragent.override', current_agent)
-            logger.info(f"Using user agent: {current_agent}")
+            # Request spacing comes from the shared ra.co token bucket; only retries back off further
+            if attempt:
+                delay = 30 * attempt + random.uniform(0, 15)
+                logger.info(f"PERFORMANCE: RA scraper backing off {delay:.1f} seconds before attempt {attempt + 1}...")
+                time.sleep(delay)
             
             # Set up proxy if available and enabled
-            proxy = None
             # Allow disabling proxies via environment variable
             use_proxies = os.environ.get('USE_PROXIES', 'true').lower() != 'false'
             
@@ -331,32 +392,39 @@ def scrape_ra(url, max_retries=5):
                 if available_proxies:
                     current_proxy = random.choice(available_proxies)
                     logger.info(f"Using proxy: {current_proxy}")
-                    
-                    # Set proxy for Firefox
-                    firefox_options.set_preference("network.proxy.type", 1)
-                    host, port = current_proxy.split(':')
-                    firefox_options.set_preference("network.proxy.http", host)
-                    firefox_options.set_preference("network.proxy.http_port", int(port))
-                    firefox_options.set_preference("network.proxy.ssl", host)
-                    firefox_options.set_preference("network.proxy.ssl_port", int(port))
-                    # No proxy for localhost
-                    firefox_options.set_preference("network.proxy.no_proxies_on", "localhost,127.0.0.1")
             else:
                 # If all proxies failed or proxies disabled, try direct connection
                 logger.info("Using direct connection (no proxy)")
                 current_proxy = None
             
-            # Create driver
-            logger.info("Initializing Firefox driver...")
-            driver = webdriver.Firefox(options=firefox_options)
-            
-            # Set a larger window size for more consistent rendering
-            driver.set_window_size(1366, 768)
-            
-            # Set a page load timeout
-            driver.set_page_load_timeout(60)
+            if current_proxy:
+                # Proxied drivers can't be shared, so start a dedicated one
+                current_agent = random.choice(user_agents)
+                logger.info(f"Using user agent: {current_agent}")
+                firefox_options = build_ra_firefox_options(current_agent)
+                
+                # Set proxy for Firefox
+                firefox_options.set_preference("network.proxy.type", 1)
+                host, port = current_proxy.split(':')
+                firefox_options.set_preference("network.proxy.http", host)
+                firefox_options.set_preference("network.proxy.http_port", int(port))
+                firefox_options.set_preference("network.proxy.ssl", host)
+                firefox_options.set_preference("network.proxy.ssl_port", int(port))
+                # No proxy for localhost
+                firefox_options.set_preference("network.proxy.no_proxies_on", "localhost,127.0.0.1")
+                driver_context = one_off_driver('firefox', firefox_options)
+            else:
+                # Direct connections reuse a warm driver with the RA profile
+                logger.info("Checking out Firefox driver from pool...")
+                driver_context = get_pool().driver('firefox', profile='ra')
             
-            try:
+            with driver_context as driver:
+                # Set a larger window size for more consistent rendering
+                driver.set_window_size(1366, 768)
+                
+                # Set a page load timeout
+                driver.set_page_load_timeout(60)
+                
                 # First visit several unrelated sites to build history and cookies
                 # Use simpler sites that are less likely to time out
                 sites = ['https://example.com', 'https://httpbin.org', 'https://neverssl.com']
@@ -372,7 +440,7 @@ def scrape_ra(url, max_retries=5):
                     try:
                         logger.info(f"Visiting {site} to build history...")
                         driver.get(site)
-                        time.sleep(random.uniform(2, 4))
+                        wait_until_ready(driver, site, baseline=3.0)
                         site_visited = True
                     except Exception as e:
                         logger.warning(f"Could not visit {site}: {e}")
@@ -384,48 +452,45 @@ def scrape_ra(url, max_retries=5):
                 try:
                     logger.info("Visiting RA homepage...")
                     driver.set_page_load_timeout(30)  # Shorter timeout for homepage
+                    acquire('ra.co')
                     driver.get('https://ra.co')
                     
-                    # Continue only if homepage loaded successfully
-                    time.sleep(random.uniform(5, 10))
+                    # Continue once the homepage has rendered
+                    wait_until_ready(driver, 'https://ra.co', RA_READY, baseline=7.5)
                     
                     # Simulate some random scrolling
                     for _ in range(2):  # Reduced number of scrolls
                         scroll_amount = random.uniform(100, 300)
                         driver.execute_script(f"window.scrollBy(0, {scroll_amount});")
-                        time.sleep(random.uniform(1, 2))
+                        time.sleep(random.uniform(0.3, 0.8))
                     
                 except Exception as e:
                     logger.warning(f"Error loading RA homepage: {e}, proceeding directly to target URL")
                     # If we couldn't load the homepage, we'll try the target URL directly
                 
-                # Wait a bit before going to target URL
-                time.sleep(random.uniform(3, 7))  # Reduced waiting time
-                
+                # Spacing between ra.co page loads comes from the shared token bucket
                 # Then visit the venue page
                 logger.info(f"Navigating to target URL: {url}")
                 driver.set_page_load_timeout(90)  # Longer timeout for main target
+                acquire('ra.co')
                 driver.get(url)
                 
-                # Longer wait for initial load
-                time.sleep(random.uniform(10, 15))
+                # The event data is server-rendered into __NEXT_DATA__ - stop waiting once it's there
+                wait_until_ready(driver, url, RA_READY, baseline=12.5)
                 
-                # Simulate more realistic user browsing behavior
+                # Simulate some user browsing behavior (short - the data is already loaded)
                 scroll_positions = [0.2, 0.4, 0.6, 0.8, 1.0]
                 random.shuffle(scroll_positions)
                 
-                for pos in scroll_positions:
+                for pos in scroll_positions[:2]:
                     # Scroll to percentage of page height
                     driver.execute_script(f"window.scrollTo(0, document.body.scrollHeight * {pos});")
-                    time.sleep(random.uniform(2, 5))
+                    time.sleep(random.uniform(0.3, 0.8))
                     
                     # Sometimes move mouse (via JavaScript)
                     if random.random() > 0.5:
                         x, y = random.randint(100, 1000), random.randint(100, 600)
-                        driver.execute_script(f"document.elementFromPoint({x}, {y}).dispatchEvent(new MouseEvent('mouseover'));")
-                
-                # Final wait to ensure everything is loaded
-                time.sleep(random.uniform(8, 15))
+                        driver.execute_script(f"document.elementFromPoint({x}, {y})?.dispatchEvent(new MouseEvent('mouseover'));")
                 
                 # Get page source
                 html = driver.page_source
@@ -438,86 +503,17 @@ def scrape_ra(url, max_retries=5):
                     logger.warning(f"Detected blocking on attempt {attempt + 1}, trying different configuration...")
                     continue
                 
-                # Parse HTML
-                soup = BeautifulSoup(html, "html.parser")
-                
-                # Extract the __NEXT_DATA__ JSON
-                next_data_script = soup.find("script", id="__NEXT_DATA__")
-                if not next_data_script:
+                # Extract the events from the __NEXT_DATA__ JSON
+                events = extract_ra_events(html)
+                if events is None:
                     logger.warning(f"Could not find __NEXT_DATA__ script on attempt {attempt + 1}, trying again...")
                     continue
-                    
-                data = json.loads(next_data_script.string)
-                
-                # Get the Apollo state that holds all our cached objects
-                apollo_state = data["props"]["apolloState"]
-                
-                events = []
-                
-                for key, value in apollo_state.items():
-                    # Process only objects that are events
-                    if key.startswith("Event:") and value.get("__typename") == "Event":
-                        event = value
-                        
-                        # Format date (YYYY-MM-DD)
-                        event_date = event.get("date", "")[:10]
-                        
-                        # Extract and format the start time to "HH:MM"
-                        start_time_iso = event.get("startTime", "")
-                        time_formatted = ""
-                        if start_time_iso:
-                            try:
-                                dt = datetime.fromisoformat(start_time_iso)
-                                time_formatted = dt.strftime("%H:%M")
-                            except Exception as e:
-                                logger.warning(f"Error parsing time {start_time_iso}: {e}")
-                                time_formatted = start_time_iso[11:16]
-                        
-                        # Get artist names by following the __ref pointers
-                        artist_names = []
-                        for artist_ref in event.get("artists", []):
-                            ref_key = artist_ref.get("__ref")
-                            if ref_key and ref_key in apollo_state:
-                                artist_obj = apollo_state[ref_key]
-                                name = artist_obj.get("name")
-                                if name:
-                                    artist_names.append(name)
-                        artist_str = ", ".join(artist_names)
-                        
-                        # Get venue details
-                        venue_name = ""
-                        venue_address = ""
-                        venue_ref = event.get("venue", {}).get("__ref")
-                        if venue_ref and venue_ref in apollo_state:
-                            venue_obj = apollo_state[venue_ref]
-                            venue_name = venue_obj.get("name", "")
-                            venue_address = venue_obj.get("address", "")
-                        
-                        # Build ticket link
-                        content_url = event.get("contentUrl", "")
-                        ticket_link = "https://ra.co" + content_url
-                        
-                        # Build the event dict
-                        event_dict = {
-                            "artist": artist_str,
-                            "date": event_date,
-                            "times": [time_formatted] if time_formatted else [],
-                            "venue": venue_name,
-                            "address": venue_address,
-                            "ticket_link": ticket_link,
-                            "price_range": None,
-                            "special_notes": ""
-                        }
-                        events.append(event_dict)
-                        logger.debug(f"Extracted event: {event_dict}")
                 
                 logger.info(f"Successfully scraped {len(events)} events on attempt {attempt + 1}")
                 # Update cache with successful results
                 update_event_cache(url, events)
                 return events
                 
-            finally:
-                driver.quit()
                 
         except Exception as e:
             logger.error(f"Error on attempt {attempt + 1}: {e}")
@@ -558,74 +554,13 @@ def scrape_ra(url, max_retries=5):
                         
                         # Check if we got blocked
                         if "Access denied" not in html and "Too many requests" not in html and "Cloudflare" not in html:
-                            # Parse HTML
-                            soup = BeautifulSoup(html, "html.parser")
-                            
-                            # Extract the __NEXT_DATA__ JSON
-                            next_data_script = soup.find("script", id="__NEXT_DATA__")
-                            if next_data_script:
-                                data = json.loads(next_data_script.string)
-                                
-                                # Get the Apollo state that holds all our cached objects
-                                apollo_state = data["props"]["apolloState"]
-                                
-                                events = []
-                                
-                                # Process events as in the main function...
-                                for key, value in apollo_state.items():
-                                    if key.startswith("Event:") and value.get("__typename") == "Event":
-                                        event = value
-                                        
-                                        # Process event data identically to the main method
-                                        event_date = event.get("date", "")[:10]
-                                        
-                                        start_time_iso = event.get("startTime", "")
-                                        time_formatted = ""
-                                        if start_time_iso:
-                                            try:
-                                                dt = datetime.fromisoformat(start_time_iso)
-                                                time_formatted = dt.strftime("%H:%M")
-                                            except Exception as e:
-                                                time_formatted = start_time_iso[11:16]
-                                        
-                                        artist_names = []
-                                        for artist_ref in event.get("artists", []):
-                                            ref_key = artist_ref.get("__ref")
-                                            if ref_key and ref_key in apollo_state:
-                                                artist_obj = apollo_state[ref_key]
-                                                name = artist_obj.get("name")
-                                                if name:
-                                                    artist_names.append(name)
-                                        artist_str = ", ".join(artist_names)
-                                        
-                                        venue_name = ""
-                                        venue_address = ""
-                                        venue_ref = event.get("venue", {}).get("__ref")
-                                        if venue_ref and venue_ref in apollo_state:
-                                            venue_obj = apollo_state[venue_ref]
-                                            venue_name = venue_obj.get("name", "")
-                                            venue_address = venue_obj.get("address", "")
-                                        
-                                        content_url = event.get("contentUrl", "")
-                                        ticket_link = "https://ra.co" + content_url
-                                        
-                                        event_dict = {
-                                            "artist": artist_str,
-                                            "date": event_date,
-                                            "times": [time_formatted] if time_formatted else [],
-                                            "venue": venue_name,
-                                            "address": venue_address,
-                                            "ticket_link": ticket_link,
-                                            "price_range": None,
-                                            "special_notes": ""
-                                        }
-                                        events.append(event_dict)
-                                
-                                if events:
-                                    logger.info(f"Successfully scraped {len(events)} events with cloudscraper!")
-                                    # Update cache with successful results
-                                    update_event_cache(url, events)
-                                    return events
+                            # Extract the events from the __NEXT_DATA__ JSON
+                            events = extract_ra_events(html)
+                            if events:
+                                logger.info(f"Successfully scraped {len(events)} events with cloudscraper!")
+                                # Update cache with successful results
+                                update_event_cache(url, events)
+                                return events
                                 
                 except Exception as cloud_error:
                     logger.error(f"Cloudscraper attempt also failed: {cloud_error}")
@@ -640,19 +575,80 @@ def scrape_ra(url, max_retries=5):
     except Exception as fallback_error:
         logger.error(f"All direct request attempts failed: {fallback_error}")
     
-    # Last resort: try to get data from cached venues file
-    try:
-        cache_file = 'ra_cache.json'
-        logger.warning(f"All methods failed, checking for cache file {cache_file}")
-        if os.path.exists(cache_file):
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-                venue_id = url.split('/')[-1]
-                if venue_id in cached_data:
-                    logger.info(f"Using cached data for venue ID {venue_id}")
-                    return cached_data[venue_id]
-    except Exception as cache_error:
-        logger.error(f"Could not use cache: {cache_error}")
+    # Last resort: serve the last good scrape, flagged as stale
+    cached = load_event_cache(url)
+    if cached:
+        age_hours = (time.time() - cached.saved_at) / 3600
+        logger.warning(f"All methods failed, using {len(cached)} cached events for {url} ({age_hours:.1f}h old)")
+        return cached
         
     logger.error(f"All scraping methods failed for {url}. No data retrieved.")
-    return []  # Return empty list if all retries failed
\ No newline at end of file
+    return []  # Return empty list if all retries failed
+
+if __name__ == "__main__":
+    # Micro-benchmark: byte-sliced __NEXT_DATA__ vs. the old full BeautifulSoup parse
+    #   python ra_scraper.py page1.html page2.html ...   # RA pages saved from a browser or scrape
+    #   python ra_scraper.py --synthetic 200             # generated page with 200 events
+    import sys
+    import tracemalloc
+    from bs4 import BeautifulSoup
+
+    def bs4_extract_events(html):
+        """The previous approach: parse the whole document, then walk apolloState"""
+        soup = BeautifulSoup(html, "html.parser")
+        apollo_state = json.loads(soup.find("script", id="__NEXT_DATA__").string)["props"]["apolloState"]
+        events = []
+        for key, value in apollo_state.items():
+            if key.startswith("Event:") and value.get("__typename") == "Event":
+                names = [apollo_state[ref["__ref"]].get("name") for ref in value.get("artists", [])
+                         if ref.get("__ref") in apollo_state]
+                events.append(", ".join(name for name in names if name))
+        return events
+
+    def synthetic_page(count):
+        state = {}
+        for i in range(count):
+            state[f"Artist:{i}"] = {"__typename": "Artist", "id": str(i), "name": f"Artist {i}"}
+            state[f"Event:{i}"] = {
+                "__typename": "Event", "id": str(i), "title": f"Night {i}",
+                "date": "2025-03-01T00:00:00.000", "startTime": "2025-03-01T23:00:00.000",
+                "contentUrl": f"/events/{i}", "artists": [{"__ref": f"Artist:{i}"}],
+                "venue": {"__ref": "Venue:1"}, "content": "Lorem ipsum dolor sit amet " * 20,
+            }
+        state["Venue:1"] = {"__typename": "Venue", "name": "Club", "address": "1 Main St"}
+        cards = "".join(f'<li><div class="card"><a href="/events/{i}"><h3>Night {i}</h3></a>'
+                        f'<span>Sat, 1 Mar</span></div></li>' for i in range(count))
+        payload = json.dumps({"props": {"apolloState": state}}).replace("<", "\\u003c")
+        return (f'<html><head><script>window.x=1</script></head><body><div id="__next"><ul>{cards}</ul>'
+                f'{"<div><span>filler</span></div>" * 2000}</div>'
+                f'<script id="__NEXT_DATA__" type="application/json">{payload}</script></body></html>')
+
+    def measure(extract, html, repeat=5):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = extract(html)
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        extract(html)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, best, peak
+
+    pages = []
+    if len(sys.argv) == 3 and sys.argv[1] == '--synthetic':
+        pages.append((f"synthetic-{sys.argv[2]}", synthetic_page(int(sys.argv[2]))))
+    else:
+        for path in sys.argv[1:]:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                pages.append((os.path.basename(path), f.read()))
+    if not pages:
+        sys.exit("usage: python ra_scraper.py PAGE.html ... | --synthetic N")
+
+    print(f"{'page':<28} {'KB':>7} {'events':>6} {'bs4 ms':>8} {'slice ms':>8} {'bs4 peak MB':>11} {'slice peak MB':>13}")
+    for name, html in pages:
+        old_events, old_time, old_peak = measure(bs4_extract_events, html)
+        new_events, new_time, new_peak = measure(extract_ra_events, html)
+        assert [e["artist"] for e in new_events] == old_events, f"{name}: extractors disagree"
+        print(f"{name[:28]:<28} {len(html) / 1024:>7.0f} {len(new_events):>6} {old_time * 1000:>8.1f} "
+              f"{new_time * 1000:>8.1f} {old_peak / 2**20:>11.1f} {new_peak / 2**20:>13.1f}")
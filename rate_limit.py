@@ -0,0 +1,131 @@
+import os
+import time
+import logging
+import threading
+from urllib.parse import urlparse
+
+logger = logging.getLogger('concert_app')
+
+# Per-host limits as (requests per minute, burst). Hosts not listed get DEFAULT_LIMIT.
+# Override or extend via RATE_LIMITS, e.g. "ra.co=2/1,api.openai.com=120/10,default=20/2"
+DEFAULT_LIMITS = {
+    'ra.co': (4, 1),  # RA blocks aggressive clients - one request every 15s
+    'api.firecrawl.dev': (15, 3),  # Firecrawl allows 20/min; keep a safety margin
+    'api.openai.com': (60, 10),
+}
+DEFAULT_LIMIT = (20, 2)  # Venue websites - one request every 3s, small burst
+
+
+def _parse_limits(spec):
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            host, value = item.split('=', 1)
+            per_minute, _, burst = value.partition('/')
+            limits[host.strip().lower()] = (float(per_minute), float(burst or 1))
+        except ValueError:
+            logger.warning(f"Ignoring malformed RATE_LIMITS entry: {item}")
+    return limits
+
+
+def host_key(url_or_host):
+    """Bucket key for a URL or host name - the host without a leading www."""
+    host = urlparse(url_or_host).hostname if '://' in url_or_host else url_or_host
+    host = (host or url_or_host).lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Take tokens, returning how long the caller must wait before using them"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            # Negative balance queues callers fairly: each waits for its own deficit
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """Registry of per-host token buckets with wait-time accounting"""
+
+    def __init__(self, limits=None, default=DEFAULT_LIMIT):
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(limits or {})
+        self.default = self.limits.pop('default', default)
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def bucket(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                per_minute, burst = self.limits.get(key, self.default)
+                bucket = self._buckets[key] = TokenBucket(per_minute / 60.0, burst)
+            return bucket
+
+    def reserve(self, url_or_host):
+        """Claim a request slot without blocking; returns the seconds the caller must wait (asyncio callers)"""
+        key = host_key(url_or_host)
+        wait = self.bucket(key).reserve()
+        with self._lock:
+            stats = self._stats.setdefault(key, {'requests': 0, 'wait_seconds': 0.0})
+            stats['requests'] += 1
+            stats['wait_seconds'] += wait
+        if wait > 0:
+            logger.debug(f"Rate limit: waiting {wait:.1f}s for {key}")
+        return wait
+
+    def acquire(self, url_or_host):
+        """Block until a request to this host is allowed; returns the seconds waited"""
+        wait = self.reserve(url_or_host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+    def stats(self):
+        """Snapshot of per-host request counts and time spent waiting"""
+        with self._lock:
+            return {key: dict(value) for key, value in self._stats.items()}
+
+    def log_stats(self):
+        stats = self.stats()
+        total_wait = sum(s['wait_seconds'] for s in stats.values())
+        busiest = sorted(stats.items(), key=lambda item: item[1]['wait_seconds'], reverse=True)[:5]
+        summary = ', '.join(f"{key}: {s['requests']} req / {s['wait_seconds']:.1f}s" for key, s in busiest)
+        logger.info(f"PERFORMANCE: Rate limiter - {len(stats)} hosts, {total_wait:.1f}s total wait ({summary})")
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """Get the process-wide rate limiter, creating it on first use"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(_parse_limits(os.environ.get('RATE_LIMITS', '')))
+        return _limiter
+
+
+def acquire(url_or_host):
+    """Wait for the host's token bucket before making a request"""
+    return get_limiter().acquire(url_or_host)
@@ -0,0 +1,236 @@
+"""
+Read-only query layer for the concert listing.
+
+Pages are read from the denormalized upcoming_events table (see
+upcoming_events.py): one indexed range scan in keyset order, no joins and no
+ORM identity map. Rows come back as ConcertRow, a __slots__ record holding
+just what the listing, the API and the calendar links use.
+
+    python read_model.py              # ORM vs read model on a 50k-concert synthetic SQLite database
+    python read_model.py --concerts 10000
+"""
+import json
+import base64
+import binascii
+from datetime import datetime, timedelta
+from sqlalchemy import select, or_, tuple_, String
+from models import UpcomingEvent
+from upcoming_events import parse_time
+
+LISTING_DAYS = 90
+
+
+class ConcertRow:
+    """One upcoming concert, read-only"""
+    __slots__ = ('id', 'date', 'ticket_link', 'price_range', 'special_notes',
+                 'venue_name', 'neighborhood', 'artists', 'times', 'earliest_time')
+
+    def __init__(self, id, date, ticket_link, price_range, special_notes,
+                 venue_name, neighborhood, artists, times, earliest_time):
+        self.id = id
+        self.date = date
+        self.ticket_link = ticket_link
+        self.price_range = price_range
+        self.special_notes = special_notes
+        self.venue_name = venue_name
+        self.neighborhood = neighborhood
+        self.artists = artists  # Artist names
+        self.times = times  # Sorted datetime.time show times
+        self.earliest_time = earliest_time
+
+    def __repr__(self):
+        return f"<ConcertRow {self.id} {self.date} {self.venue_name}: {', '.join(self.artists)}>"
+
+
+def encode_cursor(concert_date, earliest_time, concert_id):
+    """Opaque keyset cursor for the row after (date, earliest time, id)"""
+    raw = json.dumps([concert_date.isoformat(), earliest_time.strftime('%H:%M:%S'), concert_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(date, time, id) from encode_cursor; raises ValueError for anything else"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        date_str, time_str, concert_id = json.loads(raw)
+        return (datetime.strptime(date_str, '%Y-%m-%d').date(),
+                datetime.strptime(time_str, '%H:%M:%S').time(),
+                int(concert_id))
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def preference_conditions(user_preferences):
+    """WHERE clause for the user's venues, neighborhoods or genres (OR between types), or None"""
+    if not user_preferences or not any(user_preferences.values()):
+        return None
+    conditions = []
+    if user_preferences['venues']:
+        conditions.append(UpcomingEvent.venue_id.in_(user_preferences['venues']))
+    if user_preferences['neighborhoods']:
+        conditions.append(UpcomingEvent.neighborhood.in_(user_preferences['neighborhoods']))
+    if user_preferences['genres']:
+        # Check if each preferred genre is in the venue's JSON genre list, OR-ed together
+        conditions.append(or_(*[
+            UpcomingEvent.genres.cast(String).like(f'%"{genre}"%') for genre in user_preferences['genres']
+        ]))
+    return or_(*conditions)
+
+
+def upcoming_statement(user_preferences, now, after=None, limit=None):
+    """SELECT for one page of upcoming concerts ordered by (date, earliest show time, id)"""
+    today = now.date()
+    stmt = (
+        select(UpcomingEvent.concert_id, UpcomingEvent.date, UpcomingEvent.ticket_link, UpcomingEvent.price_range,
+               UpcomingEvent.special_notes, UpcomingEvent.venue_name, UpcomingEvent.neighborhood,
+               UpcomingEvent.artists, UpcomingEvent.times, UpcomingEvent.earliest_time)
+        .where(
+            UpcomingEvent.date >= today,
+            UpcomingEvent.date <= today + timedelta(days=LISTING_DAYS),
+            # Today's concerts stay listed until their last show starts
+            (UpcomingEvent.date > today) | ((UpcomingEvent.date == today) & (UpcomingEvent.latest_time >= now.time()))
+        )
+    )
+    condition = preference_conditions(user_preferences)
+    if condition is not None:
+        stmt = stmt.where(condition)
+    keyset = (UpcomingEvent.date, UpcomingEvent.earliest_time, UpcomingEvent.concert_id)
+    if after:
+        stmt = stmt.where(tuple_(*keyset) > tuple_(*after))
+    stmt = stmt.order_by(*keyset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def upcoming_page(db, user_preferences, now, after=None, limit=100):
+    """
+    One page of upcoming concerts as ConcertRow records, and the cursor for the next page (or None).
+
+    Keyset pagination: `after` is a decoded cursor, so every page costs the
+    same however far into the listing it starts.
+    """
+    result = db.execute(upcoming_statement(user_preferences, now, after, limit + 1))
+    rows = [
+        ConcertRow(concert_id, concert_date, ticket_link, price_range, special_notes, venue_name, neighborhood,
+                   artist_names, [parse_time(t) for t in show_times], parse_time(earliest))
+        for (concert_id, concert_date, ticket_link, price_range, special_notes,
+             venue_name, neighborhood, artist_names, show_times, earliest) in result
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.date, last.earliest_time, last.id)
+    return rows, next_cursor
+
+
+if __name__ == "__main__":
+    # Benchmark: the ORM listing query vs. upcoming_page on a synthetic database (never the configured one)
+    import os
+    import sys
+    import time
+    import random
+    import argparse
+    import tempfile
+    import tracemalloc
+    from datetime import time as datetime_time
+    from sqlalchemy import create_engine, func, literal, Time
+    from sqlalchemy.orm import sessionmaker, joinedload, selectinload
+    from base import Base
+    from models import Artist, Venue, Concert, ConcertTime, concert_artists
+    from upcoming_events import LATE_TIME, refresh_all
+
+    arg_parser = argparse.ArgumentParser(description='Benchmark the listing read model against the ORM path')
+    arg_parser.add_argument('--concerts', type=int, default=50000)
+    arg_parser.add_argument('--page', type=int, default=150, help='Rows per page')
+    args = arg_parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'read_model_bench.db')
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    BenchSession = sessionmaker(bind=engine)
+    random.seed(1)
+    now = datetime.now()
+    today = now.date()
+
+    print(f"Seeding {args.concerts} concerts into {path}...")
+    with engine.begin() as conn:
+        conn.execute(Venue.__table__.insert(), [
+            {'id': v, 'name': f'Venue {v}', 'neighborhood': f'Hood {v % 8}', 'genres': ['Jazz']} for v in range(1, 101)
+        ])
+        artist_count = args.concerts // 2
+        conn.execute(Artist.__table__.insert(), [{'id': a, 'name': f'Artist {a}'} for a in range(1, artist_count + 1)])
+        concerts, links, show_times = [], [], []
+        for c in range(1, args.concerts + 1):
+            concerts.append({'id': c, 'venue_id': random.randint(1, 100), 'artist_key': str(c),
+                             'date': today + timedelta(days=random.randint(1, LISTING_DAYS)),
+                             'ticket_link': f'https://tix.example/{c}', 'special_notes': 'Two sets'})
+            for a in random.sample(range(1, artist_count + 1), random.randint(1, 3)):
+                links.append({'concert_id': c, 'artist_id': a})
+            for hour in random.sample(range(12, 24), random.randint(1, 4)):
+                show_times.append({'concert_id': c, 'time': datetime_time(hour, random.choice((0, 30)))})
+        conn.execute(Concert.__table__.insert(), concerts)
+        conn.execute(concert_artists.insert(), links)
+        conn.execute(ConcertTime.__table__.insert(), show_times)
+    db = BenchSession()
+    start = time.perf_counter()
+    refresh_all(db)
+    db.commit()
+    db.close()
+    print(f"Built upcoming_events in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def orm_page(db, limit, after=None):
+        """The previous path: Concert ORM objects with venue, artists and times eager-loaded"""
+        earliest = (
+            select(func.coalesce(func.min(ConcertTime.time), literal(LATE_TIME, Time)))
+            .where(ConcertTime.concert_id == Concert.id).correlate(Concert).scalar_subquery()
+        )
+        query = (
+            db.query(Concert, earliest)
+            .options(joinedload(Concert.venue), selectinload(Concert.artists), selectinload(Concert.times))
+            .filter(Concert.date >= today, Concert.date <= today + timedelta(days=LISTING_DAYS))
+        )
+        if after:
+            query = query.filter(tuple_(Concert.date, earliest, Concert.id) > tuple_(*after))
+        rows = query.order_by(Concert.date, earliest, Concert.id).limit(limit).all()
+        # What rendering touches
+        return [(c.venue.name, [a.name for a in c.artists], sorted(t.time for t in c.times)) for c, _ in rows]
+
+    def read_model_page(db, limit, after=None):
+        rows, _ = upcoming_page(db, None, now, after, limit)
+        return [(r.venue_name, r.artists, r.times) for r in rows]
+
+    def measure(fetch, limit, after=None, repeat=3):
+        best = float('inf')
+        for _ in range(repeat):
+            db = BenchSession()
+            start = time.perf_counter()
+            result = fetch(db, limit, after)
+            best = min(best, time.perf_counter() - start)
+            db.close()
+        db = BenchSession()
+        tracemalloc.start()
+        fetch(db, limit, after)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        db.close()
+        return result, best, peak
+
+    db = BenchSession()
+    _, middle_cursor = upcoming_page(db, None, now, limit=args.concerts // 2)
+    db.close()
+    cases = [
+        ('first page', args.page, None),
+        ('middle page', args.page, decode_cursor(middle_cursor)),
+        ('full 90 days', args.concerts, None),
+    ]
+    print(f"{'case':<14} {'rows':>7} {'ORM ms':>9} {'read ms':>9} {'ORM peak MB':>12} {'read peak MB':>13}")
+    for name, limit, after in cases:
+        orm_result, orm_time, orm_peak = measure(orm_page, limit, after)
+        read_result, read_time, read_peak = measure(read_model_page, limit, after)
+        # Artist order within a concert isn't defined on either path
+        if [(v, sorted(a), t) for v, a, t in orm_result] != [(v, sorted(a), t) for v, a, t in read_result]:
+            sys.exit(f"{name}: ORM and read model disagree")
+        print(f"{name:<14} {len(read_result):>7} {orm_time * 1000:>9.0f} {read_time * 1000:>9.0f} "
+              f"{orm_peak / 2**20:>12.1f} {read_peak / 2**20:>13.1f}")
@@ -0,0 +1,144 @@
+"""
+Page readiness waits for Selenium fetches.
+
+Instead of sleeping a fixed time after driver.get(), poll until the page is
+"loaded" by the venue's own definition, up to a hard deadline. A venue entry in
+main.VENUES can declare a 'ready' spec:
+
+    {'selector': '.eventlist-event'}              # CSS selector present
+    {'selector': '.show', 'min_count': 10}        # at least N matching elements
+    {'next_data': True}                           # Next.js __NEXT_DATA__ script present (ra.co)
+    {'network_idle': True}                        # no new network requests for READY_IDLE_SECONDS
+    {'timeout': 30}                               # per-venue deadline override
+
+Keys combine (all must hold). Without a spec the generic heuristic applies:
+document complete, network idle and the rendered text stable between polls,
+with a deadline close to the old fixed sleep so pages that poll or beacon
+forever cost no more than before. Every wait is timed per venue (its listing
+URL) so the log shows how much time the old fixed sleeps would have cost.
+"""
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger('concert_app')
+
+# Readiness settings - override via environment
+READY_TIMEOUT = float(os.environ.get('READY_TIMEOUT', '15'))  # Hard deadline in seconds
+READY_GENERIC_TIMEOUT = float(os.environ.get('READY_GENERIC_TIMEOUT', '6'))  # Deadline without a spec - near the old 5s sleep
+READY_POLL_SECONDS = 0.25
+READY_IDLE_SECONDS = float(os.environ.get('READY_IDLE_SECONDS', '0.75'))  # Quiet period for network idle / stable DOM
+
+# One round trip per poll: everything the predicates need
+_PROBE_JS = """
+const sel = arguments[0];
+const body = document.body;
+const nextData = document.getElementById('__NEXT_DATA__');
+return {
+    state: document.readyState,
+    resources: performance.getEntriesByType('resource').length,
+    text: body ? body.innerText.length : 0,
+    matches: sel ? document.querySelectorAll(sel).length : 0,
+    next_data: !!(nextData && nextData.textContent.length > 2)
+};
+"""
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def _record(key, seconds, baseline, ready):
+    with _lock:
+        stats = _stats.setdefault(key, {'waits': 0, 'seconds': 0.0, 'saved': 0.0, 'timeouts': 0})
+        stats['waits'] += 1
+        stats['seconds'] += seconds
+        stats['saved'] += baseline - seconds
+        stats['timeouts'] += 0 if ready else 1
+
+
+def wait_until_ready(driver, url, spec=None, baseline=5.0):
+    """
+    Poll the page until it satisfies `spec` (or the generic heuristic) or the deadline passes.
+
+    `baseline` is the fixed sleep this wait replaces, for the time-saved telemetry.
+    Returns True if the page became ready; on timeout the caller still gets
+    whatever has rendered so far.
+    """
+    spec = spec or {}
+    generic = not any(spec.get(k) for k in ('selector', 'next_data', 'network_idle'))
+    timeout = spec.get('timeout', READY_GENERIC_TIMEOUT if generic else READY_TIMEOUT)
+    selector = spec.get('selector')
+    min_count = spec.get('min_count', 1)
+
+    start = time.monotonic()
+    deadline = start + timeout
+    last_resources = last_text = None
+    quiet_since = start
+    ready = False
+    while True:
+        now = time.monotonic()
+        try:
+            probe = driver.execute_script(_PROBE_JS, selector)
+        except Exception as e:
+            # Mid-navigation or a closed window - treat as not ready yet
+            logger.debug(f"Readiness probe failed for {url}: {e}")
+            probe = None
+
+        if probe:
+            # Network and DOM count as quiet once neither changed for READY_IDLE_SECONDS
+            changed = (probe['resources'] != last_resources or (generic and probe['text'] != last_text))
+            if changed:
+                quiet_since = now
+            last_resources, last_text = probe['resources'], probe['text']
+            idle = now - quiet_since >= READY_IDLE_SECONDS
+
+            checks = [probe['state'] in ('interactive', 'complete')]
+            if selector:
+                checks.append(probe['matches'] >= min_count)
+            if spec.get('next_data'):
+                checks.append(probe['next_data'])
+            if spec.get('network_idle'):
+                checks.append(idle)
+            if generic:
+                checks += [probe['state'] == 'complete', probe['text'] > 0, idle]
+            if all(checks):
+                ready = True
+                break
+
+        if now >= deadline:
+            break
+        time.sleep(min(READY_POLL_SECONDS, max(0.0, deadline - now)))
+
+    elapsed = time.monotonic() - start
+    _record(url, elapsed, baseline, ready)
+    if ready:
+        logger.info(f"PERFORMANCE: {url} ready after {elapsed:.2f}s ({'generic' if generic else spec})")
+    else:
+        logger.warning(f"{url} not ready after {timeout:.1f}s ({'generic' if generic else spec}) - using what rendered")
+    return ready
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+
+
+def stats():
+    """Per-URL wait counts, seconds waited, seconds saved vs. the old fixed sleeps and timeouts"""
+    with _lock:
+        return {key: dict(value) for key, value in _stats.items()}
+
+
+def log_stats():
+    snapshot = stats()
+    if not snapshot:
+        return
+    waits = sum(s['waits'] for s in snapshot.values())
+    waited = sum(s['seconds'] for s in snapshot.values())
+    saved = sum(s['saved'] for s in snapshot.values())
+    timeouts = sum(s['timeouts'] for s in snapshot.values())
+    slowest = sorted(snapshot.items(), key=lambda item: item[1]['seconds'] / item[1]['waits'], reverse=True)[:5]
+    summary = ', '.join(f"{key}: {s['seconds'] / s['waits']:.1f}s avg" for key, s in slowest)
+    logger.info(f"PERFORMANCE: Readiness - {waits} waits, {waited:.1f}s waited, {saved:.1f}s saved vs fixed sleeps, "
+                f"{timeouts} timeouts (slowest: {summary})")
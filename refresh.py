@@ -0,0 +1,94 @@
+import os
+import heapq
+import logging
+from datetime import datetime, timedelta
+import pytz
+
+logger = logging.getLogger('concert_app')
+
+# Learned per-venue refresh intervals - override via environment
+REFRESH_MIN_HOURS = float(os.environ.get('REFRESH_MIN_HOURS', '6'))
+REFRESH_MAX_HOURS = float(os.environ.get('REFRESH_MAX_HOURS', '168'))  # One week
+REFRESH_DEFAULT_HOURS = float(os.environ.get('REFRESH_DEFAULT_HOURS', '24'))
+REFRESH_SHRINK = 0.5  # Content changed: check twice as often
+REFRESH_GROWTH = 1.5  # Content unchanged: back off
+REFRESH_RETRY_HOURS = float(os.environ.get('REFRESH_RETRY_HOURS', '2'))  # After a failed scrape
+
+
+def utc(dt):
+    """Timestamps come back naive from SQLite - treat them as UTC"""
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=pytz.UTC) if dt.tzinfo is None else dt
+
+
+def clamp_hours(hours):
+    return max(REFRESH_MIN_HOURS, min(REFRESH_MAX_HOURS, hours))
+
+
+def record_scrape(venue, changed, now=None):
+    """
+    Update a venue's refresh interval after a successful scrape and schedule the next one.
+
+    Multiplicative increase/decrease: the interval settles around how often
+    the venue's listings actually change - daily for cinemas, about weekly
+    for clubs that post a week's lineup at once.
+    """
+    now = now or datetime.now(pytz.UTC)
+    interval = venue.refresh_interval_hours or REFRESH_DEFAULT_HOURS
+    if changed:
+        previous_change = utc(venue.last_changed_at)
+        if previous_change:
+            # Never wait longer than the gap we just observed between changes
+            interval = min(interval, (now - previous_change).total_seconds() / 3600)
+        interval *= REFRESH_SHRINK
+        venue.last_changed_at = now
+    else:
+        interval *= REFRESH_GROWTH
+    venue.refresh_interval_hours = clamp_hours(interval)
+    venue.last_scraped = now
+    venue.next_due_at = now + timedelta(hours=venue.refresh_interval_hours)
+    logger.info(f"{venue.name} {'changed' if changed else 'unchanged'} - "
+                f"next refresh in {venue.refresh_interval_hours:.1f}h")
+
+
+def record_failure(venue, now=None):
+    """Retry a failed venue soon without touching its learned interval"""
+    now = now or datetime.now(pytz.UTC)
+    interval = venue.refresh_interval_hours or REFRESH_DEFAULT_HOURS
+    venue.next_due_at = now + timedelta(hours=min(interval, REFRESH_RETRY_HOURS))
+
+
+def next_due(venue):
+    """When the venue should next be scraped; None if it never has been"""
+    due = utc(venue.next_due_at)
+    if due is None and venue.last_scraped:
+        # Scraped before adaptive scheduling existed: fall back to last_scraped + interval
+        due = utc(venue.last_scraped) + timedelta(hours=venue.refresh_interval_hours or REFRESH_DEFAULT_HOURS)
+    return due
+
+
+def is_due(venue, now=None):
+    due = next_due(venue)
+    return due is None or due <= (now or datetime.now(pytz.UTC))
+
+
+def build_queue(venue_infos, venue_rows):
+    """Heap of (next due, name, venue_info); venues without a row are due immediately"""
+    epoch = datetime.min.replace(tzinfo=pytz.UTC)
+    queue = []
+    for venue_info in venue_infos:
+        row = venue_rows.get(venue_info['name'])
+        due = next_due(row) if row is not None else None
+        heapq.heappush(queue, (due or epoch, venue_info['name'], venue_info))
+    return queue
+
+
+def pop_due(queue, now=None):
+    """Pop venues due by `now` (most overdue first); returns (venues, seconds until the next one)"""
+    now = now or datetime.now(pytz.UTC)
+    due = []
+    while queue and queue[0][0] <= now:
+        due.append(heapq.heappop(queue)[2])
+    wait = (queue[0][0] - now).total_seconds() if queue else None
+    return due, wait
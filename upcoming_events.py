@@ -0,0 +1,192 @@
+"""
+Materialized upcoming_events read table.
+
+The listing reads one indexed table instead of joining concerts, venues,
+concert_artists, artists and concert_times per request. Rows hold everything
+a card shows (venue name, neighborhood, genres, artist names, sorted times)
+plus the earliest/latest show time for ordering and today's filter.
+
+store_concert_data and remove_stale_concerts call refresh_venue in the same
+transaction as their writes, so readers never see the table disagree with a
+committed scrape. A plain table rather than a PostgreSQL materialized view,
+because REFRESH MATERIALIZED VIEW rebuilds everything and this refreshes one
+venue; it also works the same on SQLite.
+
+    python upcoming_events.py            # compare upcoming_events with the normalized tables
+    python upcoming_events.py --rebuild  # rebuild it from scratch first
+"""
+import logging
+from datetime import datetime, timedelta, time as datetime_time
+import pytz
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from models import Artist, Venue, Concert, ConcertTime, UpcomingEvent, concert_artists
+
+logger = logging.getLogger('concert_app')
+
+LISTING_TZ = pytz.timezone('America/New_York')
+LATE_TIME = datetime_time(23, 59)  # Sort key for concerts without show times
+SEPARATOR = '\x1f'  # group_concat separator - ASCII unit separator never appears in names
+COMPARED_FIELDS = ('venue_id', 'date', 'earliest_time', 'latest_time', 'venue_name', 'neighborhood', 'genres',
+                   'artists', 'times', 'ticket_link', 'price_range', 'special_notes')
+
+
+def horizon_start():
+    """Oldest date kept: yesterday in the listing's timezone, so no server timezone drops today's shows"""
+    return datetime.now(LISTING_TZ).date() - timedelta(days=1)
+
+
+def aggregate(is_postgres, column):
+    if is_postgres:
+        return func.array_agg(aggregate_order_by(column, column))
+    return func.group_concat(column, SEPARATOR)
+
+
+def split_aggregate(value):
+    """Aggregated column -> list; array_agg already gives one, group_concat a joined string"""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return value.split(SEPARATOR)
+
+
+def parse_time(value):
+    # SQLite stores times as 'HH:MM:SS.ffffff' strings
+    return value if isinstance(value, datetime_time) else datetime_time.fromisoformat(value)
+
+
+def source_rows(session, venue_ids=None, since=None):
+    """upcoming_events rows computed from the normalized tables: one query, artists and times aggregated"""
+    is_postgres = session.get_bind().dialect.name == 'postgresql'
+    artists = (
+        select(aggregate(is_postgres, Artist.name))
+        .select_from(concert_artists.join(Artist, Artist.id == concert_artists.c.artist_id))
+        .where(concert_artists.c.concert_id == Concert.id)
+        .correlate(Concert)
+        .scalar_subquery()
+    )
+    times = (
+        select(aggregate(is_postgres, ConcertTime.time))
+        .where(ConcertTime.concert_id == Concert.id, ConcertTime.time.isnot(None))
+        .correlate(Concert)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(Concert.id, Concert.venue_id, Concert.date, Concert.ticket_link, Concert.price_range,
+               Concert.special_notes, Venue.name, Venue.neighborhood, Venue.genres, artists, times)
+        .join(Venue, Concert.venue_id == Venue.id)
+        .where(Concert.date >= (since or horizon_start()))
+    )
+    if venue_ids is not None:
+        stmt = stmt.where(Concert.venue_id.in_(venue_ids))
+
+    now = datetime.now(pytz.UTC)
+    rows = []
+    for (concert_id, venue_id, concert_date, ticket_link, price_range, special_notes,
+         venue_name, neighborhood, genres, artist_names, show_times) in session.execute(stmt):
+        show_times = sorted(parse_time(t) for t in split_aggregate(show_times))
+        rows.append({
+            'concert_id': concert_id,
+            'venue_id': venue_id,
+            'date': concert_date,
+            'earliest_time': show_times[0] if show_times else LATE_TIME,
+            'latest_time': show_times[-1] if show_times else None,
+            'venue_name': venue_name,
+            'neighborhood': neighborhood,
+            'genres': genres,
+            'artists': sorted(split_aggregate(artist_names)),
+            'times': [t.isoformat() for t in show_times],
+            'ticket_link': ticket_link,
+            'price_range': price_range,
+            'special_notes': special_notes,
+            'refreshed_at': now,
+        })
+    return rows
+
+
+def refresh_venue(session, venue_id):
+    """Rebuild one venue's rows (and drop past ones); part of the caller's transaction"""
+    # Pending ORM deletes (remove_stale_concerts) must reach the database before we read
+    session.flush()
+    table = UpcomingEvent.__table__
+    session.execute(table.delete().where((table.c.venue_id == venue_id) | (table.c.date < horizon_start())))
+    rows = source_rows(session, venue_ids=[venue_id])
+    if rows:
+        session.execute(table.insert(), rows)
+    return len(rows)
+
+
+def refresh_all(session):
+    """Rebuild the whole table; part of the caller's transaction"""
+    session.flush()
+    table = UpcomingEvent.__table__
+    session.execute(table.delete())
+    rows = source_rows(session)
+    if rows:
+        session.execute(table.insert(), rows)
+    logger.info(f"Rebuilt upcoming_events with {len(rows)} concerts")
+    return len(rows)
+
+
+def _normalize(row):
+    """Comparable form of a row from either side (SQLite returns times as strings)"""
+    values = {name: row[name] for name in COMPARED_FIELDS}
+    for name in ('earliest_time', 'latest_time'):
+        if values[name] is not None:
+            values[name] = parse_time(values[name])
+    values['times'] = [parse_time(t) for t in values['times'] or []]
+    values['artists'] = sorted(values['artists'] or [])
+    return values
+
+
+def check_consistency(session):
+    """
+    Compare upcoming_events with the normalized tables.
+
+    Returns a list of (concert_id, problem) - empty when the table is exact.
+    """
+    since = horizon_start()
+    expected = {row['concert_id']: _normalize(row) for row in source_rows(session, since=since)}
+    table = UpcomingEvent.__table__
+    actual = {
+        row['concert_id']: _normalize(row)
+        for row in session.execute(select(table).where(table.c.date >= since)).mappings()
+    }
+
+    problems = []
+    for concert_id in sorted(expected.keys() - actual.keys()):
+        problems.append((concert_id, 'missing from upcoming_events'))
+    for concert_id in sorted(actual.keys() - expected.keys()):
+        problems.append((concert_id, 'in upcoming_events but not an upcoming concert'))
+    for concert_id in sorted(expected.keys() & actual.keys()):
+        diffs = [name for name in COMPARED_FIELDS if expected[concert_id][name] != actual[concert_id][name]]
+        if diffs:
+            problems.append((concert_id, f"differs in {', '.join(diffs)}"))
+    return problems
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    from database import SessionLocal, init_db
+
+    arg_parser = argparse.ArgumentParser(description='Check upcoming_events against the normalized tables')
+    arg_parser.add_argument('--rebuild', action='store_true', help='Rebuild the table before checking')
+    args = arg_parser.parse_args()
+
+    init_db()
+    session = SessionLocal()
+    try:
+        if args.rebuild:
+            refresh_all(session)
+            session.commit()
+        problems = check_consistency(session)
+    finally:
+        session.close()
+    for concert_id, problem in problems[:50]:
+        print(f"concert {concert_id}: {problem}")
+    if len(problems) > 50:
+        print(f"... and {len(problems) - 50} more")
+    print(f"{len(problems)} inconsistencies" if problems else "upcoming_events matches the normalized tables")
+    sys.exit(1 if problems else 0)
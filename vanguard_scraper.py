@@ -4,7 +4,7 @@ from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from dateutil import parser as dateparser
 import calendar
-import requests
+from http_client import get_client
 
 
 # --- Helper functions ---
@@ -221,7 +221,7 @@ def scrape_events(html):
 def scrape_vanguard():
     """Main scraper function to be called from outside"""
     url = "https://villagevanguard.com/"
-    response = requests.get(url)
+    response = get_client().get(url)
     response.raise_for_status()
     html = response.text
     return scrape_events(html)
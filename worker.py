@@ -0,0 +1,119 @@
+"""
+Scrape worker: claims venue jobs from the scrape_jobs queue and processes them.
+
+Runs outside the web process so browsers, LLM calls and blocking I/O don't
+compete with request serving. Any number of workers can share the queue
+(on several machines with PostgreSQL); see job_queue.py for the claim protocol.
+
+    python worker.py                    # run until SIGTERM / Ctrl-C
+    python worker.py --once             # process the jobs due now, then exit
+    python worker.py --concurrency 2
+"""
+import os
+import time
+import signal
+import logging
+import argparse
+import threading
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from database import init_db
+import job_queue
+import main as app
+
+logger = logging.getLogger('concert_app')
+
+JOB_POLL_SECONDS = int(os.environ.get('JOB_POLL_SECONDS', '10'))  # Idle wait between queue checks
+
+stop_event = threading.Event()
+
+
+def run_job(job, owner, venues_by_name):
+    """Process one claimed job under a heartbeat and record the outcome"""
+    venue_info = venues_by_name.get(job.venue_name)
+    if venue_info is None:
+        job_queue.finish(job.id, owner, error=f"Unknown venue {job.venue_name}")
+        return 0.0
+
+    start = time.time()
+    try:
+        with job_queue.Heartbeat(job.id, owner):
+            # process_venue handles scrape errors itself and schedules the venue's retry
+            app.process_venue(venue_info, None)
+        job_queue.finish(job.id, owner)
+    except Exception as e:
+        logger.error(f"Job {job.id} for {job.venue_name} failed: {e}")
+        job_queue.finish(job.id, owner, error=str(e))
+    return time.time() - start
+
+
+def run_worker(concurrency, once=False):
+    owner = job_queue.worker_id()
+    venues_by_name = {venue['name']: venue for venue in app.VENUES}
+    logger.info(f"Worker {owner} started with concurrency {concurrency}")
+
+    in_flight = {}  # future -> job
+    timings = {}
+    busy_since = None
+    last_enqueue = 0.0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            # Keep the schedule moving even if no web process is running; enqueues are idempotent
+            if time.time() - last_enqueue >= app.REFRESH_POLL_SECONDS:
+                try:
+                    job_queue.enqueue_due(app.VENUES)
+                except Exception as e:
+                    logger.error(f"Error enqueuing due venues: {e}")
+                last_enqueue = time.time()
+
+            while not stop_event.is_set() and len(in_flight) < concurrency:
+                # One job per host at a time - same-host venues would just wait on the rate limiter
+                busy_hosts = {job.host for job in in_flight.values() if job.host}
+                try:
+                    job = job_queue.claim(owner, exclude_hosts=busy_hosts)
+                except Exception as e:
+                    logger.error(f"Error claiming a job: {e}")
+                    job = None
+                if job is None:
+                    break
+                if busy_since is None:
+                    busy_since = time.time()
+                    app.reset_scrape_stats()
+                logger.info(f"Claimed {job.venue_name} (job {job.id}, attempt {job.attempts})")
+                in_flight[executor.submit(run_job, job, owner, venues_by_name)] = job
+
+            if in_flight:
+                done, _ = concurrent.futures.wait(list(in_flight), timeout=JOB_POLL_SECONDS,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    timings[job.venue_name] = future.result()
+                continue
+
+            # Queue drained: report the busy period
+            if busy_since is not None:
+                app.log_scrape_stats(timings, time.time() - busy_since)
+                busy_since = None
+                timings = {}
+            if once or stop_event.is_set():
+                break
+            stop_event.wait(JOB_POLL_SECONDS)
+    logger.info(f"Worker {owner} stopped")
+
+
+def request_stop(signum, frame):
+    logger.info("Stop requested - finishing jobs in flight")
+    stop_event.set()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Process venue scrape jobs')
+    arg_parser.add_argument('--concurrency', type=int, default=app.SCRAPER_CONCURRENCY,
+                            help='Venues processed at once by this worker')
+    arg_parser.add_argument('--once', action='store_true', help='Exit when no job is runnable')
+    args = arg_parser.parse_args()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    init_db()
+    run_worker(args.concurrency, once=args.once)